@@ -0,0 +1 @@
+"""Benchmarks for ergo's hot paths. Run one with `python -m benchmarks.<module>`."""
@@ -0,0 +1,103 @@
+"""
+Measure the throughput and latency of an AmqpInvoker end to end, over kombu's in-memory transport.
+
+    python -m benchmarks.amqp_invoker [messages]
+
+Needs no broker. Messages are published straight to the component's queue, because the in-memory transport's topic
+exchange doesn't match ergo's subscription patterns, and the component's replies are collected from a queue bound to
+everything it publishes. Throughput is measured by publishing every message up front, and latency by publishing one
+message at a time.
+"""
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+import kombu
+
+from ergo.amqp_invoker import AmqpInvoker
+from ergo.config import Config
+from ergo.function_invocable import FunctionInvocable
+from ergo.message import Message, encodes
+from ergo.util import percentile, uniqueid
+
+MESSAGES = 2000
+LATENCY_SAMPLES = 200
+POLLING_INTERVAL = 0.0001  # seconds; the in-memory transport otherwise polls its queues once a second
+TIMEOUT = 10.0  # seconds to wait for any one reply
+
+
+def echo(sent: float) -> float:
+    return sent
+
+
+class Harness:
+    """An AmqpInvoker consuming from an in-memory broker in this thread, with a queue of everything it publishes."""
+
+    def __init__(self) -> None:
+        # the in-memory broker is shared by the whole process, so every harness gets its own exchange and queues
+        exchange_name = f'benchmark-{uniqueid()}'
+        config = Config({
+            'func': f'{os.path.abspath(__file__)}:echo',
+            'exchange': exchange_name,
+            'subtopic': f'{exchange_name}.in',
+            'pubtopic': f'{exchange_name}.out',
+        })
+        self.connection = kombu.Connection('memory://', transport_options={'polling_interval': POLLING_INTERVAL})
+        self.invoker = AmqpInvoker(FunctionInvocable(config), self.connection)
+        self.invoker.consumer(self.connection.channel()).consume()
+        outputs = kombu.Queue(f'{exchange_name}:outputs', exchange=kombu.Exchange(exchange_name, type='topic'), routing_key='#')
+        self.received: List[float] = []
+        consumer = kombu.Consumer(self.connection.channel(), queues=[outputs], callbacks=[self._on_output], accept=['json'])
+        consumer.consume()
+        self._producer = kombu.Producer(self.connection.channel())
+
+    def publish(self) -> None:
+        body = encodes(Message(data={'sent': time.perf_counter()})).encode('utf-8')
+        self._producer.publish(body, routing_key=self.invoker._component_queue.name, content_encoding='binary')  # pylint: disable=protected-access
+
+    def await_outputs(self, count: int) -> None:
+        while len(self.received) < count:
+            self.connection.drain_events(timeout=TIMEOUT)
+
+    def _on_output(self, body: bytes, message: kombu.message.Message) -> None:
+        self.received.append(time.perf_counter() - json.loads(body)['data'])
+        message.ack()
+
+
+def measure(messages: int = MESSAGES, latency_samples: int = LATENCY_SAMPLES) -> Dict[str, float]:
+    """Summary.
+
+    Returns:
+        Dict[str, float]: messages per second, and the median and 99th percentile latency in seconds
+    """
+    harness = Harness()
+    start = time.perf_counter()
+    for _ in range(messages):
+        harness.publish()
+    harness.await_outputs(messages)
+    throughput = messages / (time.perf_counter() - start)
+
+    harness.received.clear()
+    for sample in range(1, latency_samples + 1):
+        harness.publish()
+        harness.await_outputs(sample)
+    latencies = sorted(harness.received)
+    harness.connection.release()
+    return {
+        'throughput': throughput,
+        'latency_p50': percentile(latencies, 0.5),
+        'latency_p99': percentile(latencies, 0.99),
+    }
+
+
+def main(messages: int = MESSAGES) -> None:
+    results = measure(messages)
+    print(f"{results['throughput']:8.1f} messages/s")
+    print(f"{results['latency_p50'] * 1e3:8.2f} ms median latency")
+    print(f"{results['latency_p99'] * 1e3:8.2f} ms 99th percentile latency")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
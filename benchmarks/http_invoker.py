@@ -0,0 +1,116 @@
+"""
+Load test the http invoker with increasing numbers of worker processes.
+
+    python -m benchmarks.http_invoker [workers ...]
+
+Each request runs a handler that holds the GIL for a couple of milliseconds, so a single worker process saturates at a
+few hundred requests per second no matter how many threads it has, and throughput should grow with each added worker
+up to the number of CPUs.
+"""
+import http.client
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from typing import List
+
+from ergo.config import Config
+from ergo.flask_http_invoker import FlaskHttpInvoker
+from ergo.function_invocable import FunctionInvocable
+
+PORT = 8089
+DURATION = 5.0  # seconds per worker count
+CLIENT_PROCESSES = 4
+CONNECTIONS_PER_CLIENT = 8
+HANDLER_ITERATIONS = 20000  # roughly 2 ms of CPU time
+
+
+def burn(n: int) -> int:
+    total = 0
+    for i in range(int(n)):
+        total += i * i
+    return total
+
+
+def serve(workers: int) -> None:
+    config = Config({'func': f'{os.path.abspath(__file__)}:burn', 'workers': workers})
+    invoker = FlaskHttpInvoker(FunctionInvocable(config))
+    invoker.port = PORT
+    invoker.start()
+
+
+def wait_until_ready(port: int, path: str, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            connection = http.client.HTTPConnection('localhost', port, timeout=1)
+            connection.request('GET', path)
+            connection.getresponse().read()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def client(port: int, path: str, deadline: float, counts: 'multiprocessing.Queue[int]') -> None:
+    completed: List[int] = []
+
+    def connection_loop() -> None:
+        connection = http.client.HTTPConnection('localhost', port, timeout=30)
+        requests = 0
+        while time.time() < deadline:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            assert response.status == 200, response.status
+            requests += 1
+        completed.append(requests)
+
+    threads = [threading.Thread(target=connection_loop) for _ in range(CONNECTIONS_PER_CLIENT)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counts.put(sum(completed))
+
+
+def load(port: int, path: str, duration: float = DURATION) -> float:
+    """Request path from several client processes, each with several keep-alive connections, for duration seconds.
+
+    Returns:
+        float: requests per second
+    """
+    counts: 'multiprocessing.Queue[int]' = multiprocessing.Queue()
+    deadline = time.time() + duration
+    clients = [multiprocessing.Process(target=client, args=(port, path, deadline, counts)) for _ in range(CLIENT_PROCESSES)]
+    for process in clients:
+        process.start()
+    total = sum(counts.get() for _ in clients)
+    for process in clients:
+        process.join()
+    return total / duration
+
+
+def measure(workers: int) -> float:
+    server = multiprocessing.Process(target=serve, args=(workers,))
+    server.start()
+    try:
+        wait_until_ready(PORT, '/?n=1')
+        return load(PORT, f'/?n={HANDLER_ITERATIONS}')
+    finally:
+        server.terminate()
+        server.join()
+
+
+def main(*worker_counts: int) -> None:
+    baseline = None
+    for workers in worker_counts or (1, 2, 4):
+        throughput = measure(workers)
+        baseline = baseline or throughput
+        print(f'{workers:>3} worker(s): {throughput:8.1f} requests/s  ({throughput / baseline:.2f}x)')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
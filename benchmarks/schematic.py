@@ -0,0 +1,73 @@
+"""
+Time `ergo graph`'s config loading and edge derivation over synthetic config trees.
+
+    python -m benchmarks.schematic [components ...]
+"""
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple, Union
+
+import yaml
+
+from ergo.schematic import derive_edges, format_topic, load_configs
+
+SIZES = (100, 1000, 10000)
+NAIVE_MAX_SIZE = 1000
+
+
+def write_config_tree(root: str, size: int, rng: random.Random) -> None:
+    """Write `size` component configs, each subscribing to a subset of the keys some other component publishes."""
+    pubtopics: List[str] = []
+    for i in range(size):
+        pubtopic = f'domain{i % 20}.event{i}'
+        subtopic = rng.choice(pubtopics).split('.')[rng.randint(0, 1)] if pubtopics else 'ingress'
+        config = {'func': f'component{i}.py:handler', 'subtopic': subtopic, 'pubtopic': pubtopic}
+        if i % 10 == 0:
+            config['error_pubtopic'] = f'error.domain{i % 20}'
+        folder = os.path.join(root, f'group{i % 100}', f'component{i}')
+        os.makedirs(folder)
+        with open(os.path.join(folder, f'component{i}.yaml'), 'w', encoding='utf8') as fh:
+            yaml.safe_dump(config, fh)
+        pubtopics.append(pubtopic)
+
+
+def naive_derive_edges(configs: List[Dict[str, Union[None, str, List[str]]]]) -> List[Tuple[str, str]]:
+    """The pairwise comparison that derive_edges replaced."""
+    edges = []
+    for pub in configs:
+        for sub in configs:
+            for pub_topic in itertools.chain(format_topic('pubtopic', pub), format_topic('error_pubtopic', pub)):
+                for sub_topic in format_topic('subtopic', sub):
+                    if sub_topic[0] != pub_topic[0] and all(element in pub_topic[1].split('.') for element in sub_topic[1].split('.')):
+                        edges.append((pub_topic[0], sub_topic[0]))
+    return edges
+
+
+def timed(func, *args):  # type: ignore
+    start = time.perf_counter()
+    ret = func(*args)
+    return ret, time.perf_counter() - start
+
+
+def main(*sizes: int) -> None:
+    for size in sizes or SIZES:
+        with tempfile.TemporaryDirectory() as root:
+            write_config_tree(root, size, random.Random(0))
+            cache_path = os.path.join(root, '.ergo', 'config_cache.json')
+            configs, load_seconds = timed(load_configs, [root], cache_path)
+            _, cached_load_seconds = timed(load_configs, [root], cache_path)
+            edges, derive_seconds = timed(derive_edges, configs)
+            report = f'{size:>6} components: load_configs {load_seconds:8.3f}s (cached {cached_load_seconds:8.3f}s), derive_edges {derive_seconds:8.3f}s ({len(edges)} edges)'
+            if size <= NAIVE_MAX_SIZE:
+                naive_edges, naive_seconds = timed(naive_derive_edges, configs)
+                assert set(naive_edges) == set(edges)
+                report = f'{report}, naive {naive_seconds:8.3f}s'
+            print(report)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
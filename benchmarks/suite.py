@@ -0,0 +1,138 @@
+"""
+Run ergo's hot path benchmarks, save the results as JSON, and flag regressions against a baseline.
+
+    python -m benchmarks.suite [--output results.json] [--baseline benchmarks/baseline.json] [--tolerance 0.25]
+    python -m benchmarks.suite --save-baseline
+
+Microbenchmarks report the best of several runs, in nanoseconds per call; the end to end AmqpInvoker run reports
+throughput and latency over kombu's in-memory transport. A result is a regression if it's worse than the baseline by
+more than the tolerance, in which case the suite exits with status 1. Baselines are only comparable on the machine
+they were recorded on.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+from typing import Any, Callable, Dict, List
+
+from benchmarks import amqp_invoker, topics
+from ergo.amqp_invoker import make_error_output
+from ergo.config import Config
+from ergo.context import Context
+from ergo.function_invocable import FunctionInvocable
+from ergo.message import Message, decodes, encodes
+from ergo.scope import Scope
+
+NUMBER = 10000  # calls per run
+REPEAT = 5
+TOLERANCE = 0.25
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def product(x: float, y: float) -> float:
+    return x * y
+
+
+def fail(x: float) -> float:
+    raise ValueError(f'cannot handle {x}')
+
+
+def make_message() -> Message:
+    data = {'x': 2, 'y': 3, 'order': {'id': 'c0ffee', 'items': [{'sku': f'sku{i}', 'quantity': i} for i in range(10)]}}
+    scope = Scope(metadata={'reply_to': 'c0ffee0123456789', 'correlation_id': '0123456789c0ffee'})
+    return Message(data=data, key='product.shipment', scope=scope)
+
+
+def make_invocable(func: str) -> FunctionInvocable:
+    return FunctionInvocable(Config({'func': f'{os.path.abspath(__file__)}:{func}', 'pubtopic': 'product'}))
+
+
+def cases() -> Dict[str, Callable[[], object]]:
+    message = make_message()
+    body = encodes(message)
+    invocable = make_invocable('product')
+    context = Context(message=message, config=invocable.config)
+    try:
+        list(make_invocable('fail').invoke(message))
+    except Exception as err:  # pylint: disable=broad-except
+        error = err
+    return {
+        'encodes': lambda: encodes(message),
+        'decodes': lambda: decodes(body),
+        'FunctionInvocable.assemble_arguments': lambda: invocable.assemble_arguments(message, context),
+        'FunctionInvocable.invoke': lambda: list(invocable.invoke(message)),
+        'make_error_output': lambda: make_error_output(error),
+        **topics.cases(),
+    }
+
+
+def run_microbenchmarks(number: int = NUMBER) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    for name, case in cases().items():
+        seconds = min(timeit.repeat(case, number=number, repeat=REPEAT))
+        results[name] = {'value': seconds / number * 1e9, 'unit': 'ns', 'better': 'lower'}
+    return results
+
+
+def run_end_to_end() -> Dict[str, Dict[str, Any]]:
+    measured = amqp_invoker.measure()
+    return {
+        'AmqpInvoker throughput': {'value': measured['throughput'], 'unit': 'messages/s', 'better': 'higher'},
+        'AmqpInvoker latency p50': {'value': measured['latency_p50'] * 1e3, 'unit': 'ms', 'better': 'lower'},
+        'AmqpInvoker latency p99': {'value': measured['latency_p99'] * 1e3, 'unit': 'ms', 'better': 'lower'},
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    """Summary.
+
+    Returns:
+        List[str]: the names of results that are worse than the baseline's by more than the tolerance
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result['value'] / baseline[name]['value'] if baseline[name]['value'] else 1.0
+        change = ratio - 1 if result['better'] == 'lower' else 1 / ratio - 1 if ratio else float('inf')
+        result['baseline'] = baseline[name]['value']
+        result['change'] = change
+        if change > tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0], formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help='file to save the results to')
+    parser.add_argument('--baseline', default=BASELINE, help='results to compare with (default: %(default)s)')
+    parser.add_argument('--save-baseline', action='store_true', help='save the results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='fraction by which a result may be worse than the baseline (default: %(default)s)')
+    parser.add_argument('--no-end-to-end', action='store_true', help='skip the AmqpInvoker run')
+    args = parser.parse_args(argv)
+
+    results = run_microbenchmarks()
+    if not args.no_end_to_end:
+        results.update(run_end_to_end())
+
+    regressions: List[str] = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)['results'], args.tolerance)
+
+    for name, result in results.items():
+        change = f"  ({result['change']:+.0%} vs baseline)" if 'change' in result else ''
+        flag = '  REGRESSION' if name in regressions else ''
+        print(f"{name:>40}: {result['value']:12.2f} {result['unit']}{change}{flag}")
+
+    document = {'python': platform.python_version(), 'machine': platform.platform(), 'results': results}
+    for path in filter(None, [args.output, args.baseline if args.save_baseline else None]):
+        with open(path, 'w') as f:
+            json.dump(document, f, indent=2, sort_keys=True)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,48 @@
+"""
+Compare TopicIndex lookups against a linear scan of every subscription.
+
+    python -m benchmarks.topic_index [subscriptions]
+"""
+import random
+import sys
+import timeit
+from typing import FrozenSet, List, Tuple
+
+from ergo.key import Key
+from ergo.topic import PubTopic, SubTopic
+from ergo.topic_index import TopicIndex
+
+VOCABULARY_SIZE = 2000
+LOOKUPS = 1000
+
+
+def make_topics(count: int, min_keys: int, max_keys: int, rng: random.Random) -> List[str]:
+    vocabulary = [f'key{i}' for i in range(VOCABULARY_SIZE)]
+    return ['.'.join(rng.sample(vocabulary, rng.randint(min_keys, max_keys))) for _ in range(count)]
+
+
+def scan(subscriptions: List[Tuple[FrozenSet[Key], int]], pubtopic: str) -> List[int]:
+    keys = PubTopic(pubtopic).keys
+    return [subscriber for subscription_keys, subscriber in subscriptions if subscription_keys <= keys]
+
+
+def main(subscription_count: int = 10000) -> None:
+    rng = random.Random(0)
+    subtopics = make_topics(subscription_count, 1, 3, rng)
+    # publish topics built from subscribed keys, so that lookups actually match
+    pubtopics = ['.'.join(rng.sample(subtopics, 3)) for _ in range(LOOKUPS)]
+
+    index: TopicIndex[int] = TopicIndex()
+    subscriptions = []
+    for i, subtopic in enumerate(subtopics):
+        index.add(subtopic, i)
+        subscriptions.append((SubTopic(subtopic).keys, i))
+    assert all(index.match(pubtopic) == scan(subscriptions, pubtopic) for pubtopic in pubtopics[:100])
+
+    for name, lookup in [('index', index.match), ('scan', lambda pubtopic: scan(subscriptions, pubtopic))]:
+        seconds = min(timeit.repeat(lambda: [lookup(pubtopic) for pubtopic in pubtopics], number=1, repeat=5))
+        print(f'{name:>6}: {seconds / LOOKUPS * 1e6:10.1f} us/lookup over {subscription_count} subscriptions')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
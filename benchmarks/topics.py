@@ -0,0 +1,39 @@
+"""
+Time the topic operations on ergo's routing hot path.
+
+    python -m benchmarks.topics
+"""
+import timeit
+from typing import Callable, Dict
+
+from ergo.key import Key
+from ergo.topic import PubTopic, SubTopic, Topic
+
+NUMBER = 100000
+TOPIC = 'product.shipment.c0ffee0123456789c0ffee0123456789'
+
+
+def cases() -> Dict[str, Callable[[], object]]:
+    pubtopic, subtopic = PubTopic(TOPIC), SubTopic(TOPIC)
+    other = Topic('shipment.c0ffee0123456789c0ffee0123456789')
+    key, same_key = Key('product'), Key('product')
+    return {
+        'Key construction': lambda: Key('product'),
+        'Key equality': lambda: key == same_key,
+        'PubTopic construction': lambda: PubTopic(TOPIC),
+        'str(PubTopic)': lambda: str(pubtopic),
+        'str(SubTopic)': lambda: str(subtopic),
+        'Topic.overlap': lambda: pubtopic.overlap(other),
+        # AmqpInvoker publishes each message with str(PubTopic(message.key))
+        'publish routing key': lambda: str(PubTopic(TOPIC)),
+    }
+
+
+def main() -> None:
+    for name, case in cases().items():
+        seconds = min(timeit.repeat(case, number=NUMBER, repeat=5))
+        print(f'{name:>22}: {seconds / NUMBER * 1e9:8.0f} ns')
+
+
+if __name__ == '__main__':
+    main()
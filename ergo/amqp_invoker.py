@@ -1,24 +1,29 @@
 """Summary."""
+from __future__ import annotations
+
 import datetime
 import logging
 import os
 import signal
 import socket
 import threading
+import time
 from contextlib import contextmanager
-from typing import Any, Callable, Dict
+from typing import Any, Callable, Dict, List, Optional
 from urllib.parse import urlparse
 
 import kombu
 import kombu.exceptions
 import kombu.message
-from kombu.pools import producers
+from kombu.pools import ProducerPool
 
+from ergo.config import Config
 from ergo.function_invocable import FunctionInvocable
 from ergo.invoker import Invoker
-from ergo.message import Message, decodes, encodes
+from ergo.message import Message, decodes, encodes, end_of_stream
+from ergo.metrics import ComponentMetrics, serve_metrics, timed
 from ergo.topic import PubTopic, SubTopic
-from ergo.util import extract_from_stack, instance_id
+from ergo.util import extract_from_stack, uniqueid
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +40,11 @@ def set_param(host: str, param_key: str, param_val: str) -> str:
     return uri._replace(query='&'.join(params)).geturl()
 
 
+def make_connection(config: Config) -> kombu.Connection:
+    heartbeat = config.heartbeat or DEFAULT_HEARTBEAT
+    return kombu.Connection(config.host, heartbeat=heartbeat)
+
+
 def make_error_output(err: Exception) -> Dict[str, str]:
     """Make a more digestible error output."""
     orig = err.__context__ or err
@@ -53,101 +63,174 @@ def make_error_output(err: Exception) -> Dict[str, str]:
 class AmqpInvoker(Invoker):
     """Summary."""
 
-    def __init__(self, invocable: FunctionInvocable) -> None:
+    def __init__(self, invocable: FunctionInvocable, connection: Optional[kombu.Connection] = None) -> None:
         super().__init__(invocable)
 
-        heartbeat = self._invocable.config.heartbeat or DEFAULT_HEARTBEAT
-        self._connection = kombu.Connection(self._invocable.config.host, heartbeat=heartbeat)
+        self._connection = connection or make_connection(self._invocable.config)
         self._exchange = kombu.Exchange(name=self._invocable.config.exchange, type="topic", durable=True, auto_delete=False)
 
         component_queue_name = f"{self._invocable.config.func}".replace("/", ":")
         if component_queue_name.startswith(":"):
             component_queue_name = component_queue_name[1:]
         self._component_queue = kombu.Queue(name=component_queue_name, exchange=self._exchange, routing_key=str(SubTopic(self._invocable.config.subtopic)), durable=False)
-        instance_queue_name = f"{component_queue_name}:{instance_id()}"
-        self._instance_queue = kombu.Queue(name=instance_queue_name, exchange=self._exchange, routing_key=str(SubTopic(instance_id())), auto_delete=True)
+        instance_queue_name = f"{component_queue_name}:{self._invocable.config.instance_id}"
+        self._instance_queue = kombu.Queue(name=instance_queue_name, exchange=self._exchange, routing_key=str(SubTopic(self._invocable.config.instance_id)), auto_delete=True)
         error_queue_name = f"{component_queue_name}:error"
         self._error_queue = kombu.Queue(name=error_queue_name, exchange=self._exchange, routing_key=error_queue_name, durable=False)
 
-        self._terminating = threading.Event()
         self._pending_invocations = threading.Semaphore()
-        self._handler_lock = threading.Lock()
+        # with the default concurrency of 1, handler threads execute sequentially
+        self._handler_lock = threading.BoundedSemaphore(self._invocable.config.concurrency)
+        self._prefetch_count = max(PREFETCH_COUNT, self._invocable.config.concurrency)
+        # a producer for every handler thread that may run at once; kombu's shared pool would limit them to ten
+        self._producers = ProducerPool(self._connection.Pool(limit=self._invocable.config.concurrency), limit=self._invocable.config.concurrency)
+        self._metrics = ComponentMetrics(component_queue_name)
+
+    @property
+    def metrics_port(self) -> Optional[int]:
+        return self._invocable.config.metrics_port
 
     def start(self) -> int:
-        signal.signal(signal.SIGTERM, self._shutdown)
-        signal.signal(signal.SIGINT, self._shutdown)
-        with self._connection:
-            conn = self._connection
-            consumer: kombu.Consumer = conn.Consumer(queues=[self._component_queue, self._instance_queue], prefetch_count=PREFETCH_COUNT, accept=["json"])
-            consumer.register_callback(self._start_handle_message_thread)
-            consumer.consume()
-            while not self._terminating.is_set():
-                try:
-                    # wait up to 1s for the next message before sending a heartbeat
-                    conn.drain_events(timeout=1)
-                except socket.timeout:
-                    conn.heartbeat_check()
-                except conn.recoverable_connection_errors:
-                    if self._terminating.is_set():
-                        continue
-                    logger.warning("connection closed. reviving.")
-                    conn = self._connection.clone()
-                    conn.ensure_connection()
-                    consumer.revive(conn.channel())
-                    consumer.consume()
-        return 0
+        return AmqpHost(self._connection, [self]).start()
+
+    def consumer(self, channel: Any) -> kombu.Consumer:
+        """Create a consumer for this component's queues on its own channel, so that prefetch applies per component."""
+        consumer = kombu.Consumer(channel, queues=[self._component_queue, self._instance_queue], prefetch_count=self._prefetch_count, accept=["json"])
+        consumer.register_callback(self._start_handle_message_thread)
+        return consumer
+
+    def await_pending_invocations(self, timeout: float) -> None:
+        self._pending_invocations.acquire(blocking=True, timeout=timeout)
 
     def _start_handle_message_thread(self, body: str, message: kombu.message.Message) -> None:
-        # _handle_sigterm will wait for _handle_message to release this semaphore
+        # _shutdown will wait for _handle_message to release this semaphore
         self._pending_invocations.acquire(blocking=False)
+        self._metrics.consumed.inc()
+        self._metrics.in_flight.inc()
         threading.Thread(target=self._handle_message, args=(body, message.ack)).start()
 
     def _handle_message(self, body: str, ack: Callable[[], None]) -> None:
-        # there may be up to PREFETCH_COUNT _handle_message threads alive at a time, but we want them to execute
-        # sequentially to guarantee that messages are acknowledged in the order they're received
+        # there may be up to _prefetch_count _handle_message threads alive at a time. Unless the component is
+        # configured for more concurrency, we want them to execute sequentially to guarantee that messages are
+        # acknowledged in the order they're received
         with self._handler_lock:
             try:
                 if self._invocable.config.acks_early:
                     ack()
+                    self._metrics.acked.inc()
+                start = time.monotonic()
                 ergo_message = decodes(body)
+                self._metrics.decode_duration.observe(time.monotonic() - start)
+                self._metrics.received(ergo_message.scope.published)
                 self._handle_message_inner(ergo_message)
             finally:
                 if not self._invocable.config.acks_early:
                     ack()
+                    self._metrics.acked.inc()
+                self._metrics.in_flight.dec()
                 self._pending_invocations.release()
 
     def _handle_message_inner(self, message_in: Message) -> None:
-        try:
-            for message_out in self.invoke_handler(message_in):
-                routing_key = str(PubTopic(message_out.key))
-                self._publish(message_out, routing_key)
-        except Exception as err:  # pylint: disable=broad-except
-            dt = datetime.datetime.now(datetime.timezone.utc)
-            message_in.error = make_error_output(err)
-            message_in.scope.metadata['timestamp'] = dt.isoformat()
-            self._publish(message_in, self._error_queue.name)
-            if self._invocable.config.error_pubtopic is not None:
-                self._publish(message_in, str(PubTopic(self._invocable.config.error_pubtopic)))
-
-    def _publish(self, ergo_message: Message, routing_key: str) -> None:
-        amqp_message = encodes(ergo_message).encode("utf-8")
+        # only the component that handles a streaming request ends its stream, not the components downstream of it
+        stream = message_in.scope.metadata.pop('stream', False) and message_in.scope.reply_to
+        error = None
+        # every message published for message_in goes out on one producer's channel, so that the broker delivers a
+        # stream's end after its replies
         with self._producer() as producer:
-            producer.publish(
-                amqp_message,
-                content_encoding="binary",
-                exchange=self._exchange,
-                routing_key=routing_key,
-                retry=True,
-                declare=[self._instance_queue, self._error_queue],
-            )
+            try:
+                for message_out in timed(self.invoke_handler(message_in), self._metrics.handler_duration):
+                    routing_key = str(PubTopic(message_out.key))
+                    self._publish(producer, message_out, routing_key)
+            except Exception as err:  # pylint: disable=broad-except
+                self._metrics.errored.inc()
+                dt = datetime.datetime.now(datetime.timezone.utc)
+                message_in.error = error = make_error_output(err)
+                message_in.scope.metadata['timestamp'] = dt.isoformat()
+                self._publish(producer, message_in, self._error_queue.name)
+                if self._invocable.config.error_pubtopic is not None:
+                    self._publish(producer, message_in, str(PubTopic(self._invocable.config.error_pubtopic)))
+            if stream:
+                eos = end_of_stream(message_in.scope, error)
+                self._publish(producer, eos, str(PubTopic(eos.key)))
+
+    def _publish(self, producer: kombu.Producer, ergo_message: Message, routing_key: str) -> None:
+        ergo_message.scope.published = time.time()
+        start = time.monotonic()
+        amqp_message = encodes(ergo_message).encode("utf-8")
+        self._metrics.encode_duration.observe(time.monotonic() - start)
+        start = time.monotonic()
+        producer.publish(
+            amqp_message,
+            content_encoding="binary",
+            exchange=self._exchange,
+            routing_key=routing_key,
+            retry=True,
+            declare=[self._instance_queue, self._error_queue],
+        )
+        self._metrics.publish_duration.observe(time.monotonic() - start)
 
     @contextmanager
     def _producer(self) -> kombu.Producer:
-        with producers[self._connection].acquire(block=True) as conn:
+        with self._producers.acquire(block=True) as conn:
             yield conn
 
+
+class AmqpHost:
+    """
+    Run one or more AmqpInvokers in a single process.
+
+    The invokers share one broker connection and heartbeat loop, but each consumes on its own channel with its own
+    prefetch count, handler concurrency and error queue.
+    """
+
+    def __init__(self, connection: kombu.Connection, invokers: List[AmqpInvoker]) -> None:
+        self._connection = connection
+        self._invokers = invokers
+        self._terminating = threading.Event()
+
+    @classmethod
+    def from_invocables(cls, invocables: List[FunctionInvocable]) -> AmqpHost:
+        configs = [invocable.config for invocable in invocables]
+        if len({(config.host, config.heartbeat) for config in configs}) > 1:
+            raise ValueError("components hosted by one process must share a host and heartbeat")
+        if len(configs) > 1:
+            # give each component its own instance queue, so that replies are only delivered to the requester
+            for config in configs:
+                config.instance_id = uniqueid()
+        connection = make_connection(configs[0])
+        return cls(connection, [AmqpInvoker(invocable, connection) for invocable in invocables])
+
+    def start(self) -> int:
+        signal.signal(signal.SIGTERM, self._shutdown)
+        signal.signal(signal.SIGINT, self._shutdown)
+        # every port configured for the hosted components serves the metrics of all of them
+        for port in {invoker.metrics_port for invoker in self._invokers} - {None}:
+            serve_metrics(port)
+        with self._connection:
+            conn = self._connection
+            consumers = [invoker.consumer(conn.channel()) for invoker in self._invokers]
+            for consumer in consumers:
+                consumer.consume()
+            while not self._terminating.is_set():
+                try:
+                    # wait up to 1s for the next message before sending a heartbeat
+                    conn.drain_events(timeout=1)
+                except socket.timeout:
+                    conn.heartbeat_check()
+                except conn.recoverable_connection_errors:
+                    if self._terminating.is_set():
+                        continue
+                    logger.warning("connection closed. reviving.")
+                    conn = self._connection.clone()
+                    conn.ensure_connection()
+                    for consumer in consumers:
+                        consumer.revive(conn.channel())
+                        consumer.consume()
+        return 0
+
     def _shutdown(self, signum: int, *_: Any) -> None:
         self._terminating.set()
-        self._pending_invocations.acquire(blocking=True, timeout=TERMINATION_GRACE_PERIOD)
+        for invoker in self._invokers:
+            invoker.await_pending_invocations(TERMINATION_GRACE_PERIOD)
         self._connection.close()
         os.kill(os.getpid(), 0)
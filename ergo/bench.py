@@ -0,0 +1,220 @@
+"""Summary."""
+import asyncio
+import itertools
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import aio_pika
+
+from ergo.amqp_invoker import set_param
+from ergo.config import Config
+from ergo.correlation import CorrelationTable
+from ergo.message import EncodedMessage, Message, decode, encodes, peek
+from ergo.topic import PubTopic, SubTopic
+from ergo.util import instance_id, percentile, uniqueid
+
+DEFAULT_DURATION = 10.0  # seconds
+DEFAULT_TIMEOUT = 30.0  # seconds to wait for a reply
+PERCENTILES = {'p50': 0.5, 'p90': 0.9, 'p99': 0.99, 'p99.9': 0.999, 'max': 1.0}
+
+
+@dataclass
+class BenchResult:
+    mode: str  # 'open' or 'closed'
+    duration: float  # seconds from the first request to the last reply
+    sent: int = 0
+    replies: int = 0
+    errors: int = 0  # replies with an error
+    timeouts: int = 0
+    latency: Dict[str, float] = field(default_factory=dict)  # seconds, by percentile name, corrected for coordinated omission
+    uncorrected_latency: Dict[str, float] = field(default_factory=dict)  # seconds, from when each request was sent
+
+    @property
+    def throughput(self) -> float:
+        return self.replies / self.duration if self.duration else 0.0
+
+
+def samples(path: Optional[str], data: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """Cycle through the request parameters on each line of an NDJSON file, or repeat data forever.
+
+    Args:
+        path (Optional[str]): file of JSON objects, one per line
+        data (Optional[Dict[str, Any]]): request parameters to send if there's no file
+
+    Returns:
+        Iterator[Dict[str, Any]]: Description
+    """
+    if path is None:
+        return itertools.repeat(data or {})
+    with open(path, 'r') as fh:
+        lines = [json.loads(line) for line in fh if line.strip()]
+    if not lines:
+        raise ValueError(f'no samples in {path}')
+    return itertools.cycle(lines)
+
+
+def summarize(latencies: Iterable[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {name: percentile(ordered, fraction) for name, fraction in PERCENTILES.items()}
+
+
+def correct_for_coordinated_omission(latencies: Sequence[float], expected_interval: float) -> List[float]:
+    """Add the latencies of the requests a closed loop didn't send while it waited for slow replies.
+
+    A closed loop only sends its next request once it has a reply, so a stall delays one request but hides how long
+    the requests that would otherwise have been sent during it would have waited. For each latency longer than
+    expected_interval, this adds a request for every expected_interval it took, each waiting that much less, as
+    HdrHistogram's recordValueWithExpectedInterval does.
+
+    Args:
+        latencies (Sequence[float]): Description
+        expected_interval (float): seconds between requests when replies aren't delayed
+
+    Returns:
+        List[float]: Description
+    """
+    corrected = list(latencies)
+    if expected_interval <= 0:
+        return corrected
+    for latency in latencies:
+        missed = latency - expected_interval
+        while missed >= expected_interval:
+            corrected.append(missed)
+            missed -= expected_interval
+    return corrected
+
+
+class LoadGenerator:
+    """
+    Publish requests to a component's subtopic, and time its replies.
+
+    Requests are addressed, like the gateway's, with a reply_to of this process's instance id and a new correlation id,
+    and replies are collected from an exclusive queue bound to the instance id.
+
+    In an open loop, requests are sent at a fixed rate regardless of how quickly replies arrive, and each latency is
+    measured from when its request was due to be sent, so that a publisher that falls behind doesn't understate it. In a
+    closed loop, `concurrency` requests are kept in flight, and latencies are corrected for coordinated omission with
+    the median latency as the expected interval.
+    """
+
+    def __init__(self, config: Config, params: Iterator[Dict[str, Any]], timeout: float = DEFAULT_TIMEOUT) -> None:
+        self._config = config
+        self._params = params
+        self._timeout = timeout
+        self._replies: CorrelationTable[EncodedMessage] = CorrelationTable()
+        self._exchange: Optional[aio_pika.abc.AbstractExchange] = None
+        self._latencies: List[float] = []  # from when each request was due
+        self._send_latencies: List[float] = []  # from when each request was sent
+        self._result = BenchResult(mode='', duration=0.0)
+
+    def run(self, rate: Optional[float] = None, concurrency: Optional[int] = None, duration: float = DEFAULT_DURATION) -> BenchResult:
+        """Summary.
+
+        Args:
+            rate (Optional[float]): requests per second, for an open loop
+            concurrency (Optional[int]): requests in flight, for a closed loop; 1 unless rate is given
+            duration (float): seconds to send requests for
+
+        Returns:
+            BenchResult: Description
+        """
+        if rate is not None and concurrency is not None:
+            raise ValueError('a load is either open, at a rate, or closed, at a concurrency')
+        return asyncio.run(self._run(rate, concurrency or 1, duration))
+
+    async def _run(self, rate: Optional[float], concurrency: int, duration: float) -> BenchResult:
+        host = self._config.host
+        heartbeat = self._config.heartbeat
+        connection = await aio_pika.connect_robust(set_param(host, 'heartbeat', str(heartbeat)) if heartbeat else host)
+        async with connection:
+            channel = await connection.channel()
+            self._exchange = await channel.declare_exchange(name=self._config.exchange, passive=True)
+            queue = await channel.declare_queue(name=f'bench:{instance_id()}', exclusive=True)
+            await queue.bind(exchange=self._exchange, routing_key=str(SubTopic(instance_id())))
+            consumer = asyncio.ensure_future(self._consume(queue))
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            try:
+                if rate is not None:
+                    self._result.mode = 'open'
+                    await self._open_loop(rate, start + duration)
+                    corrected = self._latencies
+                else:
+                    self._result.mode = 'closed'
+                    await asyncio.gather(*(self._closed_loop(start + duration) for _ in range(concurrency)))
+                    corrected = correct_for_coordinated_omission(self._latencies, percentile(sorted(self._latencies), 0.5))
+            finally:
+                consumer.cancel()
+            self._result.duration = loop.time() - start
+        self._result.latency = summarize(corrected)
+        self._result.uncorrected_latency = summarize(self._send_latencies)
+        return self._result
+
+    async def _open_loop(self, rate: float, deadline: float) -> None:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        in_flight = set()
+        for sent in itertools.count():
+            due = start + sent / rate
+            if due >= deadline:
+                break
+            if due > loop.time():
+                await asyncio.sleep(due - loop.time())
+            task = asyncio.ensure_future(self._request(due))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        await asyncio.gather(*in_flight)
+
+    async def _closed_loop(self, deadline: float) -> None:
+        loop = asyncio.get_running_loop()
+        while loop.time() < deadline:
+            await self._request(loop.time())
+
+    async def _request(self, due: float) -> None:
+        loop = asyncio.get_running_loop()
+        message = decode(**next(self._params))
+        message.key = self._config.subtopic
+        message.scope.reply_to = instance_id()
+        message.scope.correlation_id = correlation_id = uniqueid()
+        reply = self._replies.register(correlation_id, self._timeout)
+        sent = loop.time()
+        self._result.sent += 1
+        try:
+            await self._publish(message)
+            reply_message = await asyncio.wait_for(reply, timeout=self._timeout)
+        except asyncio.TimeoutError:
+            self._result.timeouts += 1
+            return
+        finally:
+            self._replies.discard(correlation_id)
+        now = loop.time()
+        self._result.replies += 1
+        self._result.errors += reply_message.error is not None
+        self._latencies.append(now - due)
+        self._send_latencies.append(now - sent)
+
+    async def _publish(self, message: Message) -> None:
+        assert self._exchange
+        amqp_message = aio_pika.Message(body=encodes(message).encode('utf-8'))
+        await self._exchange.publish(amqp_message, str(PubTopic(message.key)))
+
+    async def _consume(self, queue: aio_pika.abc.AbstractQueue) -> None:
+        async with queue.iterator(no_ack=True) as amqp_messages:
+            async for amqp_message in amqp_messages:
+                reply = peek(amqp_message.body)
+                self._replies.resolve(reply.correlation_id, reply)
+
+
+def format_result(result: BenchResult) -> str:
+    lines = [
+        f'{result.mode} loop: {result.sent} requests in {result.duration:.1f} s',
+        f'replies: {result.replies} ({result.throughput:.1f}/s), errors: {result.errors}, timeouts: {result.timeouts}',
+        '',
+        f'{"latency":<8}  {"corrected":>10}  {"uncorrected":>11}',
+    ]
+    for name in PERCENTILES:
+        corrected = result.latency.get(name, float('nan'))
+        uncorrected = result.uncorrected_latency.get(name, float('nan'))
+        lines.append(f'{name:<8}  {corrected * 1000:>8.1f}ms  {uncorrected * 1000:>9.1f}ms')
+    return '\n'.join(lines)
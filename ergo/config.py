@@ -4,6 +4,12 @@ from collections import OrderedDict
 from typing import Dict, Optional
 
 from ergo.topic import PubTopic, SubTopic, Topic
+from ergo.util import instance_id
+
+DEFAULT_THREADS = 10
+DEFAULT_KEEP_ALIVE_TIMEOUT = 5.0  # seconds
+DEFAULT_MAX_BODY_SIZE = 16 * 1024 * 1024  # bytes
+DEFAULT_REPLY_PREFETCH = 1000
 
 
 class Config:
@@ -29,6 +35,19 @@ class Config:
         self._heartbeat: Optional[str] = config.get('heartbeat')
         self._args: Optional[dict] = config.get('args')
         self._acks_early: Optional[bool] = config.get('acks_early')
+        self._concurrency: Optional[int] = config.get('concurrency')
+        self._workers: Optional[int] = config.get('workers')
+        self._threads: Optional[int] = config.get('threads')
+        self._keep_alive_timeout: Optional[float] = config.get('keep_alive_timeout')
+        self._max_body_size: Optional[int] = config.get('max_body_size')
+        self._asgi: Optional[bool] = config.get('asgi')
+        self._routes: Optional[dict] = config.get('routes')
+        self._clients: Optional[dict] = config.get('clients')
+        self._reply_prefetch: Optional[int] = config.get('reply_prefetch')
+        self._reply_no_ack: Optional[bool] = config.get('reply_no_ack')
+        self._reply_consumers: Optional[int] = config.get('reply_consumers')
+        self._metrics_port: Optional[int] = config.get('metrics_port')
+        self._instance_id: Optional[str] = None
 
     def copy(self):
         return copy.deepcopy(self)
@@ -144,3 +163,129 @@ class Config:
     @property
     def acks_early(self) -> bool:
         return self._acks_early or False
+
+    @property
+    def concurrency(self) -> int:
+        """Maximum number of messages this component handles at once.
+
+        Returns:
+            int: Description
+        """
+        return int(self._concurrency) if self._concurrency else 1
+
+    @property
+    def workers(self) -> int:
+        """Number of processes serving the http protocol.
+
+        Returns:
+            int: Description
+        """
+        return int(self._workers) if self._workers else 1
+
+    @property
+    def threads(self) -> int:
+        """Number of requests each http worker handles at once, each on its own thread.
+
+        Returns:
+            int: Description
+        """
+        return int(self._threads) if self._threads else DEFAULT_THREADS
+
+    @property
+    def keep_alive_timeout(self) -> float:
+        """Seconds an idle http connection is kept open for further requests.
+
+        Returns:
+            float: Description
+        """
+        return float(self._keep_alive_timeout) if self._keep_alive_timeout is not None else DEFAULT_KEEP_ALIVE_TIMEOUT
+
+    @property
+    def max_body_size(self) -> int:
+        """Largest http request body accepted, in bytes.
+
+        Returns:
+            int: Description
+        """
+        return int(self._max_body_size) if self._max_body_size else DEFAULT_MAX_BODY_SIZE
+
+    @property
+    def asgi(self) -> bool:
+        """Whether to serve the http protocol with an ASGI app, even if the handler isn't async.
+
+        Returns:
+            bool: Description
+        """
+        return self._asgi or False
+
+    @property
+    def routes(self) -> dict:
+        """Gateway settings by route prefix, such as {'catalog/products': {'cache_ttl': 30}}.
+
+        Returns:
+            dict: Description
+        """
+        return self._routes or {}
+
+    @property
+    def clients(self) -> dict:
+        """Gateway rate limits and fair queuing weights for its clients, such as {'header': 'X-Api-Key', 'rate': 100}.
+
+        Returns:
+            dict: Description
+        """
+        return self._clients or {}
+
+    @property
+    def reply_prefetch(self) -> int:
+        """Number of unacknowledged replies the broker sends the gateway ahead of its consumers.
+
+        Returns:
+            int: Description
+        """
+        return int(self._reply_prefetch) if self._reply_prefetch is not None else DEFAULT_REPLY_PREFETCH
+
+    @property
+    def reply_no_ack(self) -> bool:
+        """Whether the broker considers replies to the gateway delivered as soon as it sends them.
+
+        Returns:
+            bool: Description
+        """
+        return self._reply_no_ack or False
+
+    @property
+    def reply_consumers(self) -> int:
+        """Number of replies the gateway decodes at once.
+
+        Returns:
+            int: Description
+        """
+        return int(self._reply_consumers) if self._reply_consumers else 1
+
+    @property
+    def metrics_port(self) -> Optional[int]:
+        """Port to serve metrics on, offset by the index of each worker process; metrics aren't served without one.
+
+        Returns:
+            Optional[int]: Description
+        """
+        return int(self._metrics_port) if self._metrics_port is not None else None
+
+    @property
+    def instance_id(self) -> str:
+        """Identifier that addresses this component instance; the process's instance_id unless overridden.
+
+        Returns:
+            str: Description
+        """
+        return self._instance_id or instance_id()
+
+    @instance_id.setter
+    def instance_id(self, val: str) -> None:
+        """Summary.
+
+        Returns:
+            TYPE: Description
+        """
+        self._instance_id = val
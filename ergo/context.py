@@ -3,7 +3,6 @@ from typing import Any, Optional
 from ergo.config import Config
 from ergo.message import Message
 from ergo.scope import Scope
-from ergo.util import instance_id
 
 
 class Envelope:
@@ -29,10 +28,11 @@ class Context:
     def __init__(self, message: Message, config: Config):
         self.pubtopic: str = config.pubtopic
         self._scope = message.scope
+        self._instance_id: str = config.instance_id
 
     @property
     def instance_id(self):
-        return instance_id()
+        return self._instance_id
 
     def initiate_scope(self):
         self._scope = Scope(parent=self._scope)
@@ -0,0 +1,169 @@
+"""Summary."""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Generic, Optional, TypeVar, Union
+
+T = TypeVar('T')
+
+EXPIRED_TTL = 5 * 60.0  # seconds a timed out correlation id is remembered, to tell late replies from unknown ones
+MAX_EXPIRED = 10**5
+
+
+class StreamOverflow(Exception):
+    """Raised from a reply stream whose reader fell more than max_buffered replies behind."""
+
+
+class _Pending(Generic[T]):
+    __slots__ = ('future', 'queue', 'max_buffered', 'timeout', 'deadline')
+
+    def __init__(self, timeout: float, future: 'Optional[asyncio.Future[T]]' = None, queue: 'Optional[asyncio.Queue[Union[T, Exception]]]' = None, max_buffered: int = 0) -> None:
+        self.future = future
+        self.queue = queue
+        self.max_buffered = max_buffered
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout
+
+
+class CorrelationTable(Generic[T]):
+    """
+    Futures for outstanding RPCs, by correlation id.
+
+    A caller registers a correlation id before publishing its request, awaits the returned future, and discards the id
+    once it has its reply or gives up, whether by timing out or being cancelled. A caller expecting several replies
+    registers a stream instead, and reads replies from the returned queue until it has seen the last.
+
+    Replies that arrive for an id that isn't pending are counted as late, if the id timed out recently, or unknown.
+    sweep() expires registrations that have outlived their deadline, in case a caller never discards them, so the table
+    stays bounded by the number of concurrent RPCs. A caller still waiting on an expired registration gets a
+    TimeoutError, as though it had given up itself, rather than being cancelled.
+    """
+
+    def __init__(self, expired_ttl: float = EXPIRED_TTL, max_expired: int = MAX_EXPIRED) -> None:
+        self._pending: Dict[str, _Pending[T]] = {}
+        self._expired: 'OrderedDict[str, float]' = OrderedDict()  # correlation id -> time it expired, oldest first
+        self._expired_ttl = expired_ttl
+        self._max_expired = max_expired
+        self.resolved = 0
+        self.late = 0
+        self.unknown = 0
+        self.swept = 0
+        self.overflowed = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def __contains__(self, correlation_id: str) -> bool:
+        return correlation_id in self._pending
+
+    def register(self, correlation_id: str, timeout: float) -> 'asyncio.Future[T]':
+        """Summary.
+
+        Args:
+            correlation_id (str): Description
+            timeout (float): seconds after which sweep() may expire the registration
+
+        Returns:
+            asyncio.Future[T]: resolved with the reply
+        """
+        future: 'asyncio.Future[T]' = asyncio.get_running_loop().create_future()
+        self._pending[correlation_id] = _Pending(timeout, future=future)
+        return future
+
+    def register_stream(self, correlation_id: str, idle_timeout: float, max_buffered: int) -> 'asyncio.Queue[Union[T, Exception]]':
+        """Summary.
+
+        Args:
+            correlation_id (str): Description
+            idle_timeout (float): seconds without a reply after which sweep() may expire the registration
+            max_buffered (int): number of unread replies after which the stream is cut off with StreamOverflow
+
+        Returns:
+            asyncio.Queue[Union[T, Exception]]: replies in the order they arrive, or a StreamOverflow to raise
+        """
+        queue: 'asyncio.Queue[Union[T, Exception]]' = asyncio.Queue()
+        self._pending[correlation_id] = _Pending(idle_timeout, queue=queue, max_buffered=max_buffered)
+        return queue
+
+    def resolve(self, correlation_id: Optional[str], reply: T) -> bool:
+        """Summary.
+
+        Args:
+            correlation_id (Optional[str]): Description
+            reply (T): Description
+
+        Returns:
+            bool: whether a caller was waiting for the reply
+        """
+        entry = self._pending.get(correlation_id) if correlation_id else None
+        if entry is None or (entry.future and entry.future.done()):
+            if correlation_id in self._expired:
+                self.late += 1
+            else:
+                self.unknown += 1
+            return False
+        self.resolved += 1
+        if entry.future:
+            entry.future.set_result(reply)
+            return True
+        assert entry.queue and correlation_id
+        if entry.queue.qsize() >= entry.max_buffered:
+            # the reader isn't keeping up; rather than buffer without bound, end its stream
+            self.overflowed += 1
+            entry.queue.put_nowait(StreamOverflow(f'more than {entry.max_buffered} replies buffered'))
+            self.discard(correlation_id)
+            return True
+        entry.queue.put_nowait(reply)
+        entry.deadline = time.monotonic() + entry.timeout
+        return True
+
+    def discard(self, correlation_id: str) -> None:
+        """Forget a registration. Streams, and futures that never got a reply, are remembered as expired.
+
+        Args:
+            correlation_id (str): Description
+        """
+        entry = self._pending.pop(correlation_id, None)
+        if entry is None:
+            return
+        future = entry.future
+        if future is None or not future.done() or future.cancelled():
+            if future:
+                future.cancel()
+            self._expire(correlation_id)
+
+    def sweep(self) -> None:
+        """Expire registrations past their deadline, and forget correlation ids that expired more than expired_ttl
+        seconds ago."""
+        now = time.monotonic()
+        overdue = [correlation_id for correlation_id, entry in self._pending.items() if entry.deadline < now]
+        for correlation_id in overdue:
+            self.swept += 1
+            entry = self._pending.pop(correlation_id)
+            if entry.future and not entry.future.done():
+                entry.future.set_exception(asyncio.TimeoutError())
+            elif entry.queue:
+                entry.queue.put_nowait(asyncio.TimeoutError())
+            self._expire(correlation_id)
+        while self._expired and next(iter(self._expired.values())) < now - self._expired_ttl:
+            self._expired.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Summary.
+
+        Returns:
+            Dict[str, int]: Description
+        """
+        return {
+            'pending': len(self._pending),
+            'resolved': self.resolved,
+            'late': self.late,
+            'unknown': self.unknown,
+            'swept': self.swept,
+            'overflowed': self.overflowed,
+        }
+
+    def _expire(self, correlation_id: str) -> None:
+        self._expired[correlation_id] = time.monotonic()
+        while len(self._expired) > self._max_expired:
+            self._expired.popitem(last=False)
@@ -1,18 +1,23 @@
 """Summary."""
 import datetime
+import json
 import os
-from typing import List
+from typing import List, Optional
 
 import yaml
 from colors import color
 
-from ergo.amqp_invoker import AmqpInvoker
+from ergo import bench, simulation, topology
+from ergo.amqp_invoker import AmqpHost, AmqpInvoker
 from ergo.config import Config
 from ergo.flask_http_invoker import FlaskHttpInvoker
 from ergo.function_invocable import FunctionInvocable
 from ergo.http_gateway import HttpGatewayServer
 from ergo.http_invoker import HttpInvoker
+from ergo.quart_http_invoker import QuartHttpInvoker
 from ergo.schematic import graph as ergograph
+from ergo.schematic import load_configs
+from ergo.stack_bus import StackBus
 from ergo.version import get_version
 
 
@@ -56,6 +61,33 @@ def load_config(*config_paths: str) -> Config:
     return Config(merged_data)
 
 
+def load_component_configs(*config_paths: str) -> List[Config]:
+    """
+    Load a Config for every component referenced by config_paths.
+
+    A path may be a component manifest (one that declares `func`), a namespace that applies to every component, or a
+    host manifest whose `components` attribute lists component manifests relative to its own directory. A single
+    component is loaded exactly as load_config would load it.
+    """
+    component_paths: List[str] = []
+    namespace_paths: List[str] = []
+    expanded = False
+    for path in config_paths:
+        with open(path, "r") as fh:
+            file_data = yaml.safe_load(fh) or {}
+        if "components" in file_data:
+            expanded = True
+            root = os.path.dirname(path)
+            component_paths.extend(os.path.join(root, component_path) for component_path in file_data["components"])
+        elif "func" in file_data:
+            component_paths.append(path)
+        else:
+            namespace_paths.append(path)
+    if not expanded and len(component_paths) <= 1:
+        return [load_config(*config_paths)]
+    return [load_config(component_path, *namespace_paths) for component_path in component_paths]
+
+
 class ErgoCli:
     """Summary."""
 
@@ -142,24 +174,31 @@ class ErgoCli:
         server = HttpGatewayServer(config)
         return server.run()
 
-    def http(self, func: str, *args: str) -> int:
+    def http(self, func: str, *args: str, workers: Optional[int] = None, threads: Optional[int] = None, asgi: bool = False) -> int:
         """Summary.
 
         Args:
             func (str): Description
             *args (str): Description
+            workers (Optional[int]): number of server processes
+            threads (Optional[int]): number of requests each process serves at once
+            asgi (bool): serve from an ASGI app even if the handler isn't async
 
         Returns:
             int: Description
 
         """
-        config = Config({'func': func})
+        config = Config({'func': func, 'workers': workers, 'threads': threads, 'asgi': asgi})
         return self._http(config)
 
     def _http(self, config: Config):
-        host: HttpInvoker = FlaskHttpInvoker(FunctionInvocable(config))
-        host.start()
-        return 0
+        invocable = FunctionInvocable(config)
+        host: HttpInvoker
+        if config.asgi or invocable.is_async:
+            host = QuartHttpInvoker(invocable)
+        else:
+            host = FlaskHttpInvoker(invocable)
+        return host.start()
 
     def amqp(self, config: Config, *args: str) -> int:
         """Summary.
@@ -187,22 +226,106 @@ class ErgoCli:
             int: Description
 
         """
-        config = load_config(ref, *args)
+        configs = load_component_configs(ref, *args)
+        if all(config.protocol == 'stack' for config in configs):
+            return self.stack(configs)
+        if len(configs) > 1:
+            return self._host(configs)
+        config = configs[0]
         if config.protocol == 'amqp':
             return self.amqp(config)
         if config.protocol == 'http':
             return self._http(config)
         raise ValueError(f'unexpected protocol: {config.protocol}')
 
-    def graph(self, *args: str) -> int:
+    def stack(self, configs: List[Config]) -> int:
+        """Start components on an in-process bus, reading inbound messages from stdin.
+
+        Args:
+            configs (List[Config]): one config per component
+
+        Returns:
+            int: Description
+
+        """
+        bus: StackBus = StackBus([FunctionInvocable(config) for config in configs])
+        return bus.start()
+
+    def _host(self, configs: List[Config]) -> int:
+        """Start several components in one process.
+
+        Args:
+            configs (List[Config]): one config per component
+
+        Returns:
+            int: Description
+
+        """
+        protocols = {config.protocol for config in configs}
+        if protocols != {'amqp'}:
+            raise ValueError(f'unable to host multiple components over protocol(s): {", ".join(sorted(protocols))}')
+        host: AmqpHost = AmqpHost.from_invocables([FunctionInvocable(config) for config in configs])
+        return host.start()
+
+    def graph(self, *args: str, analyze: bool = False, max_amplification: Optional[float] = None) -> int:
         """Summary.
 
         Args:
             ref (str): root folder for graph
+            analyze (bool): print fan-in, fan-out, cycles and message amplification instead of rendering the graph
+            max_amplification (Optional[float]): with analyze, fail if any inbound topic exceeds this amplification
 
         Returns:
             int: Description
 
         """
+        if analyze:
+            analysis = topology.analyze(load_configs(list(args)))
+            print(topology.format_analysis(analysis))
+            worst = max(analysis.amplification.values(), default=0.0)
+            if analysis.cycles or (max_amplification is not None and worst > max_amplification):
+                return 1
+            return 0
         ergograph(list(args))
         return 0
+
+    def bench(self, ref: str, *args: str, rate: Optional[float] = None, concurrency: Optional[int] = None, duration: float = bench.DEFAULT_DURATION,
+              sample: Optional[str] = None, data: Optional[str] = None, timeout: float = bench.DEFAULT_TIMEOUT) -> int:
+        """Load a running component over amqp, and report its throughput and latency.
+
+        Args:
+            ref (str): the component's config
+            *args (str): namespaces
+            rate (Optional[float]): requests per second, for an open loop
+            concurrency (Optional[int]): requests in flight, for a closed loop
+            duration (float): seconds to send requests for
+            sample (Optional[str]): NDJSON file of request parameters to cycle through
+            data (Optional[str]): JSON object of request parameters to send, if there's no sample file
+            timeout (float): seconds to wait for each reply
+
+        Returns:
+            int: Description
+
+        """
+        config = load_config(ref, *args)
+        params = bench.samples(sample, json.loads(data) if data else None)
+        result = bench.LoadGenerator(config, params, timeout=timeout).run(rate=rate, concurrency=concurrency, duration=duration)
+        print(bench.format_result(result))
+        return 0
+
+    def simulate(self, spec_path: str, *folders: str) -> int:
+        """Simulate the flow of messages through the components configured under folders.
+
+        Args:
+            spec_path (str): yaml file with arrival rates, and service times, replicas and prefetch by component
+            folders (str): root folders to load component configs from, as for graph
+
+        Returns:
+            int: Description
+
+        """
+        with open(spec_path, "r") as fh:
+            spec = yaml.safe_load(fh) or {}
+        result = simulation.simulate(load_configs(list(folders)), spec)
+        print(simulation.format_result(result))
+        return 0
@@ -4,11 +4,12 @@ Attributes:
     ERGO_CLI (TYPE): Description
 
 """
-from typing import Tuple
+from typing import Optional, Tuple
 
 import click
 from click_default_group import DefaultGroup  # https://pypi.org/project/click-default-group/
 
+from ergo.bench import DEFAULT_DURATION, DEFAULT_TIMEOUT
 from ergo.config import Config
 from ergo.ergo_cli import ErgoCli
 from ergo.ergo_cmd import ErgoCmd
@@ -89,18 +90,24 @@ def gateway(ref: str):
 @main.command()
 @click.argument('func', type=click.STRING)
 @click.argument('arg', nargs=-1)
-def http(func: str, arg: Tuple[str]) -> int:
+@click.option('--workers', type=int, default=None, help='Number of server processes.')
+@click.option('--threads', type=int, default=None, help='Number of requests each server process handles at once.')
+@click.option('--asgi', is_flag=True, help='Serve from an ASGI app even if the function is not async.')
+def http(func: str, arg: Tuple[str], workers: Optional[int], threads: Optional[int], asgi: bool) -> int:
     """Summary.
 
     Args:
         func (str): Path to a function.
         arg (Tuple[str]): Description
+        workers (Optional[int]): Description
+        threads (Optional[int]): Description
+        asgi (bool): Description
 
     Returns:
         int: Description
 
     """
-    return ERGO_CLI.http(func, *list(arg))
+    return ERGO_CLI.http(func, *list(arg), workers=workers, threads=threads, asgi=asgi)
 
 
 @main.command()
@@ -140,15 +147,67 @@ def start(ref: str, arg: Tuple[str]) -> int:
 @main.command()
 @click.argument('ref', type=click.STRING)
 @click.argument('arg', nargs=-1)
-def graph(ref: str, arg: Tuple[str]) -> int:
+@click.option('--analyze', is_flag=True, help='Report fan-in, fan-out, cycles and message amplification instead of drawing the graph.')
+@click.option('--max-amplification', type=float, default=None, help='With --analyze, exit with an error if an inbound topic exceeds this amplification.')
+@click.pass_context
+def graph(ctx: click.Context, ref: str, arg: Tuple[str], analyze: bool, max_amplification: Optional[float]) -> int:
     """Summary.
 
     Args:
         ref (str): Description
         arg (Tuple[str]): Description
+        analyze (bool): Description
+        max_amplification (Optional[float]): Description
 
     Returns:
         int: Description
 
     """
-    return ERGO_CLI.graph(ref, *list(arg))
+    ctx.exit(ERGO_CLI.graph(ref, *list(arg), analyze=analyze, max_amplification=max_amplification))
+    return 0
+
+
+@main.command()
+@click.argument('ref', type=click.STRING)
+@click.argument('arg', nargs=-1)
+@click.option('--rate', type=float, default=None, help='Send requests at this many per second (an open loop).')
+@click.option('--concurrency', type=int, default=None, help='Keep this many requests in flight (a closed loop). Defaults to 1 unless --rate is given.')
+@click.option('--duration', type=float, default=DEFAULT_DURATION, show_default=True, help='Seconds to send requests for.')
+@click.option('--sample', type=click.Path(exists=True, dir_okay=False), default=None, help='File of request parameters, one JSON object per line, to cycle through.')
+@click.option('--data', type=click.STRING, default=None, help='JSON object of request parameters to send if there is no sample file.')
+@click.option('--timeout', type=float, default=DEFAULT_TIMEOUT, show_default=True, help='Seconds to wait for each reply.')
+def bench(ref: str, arg: Tuple[str], rate: Optional[float], concurrency: Optional[int], duration: float, sample: Optional[str], data: Optional[str], timeout: float) -> int:
+    """Summary.
+
+    Args:
+        ref (str): Description
+        arg (Tuple[str]): Description
+        rate (Optional[float]): Description
+        concurrency (Optional[int]): Description
+        duration (float): Description
+        sample (Optional[str]): Description
+        data (Optional[str]): Description
+        timeout (float): Description
+
+    Returns:
+        int: Description
+
+    """
+    return ERGO_CLI.bench(ref, *list(arg), rate=rate, concurrency=concurrency, duration=duration, sample=sample, data=data, timeout=timeout)
+
+
+@main.command()
+@click.argument('spec', type=click.STRING)
+@click.argument('folder', nargs=-1, required=True)
+def simulate(spec: str, folder: Tuple[str]) -> int:
+    """Summary.
+
+    Args:
+        spec (str): Description
+        folder (Tuple[str]): Description
+
+    Returns:
+        int: Description
+
+    """
+    return ERGO_CLI.simulate(spec, *list(folder))
@@ -0,0 +1,249 @@
+"""Summary."""
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, Mapping, Optional
+
+from ergo.limiter import AdaptiveLimiter, Overloaded
+
+MAX_CLIENTS = 10**4  # clients whose buckets and counters are kept, most recently seen first
+QUEUE_TIMEOUT = 1.0  # seconds a request may wait for a slot before it's shed
+MAX_QUEUED = 100  # requests each client may have waiting for a slot
+
+
+@dataclass(frozen=True)
+class ClientSettings:
+    """Limits for one client of the gateway."""
+
+    rate: Optional[float] = None  # requests per second; unlimited unless set
+    burst: Optional[float] = None  # requests allowed at once, above the rate; defaults to one second's worth
+    weight: float = 1.0  # share of the gateway's capacity, relative to other clients, while requests are waiting for it
+
+    def __post_init__(self) -> None:
+        if self.rate is not None and not self.rate > 0:
+            raise ValueError(f"client rate must be positive, not {self.rate}")
+        if self.burst is not None and not self.burst >= 1:
+            raise ValueError(f"client burst must be at least 1, not {self.burst}")
+        if not self.weight > 0:
+            raise ValueError(f"client weight must be positive, not {self.weight}")
+
+
+class Client:
+    """A client's token bucket and counters."""
+
+    __slots__ = ('identity', 'settings', 'tokens', 'updated', 'admitted', 'throttled', 'queued', 'shed')
+
+    def __init__(self, identity: str, settings: ClientSettings) -> None:
+        self.identity = identity
+        self.settings = settings
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.admitted = 0
+        self.throttled = 0
+        self.queued = 0
+        self.shed = 0
+
+    @property
+    def capacity(self) -> float:
+        settings = self.settings
+        return settings.burst if settings.burst is not None else max(settings.rate or 0.0, 1.0)
+
+    @property
+    def weight(self) -> float:
+        return self.settings.weight
+
+    def take(self) -> float:
+        """Take a token from the client's bucket.
+
+        Returns:
+            float: 0 if there was one, otherwise the seconds until there will be
+        """
+        rate = self.settings.rate
+        if rate is None:
+            self.admitted += 1
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens < 1:
+            self.throttled += 1
+            return (1 - self.tokens) / rate
+        self.tokens -= 1
+        self.admitted += 1
+        return 0.0
+
+    def stats(self) -> Dict[str, int]:
+        return {'admitted': self.admitted, 'throttled': self.throttled, 'queued': self.queued, 'shed': self.shed}
+
+
+class ClientPolicy:
+    """
+    Identify the clients of the gateway, and hold their limits.
+
+    Clients are identified by the value of a request header, such as an API key, or by their address if they don't
+    send it. Header values are hashed, so that stats() doesn't reveal them.
+    """
+
+    def __init__(self, config: Mapping[str, Any]) -> None:
+        unexpected = set(config) - {'header', 'rate', 'burst', 'weight', 'overrides'}
+        if unexpected:
+            raise ValueError(f"unexpected client settings: {', '.join(sorted(unexpected))}")
+        self.header: Optional[str] = config.get('header')
+        defaults = {key: config[key] for key in ('rate', 'burst', 'weight') if key in config}
+        self._default = ClientSettings(**defaults)
+        self._overrides: Dict[str, ClientSettings] = {}
+        for key, settings in (config.get('overrides') or {}).items():
+            # keyed by header value or by address; both ways, since there's no telling which
+            self._overrides[key] = self._overrides[self._identify_key(key)] = ClientSettings(**{**defaults, **(settings or {})})
+        self._clients: 'OrderedDict[str, Client]' = OrderedDict()  # least recently seen first
+
+    def client(self, headers: Mapping[str, str], remote_addr: Optional[str]) -> Client:
+        """Summary.
+
+        Args:
+            headers (Mapping[str, str]): request headers
+            remote_addr (Optional[str]): the address the request came from
+
+        Returns:
+            Client: Description
+        """
+        key = headers.get(self.header) if self.header else None
+        identity = self._identify_key(key) if key else remote_addr or 'unknown'
+        client = self._clients.get(identity)
+        if client is None:
+            client = self._clients[identity] = Client(identity, self._overrides.get(identity, self._default))
+            if len(self._clients) > MAX_CLIENTS:
+                self._clients.popitem(last=False)
+        else:
+            self._clients.move_to_end(identity)
+        return client
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Summary.
+
+        Returns:
+            Dict[str, Dict[str, int]]: counters by client identity
+        """
+        return {identity: client.stats() for identity, client in self._clients.items()}
+
+    @staticmethod
+    def _identify_key(key: str) -> str:
+        return 'key:' + hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+
+class _Waiting:
+    __slots__ = ('waiters', 'weight', 'deficit')
+
+    def __init__(self, weight: float) -> None:
+        self.waiters: 'Deque[asyncio.Future[None]]' = deque()
+        self.weight = weight
+        self.deficit = 0.0
+
+
+class FairQueue:
+    """
+    Queue requests for an AdaptiveLimiter while it's at its limit, and hand out slots as they free up fairly between
+    clients, by deficit round robin.
+
+    Clients with requests waiting take turns. On its turn, a client gets as many slots as its weight, carried over
+    into its next turn if that's less than one, so that over time, each client's share of the slots is proportional to
+    its weight. Requests that wait for longer than QUEUE_TIMEOUT, or find MAX_QUEUED requests from their client
+    already waiting, are shed with Overloaded.
+    """
+
+    def __init__(self, limiter: AdaptiveLimiter, timeout: float = QUEUE_TIMEOUT, max_queued: int = MAX_QUEUED) -> None:
+        self.limiter = limiter
+        self._timeout = timeout
+        self._max_queued = max_queued
+        self._turns: Deque[str] = deque()  # clients with requests waiting, the client whose turn it is first
+        self._waiting: Dict[str, _Waiting] = {}
+        self._queued = 0  # requests waiting
+        self._reserved = 0  # slots handed to requests that haven't taken them yet
+        self.queue_timeouts = 0
+
+    @asynccontextmanager
+    async def admit(self, client: Client, sample: bool = True) -> AsyncIterator[None]:
+        """Hold a slot of the limiter for the duration of a request, waiting for one if they're all taken.
+
+        Args:
+            client (Client): Description
+            sample (bool): see AdaptiveLimiter.admit
+
+        Raises:
+            Overloaded: if the request was shed
+        """
+        if self._queued or not self._has_capacity():
+            await self._wait(client)
+        try:
+            with self.limiter.admit(sample):
+                yield
+        finally:
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        """Summary.
+
+        Returns:
+            Dict[str, Any]: Description
+        """
+        return {**self.limiter.stats(), 'queued': self._queued, 'queue_timeouts': self.queue_timeouts}
+
+    @property
+    def idle(self) -> bool:
+        """Whether no requests hold or are waiting for a slot."""
+        return not (self.limiter.in_flight or self._queued or self._reserved)
+
+    def _has_capacity(self) -> bool:
+        return self.limiter.in_flight + self._reserved < int(self.limiter.limit)
+
+    async def _wait(self, client: Client) -> None:
+        waiting = self._waiting.get(client.identity)
+        if waiting is None:
+            waiting = self._waiting[client.identity] = _Waiting(client.weight)
+            self._turns.append(client.identity)
+        if len(waiting.waiters) >= self._max_queued:
+            client.shed += 1
+            raise Overloaded(f"{len(waiting.waiters)} requests from this client waiting")
+        waiter: 'asyncio.Future[None]' = asyncio.get_running_loop().create_future()
+        waiting.waiters.append(waiter)
+        self._queued += 1
+        client.queued += 1
+        self._dispatch()  # in case a slot is free, and the requests ahead of this one are what kept it from taking it
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self._timeout)
+        except BaseException as err:
+            if waiter.done():
+                # it was this request's turn after all; pass the slot on
+                self._reserved -= 1
+                self._dispatch()
+            else:
+                waiter.cancel()
+                self._queued -= 1
+            if isinstance(err, asyncio.TimeoutError):
+                self.queue_timeouts += 1
+                client.shed += 1
+                raise Overloaded(f"no slot within {self._timeout} seconds") from err
+            raise
+        self._reserved -= 1
+
+    def _dispatch(self) -> None:
+        while self._queued and self._has_capacity():
+            identity = self._turns[0]
+            waiting = self._waiting[identity]
+            while waiting.waiters and waiting.waiters[0].done():
+                waiting.waiters.popleft()  # gave up waiting
+            if not waiting.waiters:
+                self._turns.popleft()
+                del self._waiting[identity]
+                continue
+            if waiting.deficit < 1:
+                waiting.deficit += waiting.weight
+                self._turns.rotate(-1)
+                continue
+            waiting.deficit -= 1
+            self._queued -= 1
+            self._reserved += 1
+            waiting.waiters.popleft().set_result(None)
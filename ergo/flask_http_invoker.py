@@ -1,38 +1,58 @@
 """Summary."""
 import inspect
-from typing import List
+from typing import List, Union
 
-from flask import Flask, request  # , abort
+from flask import Flask, Response, abort, request
 
 from ergo.http_invoker import HttpInvoker
-from ergo.message import Message, decode, encodes
+from ergo.message import Message, stream_mimetype
+from ergo.metrics import timed
 
 
 class FlaskHttpInvoker(HttpInvoker):
     """Summary."""
 
-    def start(self) -> int:
+    def create_app(self) -> Flask:
         """Summary.
 
         Returns:
-            int: Description
+            Flask: Description
 
         """
         app: Flask = Flask(__name__)
 
         @app.route(self.route, methods=['GET', 'POST'])
-        def handler() -> str:  # type: ignore
+        def handler() -> Union[str, Response]:  # type: ignore
             """Summary.
 
             Returns:
-                str: Description
+                Union[str, Response]: Description
 
             """
-            data_in: Message = decode(**request.args)
-            data_out: List[Message] = list(self.invoke_handler(data_in))
+            data_in: Message = self.decode_request(request_params())
+            mimetype = stream_mimetype(value for value, _ in request.accept_mimetypes)
+            if mimetype:
+                return Response(self.stream_handler(data_in, mimetype), mimetype=mimetype)
+            with self.handling():
+                data_out: List[Message] = list(timed(self.invoke_handler(data_in), self._metrics.handler_duration))
             if not inspect.isgeneratorfunction(self._invocable.func):
                 data_out = data_out[0]
-            return encodes(data_out)
+            return self.encode_response(data_out)
 
-        app.run(host='0.0.0.0', port=self._port)
-        return 0
+        return app
+
+
+def request_params() -> dict:
+    """Query string parameters, overridden by the members of a JSON object request body.
+
+    Returns:
+        dict: Description
+
+    """
+    params = request.args.to_dict()
+    if request.is_json:
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            abort(400, 'request body must be a JSON object')
+        params.update(body)
+    return params
@@ -1,4 +1,5 @@
 """Summary."""
+import asyncio
 import importlib.util
 import inspect
 import os
@@ -8,7 +9,7 @@ import warnings
 from importlib.abc import Loader
 from importlib.machinery import ModuleSpec
 from types import ModuleType
-from typing import Callable, Generator, Match, Optional
+from typing import AsyncGenerator, Callable, Generator, Match, Optional
 
 import pydash
 
@@ -18,7 +19,7 @@ from ergo.message import Message
 from ergo.scope import Scope
 from ergo.topic import Topic
 from ergo.types import TYPE_RETURN
-from ergo.util import instance_id, print_exc_plus
+from ergo.util import print_exc_plus
 
 DATA_KEY = "data"
 CONTEXT_KEY = "context"
@@ -93,38 +94,84 @@ class FunctionInvocable:
             if not inspect.isgenerator(results):
                 results = [results]
             for data_out in results:
-                envelope = None
-                if isinstance(data_out, Envelope):
-                    envelope = data_out
-                    data_out = envelope.data
-                scope = ctx._scope
-                if Topic(f"{self.config.subtopic}.{instance_id()}").overlap(Topic(scope.reply_to)):
-                    # The current scope was initiated in conjunction with a request that was addressed to this
-                    # component or instance. We assume that by handling this message we've resolved
-                    # the request, and may exit the current scope before proceeding. This frees handlers from
-                    # needing to manually exit scope after receiving a request, or else publishing messages
-                    # which will be routed back to them unto eternity.
-                    assert scope.parent
-                    scope = scope.parent
-                if envelope and envelope.topic:
-                    key = envelope.topic
-                else:
-                    key = self.config.pubtopic
-                    if ctx.pubtopic != self.config.pubtopic:
-                        key = ctx.pubtopic
-                        warnings.warn("Context.pubtopic is going to be immutable in a future version of ergo. Use Context.envelope to override pubtopic.", category=DeprecationWarning)
-                if envelope and envelope.reply_to:
-                    scope = Scope(parent=scope)
-                    scope.reply_to = envelope.reply_to
-                elif scope.reply_to:
-                    key = f"{key}.{scope.reply_to}"
-                yield Message(data=data_out, scope=scope, key=key)
+                yield self._message_out(data_out, ctx)
 
         except BaseException as invoke_err:
-            err = Exception(print_exc_plus())
-            if hasattr(invoke_err, 'extra_info'):
-                setattr(err, 'extra_info', invoke_err.extra_info)
-            raise err from invoke_err
+            raise invoke_error(invoke_err) from invoke_err
+
+    async def ainvoke(self, message_in: Message) -> AsyncGenerator[Message, None]:
+        """Invoke injected function from a running event loop.
+
+        Coroutine functions are awaited and async generators iterated on the loop. Other functions are invoked on the
+        loop's default executor, one result at a time, so that they don't block the loop.
+
+        Args:
+            message_in (ergo.message.Message): Contents will be passed to injected function as keyword args.
+
+        Raises:
+            Exception: caught exception re-raised with a stack trace.
+
+        """
+        if not self.is_async:
+            loop = asyncio.get_running_loop()
+            results = self.invoke(message_in)
+            while True:
+                message_out = await loop.run_in_executor(None, next, results, None)
+                if message_out is None:
+                    return
+                yield message_out
+        if not self._func:
+            raise Exception('Cannot execute injected function')
+        try:
+            ctx = Context(message=message_in, config=self.config)
+            kwargs = self.assemble_arguments(message_in, ctx)
+            if inspect.isasyncgenfunction(self._func):
+                async for data_out in self._func(**kwargs):
+                    yield self._message_out(data_out, ctx)
+            else:
+                yield self._message_out(await self._func(**kwargs), ctx)
+
+        # unlike invoke, let cancellation (a BaseException) propagate untouched
+        except Exception as invoke_err:
+            raise invoke_error(invoke_err) from invoke_err
+
+    @property
+    def is_async(self) -> bool:
+        """Whether the injected function is a coroutine function or an async generator function.
+
+        Returns:
+            bool: Description
+
+        """
+        return inspect.iscoroutinefunction(self._func) or inspect.isasyncgenfunction(self._func)
+
+    def _message_out(self, data_out: TYPE_RETURN, ctx: Context) -> Message:
+        envelope = None
+        if isinstance(data_out, Envelope):
+            envelope = data_out
+            data_out = envelope.data
+        scope = ctx._scope
+        if Topic(f"{self.config.subtopic}.{self.config.instance_id}").overlap(Topic(scope.reply_to)):
+            # The current scope was initiated in conjunction with a request that was addressed to this
+            # component or instance. We assume that by handling this message we've resolved
+            # the request, and may exit the current scope before proceeding. This frees handlers from
+            # needing to manually exit scope after receiving a request, or else publishing messages
+            # which will be routed back to them unto eternity.
+            assert scope.parent
+            scope = scope.parent
+        if envelope and envelope.topic:
+            key = envelope.topic
+        else:
+            key = self.config.pubtopic
+            if ctx.pubtopic != self.config.pubtopic:
+                key = ctx.pubtopic
+                warnings.warn("Context.pubtopic is going to be immutable in a future version of ergo. Use Context.envelope to override pubtopic.", category=DeprecationWarning)
+        if envelope and envelope.reply_to:
+            scope = Scope(parent=scope)
+            scope.reply_to = envelope.reply_to
+        elif scope.reply_to:
+            key = f"{key}.{scope.reply_to}"
+        return Message(data=data_out, scope=scope, key=key)
 
     def assemble_arguments(self, message: Message, context: Context) -> dict:
         """
@@ -204,3 +251,11 @@ class FunctionInvocable:
 
 class MissingArgument:
     pass
+
+
+def invoke_error(invoke_err: BaseException) -> Exception:
+    """Wrap an exception raised by an injected function in one whose message includes a stack trace with locals."""
+    err = Exception(print_exc_plus())
+    if hasattr(invoke_err, 'extra_info'):
+        setattr(err, 'extra_info', invoke_err.extra_info)
+    return err
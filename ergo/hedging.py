@@ -0,0 +1,111 @@
+"""Summary."""
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Union
+
+from ergo.util import percentile
+
+PERCENTILE = 0.95  # a request is hedged once it has taken longer than this fraction of its topic's recent requests
+BUDGET = 0.05  # the most hedged requests may make up of all requests
+WINDOW = 1000  # recent latencies kept per topic
+MIN_SAMPLES = 20  # latencies a topic needs before its requests are hedged
+REFRESH_INTERVAL = 50  # latencies between recomputing a topic's percentile
+MAX_TOPICS = 1000
+MAX_BURST = 10  # hedges the budget may save up while requests aren't being hedged
+
+
+class _Latencies:
+    __slots__ = ('samples', 'unsorted', 'percentile')
+
+    def __init__(self) -> None:
+        self.samples: Deque[float] = deque(maxlen=WINDOW)
+        self.unsorted = 0  # samples since the percentile was computed
+        self.percentile: Optional[float] = None
+
+
+class HedgePolicy:
+    """
+    Decide when to hedge a request, that is, to make it again while waiting for its first reply.
+
+    A request is hedged once it has been outstanding longer than its topic's PERCENTILE latency, over the topic's
+    WINDOW most recent replies, so that a reply held up by a slow replica is usually beaten by another. Only a BUDGET
+    fraction of requests are hedged, so that hedging can't add more than that much load, even when every replica is
+    slow: each reply earns a BUDGET fraction of a hedge, and at most MAX_BURST unspent hedges are saved up.
+    """
+
+    def __init__(self, percentile: float = PERCENTILE, budget: float = BUDGET) -> None:
+        self._percentile = percentile
+        self._budget = budget
+        self._credit = 0.0  # replies that have earned hedges not yet spent, each earning a budget fraction of one
+        self._topics: 'OrderedDict[str, _Latencies]' = OrderedDict()  # least recently used first
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.over_budget = 0
+
+    def delay(self, topic: str) -> Optional[float]:
+        """Summary.
+
+        Args:
+            topic (str): Description
+
+        Returns:
+            Optional[float]: seconds to wait for a reply before hedging a request, or None if there aren't enough
+                replies to the topic to tell yet
+        """
+        latencies = self._topics.get(topic)
+        if latencies is None or len(latencies.samples) < MIN_SAMPLES:
+            return None
+        if latencies.percentile is None or latencies.unsorted >= REFRESH_INTERVAL:
+            latencies.percentile = percentile(sorted(latencies.samples), self._percentile)
+            latencies.unsorted = 0
+        return latencies.percentile
+
+    def spend(self) -> bool:
+        """Count a hedged request, if the budget allows for another.
+
+        Returns:
+            bool: whether to hedge
+        """
+        if self._credit * self._budget < 1:
+            self.over_budget += 1
+            return False
+        self._credit -= 1 / self._budget
+        self.hedged += 1
+        return True
+
+    def record(self, topic: str, latency: float, hedge_won: bool = False) -> None:
+        """Summary.
+
+        Args:
+            topic (str): Description
+            latency (float): seconds the reply took, from when the request was first published, even if a hedge
+                answered it: the hedge's own latency would pull the percentile down towards the hedges
+            hedge_won (bool): whether the reply answered a hedged request, rather than the original
+        """
+        self.requests += 1
+        self.hedge_wins += hedge_won
+        self._credit = min(self._credit + 1, MAX_BURST / self._budget) if self._budget > 0 else 0.0
+        latencies = self._topics.get(topic)
+        if latencies is None:
+            latencies = self._topics[topic] = _Latencies()
+            if len(self._topics) > MAX_TOPICS:
+                self._topics.popitem(last=False)
+        else:
+            self._topics.move_to_end(topic)
+        latencies.samples.append(latency)
+        latencies.unsorted += 1
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Summary.
+
+        Returns:
+            Dict[str, Union[int, float]]: Description
+        """
+        return {
+            'topics': len(self._topics),
+            'requests': self.requests,
+            'hedged': self.hedged,
+            'hedge_wins': self.hedge_wins,
+            'over_budget': self.over_budget,
+            'hedge_win_ratio': self.hedge_wins / self.hedged if self.hedged else 0.0,
+        }
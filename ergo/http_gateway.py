@@ -1,88 +1,472 @@
 import asyncio
-from typing import AsyncGenerator, Dict, Tuple
+import json
+import logging
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, nullcontext
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, Optional, Set, Tuple
 
 import aio_pika
 import aiomisc
 import hypercorn.asyncio
 import hypercorn.config
-from quart import Quart, request
+from quart import Quart, Response, abort, request, websocket
 
 from ergo.amqp_invoker import set_param
 from ergo.config import Config
-from ergo.message import Message, decode, decodes, encodes
+from ergo.correlation import CorrelationTable, StreamOverflow
+from ergo.fairness import Client, ClientPolicy, FairQueue
+from ergo.hedging import HedgePolicy
+from ergo.limiter import AdaptiveLimiter, Overloaded
+from ergo.message import EncodedMessage, Message, decode, encodes, encodes_chunk, peek, stream_mimetype
+from ergo.metrics import ComponentMetrics, serve_metrics
+from ergo.response_cache import ResponseCache
+from ergo.routes import RouteSettings, RouteTable
 from ergo.topic import PubTopic, SubTopic
 from ergo.util import defer_termination, instance_id, uniqueid
+from ergo.workers import Supervisor, bind_socket
 
 EVENT_LOOP_THREADS = 10
-MAX_CONCURRENT_RPCS = 10**4
+MAX_CONCURRENT_RPCS = 10**4  # the most the adaptive limit on a topic's requests in flight may grow to, unless configured per route
+MAX_TOPIC_ADMISSIONS = 1000  # topics without a configured limit whose adaptive limits are kept
 RPC_TIMEOUT = 60 * 60  # seconds
+STREAM_IDLE_TIMEOUT = 60.0  # seconds a streamed response may go without a reply
+STREAM_BUFFER = 1000  # replies buffered for a streamed response before it's cut off
+SWEEP_INTERVAL = 1.0  # seconds
 PORT = 80
+STATS_ROUTE = "/_ergo/stats"
+BATCH_ROUTE = "/_ergo/batch"
+BATCH_ITEM_TIMEOUT = 60.0  # seconds
+MAX_BATCH_SIZE = 1000
+SESSION_ROUTE = "/_ergo/session"
+SESSION_MAX_IN_FLIGHT = 100  # requests a websocket session may have in flight before the gateway stops reading frames
+SESSION_OUTBOX = 100  # replies waiting to be sent to a websocket session before its requests wait too
+THREADED_DECODE_BYTES = 64 * 1024  # replies at least this large are decoded on the event loop's thread pool
+RETRY_AFTER = 1  # seconds a client is asked to wait before retrying a request that was shed
+
+
+logger = logging.getLogger(__name__)
 
 
 class HttpGatewayServer:
+    """
+    HTTP front end for components running over amqp.
+
+    With more than one worker in its config, the gateway forks that many processes. They share the port through
+    SO_REUSEPORT, and each has its own instance id, and so its own reply queue, correlation table and caches.
+    """
+
     def __init__(self, config: Config) -> None:
         self._config = config
-        self._loop = aiomisc.new_event_loop(pool_size=EVENT_LOOP_THREADS)
-        self._exchange, self._queue = self._loop.run_until_complete(self._setup_amqp(config))
-        self._concurrent_rpcs_limiter = asyncio.Semaphore(MAX_CONCURRENT_RPCS)
-        self._rpc_return_ready: Dict[str, asyncio.Condition] = {}
-        self._rpc_return_values: Dict[str, Message] = {}
+        self._exchange: Optional[aio_pika.Exchange] = None
+        self._queue: Optional[aio_pika.Queue] = None
+        self._replies: CorrelationTable[EncodedMessage] = CorrelationTable()
+        self._routes = RouteTable(config.routes)
+        self._caches: Dict[str, ResponseCache] = {
+            settings.prefix: ResponseCache(settings.cache_max_bytes, settings.cache_ttl, settings.cache_stale)
+            for settings in self._routes
+            if settings.cache_ttl
+        }
+        self._hedging = HedgePolicy()
+        self._clients = ClientPolicy(config.clients)
+        self._admissions: Dict[str, FairQueue] = {
+            settings.prefix: FairQueue(AdaptiveLimiter(settings.limit)) for settings in self._routes if settings.limit
+        }
+        self._topic_admissions: "OrderedDict[str, FairQueue]" = OrderedDict()  # least recently used first
+        self._metrics = ComponentMetrics("gateway")
 
     def run(self) -> int:
-        rpc_consumer_loop = self._loop.create_task(self._run_rpc_consumer())
+        workers = self._config.workers
+        if workers > 1:
+            return Supervisor(self.serve, workers).run()
+        self.serve()
+        return 0
+
+    def serve(self, worker: int = 0) -> None:
+        """Connect to the broker and serve requests in this process until it receives SIGINT or SIGTERM.
+
+        Args:
+            worker (int): index of this worker process
+
+        """
+        if self._config.metrics_port is not None:
+            serve_metrics(self._config.metrics_port + worker)
+        loop = aiomisc.new_event_loop(pool_size=EVENT_LOOP_THREADS)
+        self._exchange, self._queue = loop.run_until_complete(self._setup_amqp(self._config))
+        rpc_consumer_loop = loop.create_task(self._run_rpc_consumer())
+        sweeper_loop = loop.create_task(self._run_sweeper())
         try:
-            self._loop.run_until_complete(self._run_server())
+            loop.run_until_complete(self._run_server())
         finally:
             rpc_consumer_loop.cancel()
-        return 0
+            sweeper_loop.cancel()
 
-    async def _run_server(self):
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rpc": self._replies.stats(),
+            "cache": {prefix: cache.stats() for prefix, cache in self._caches.items()},
+            "hedge": self._hedging.stats(),
+            "limit": {prefix: admission.stats() for prefix, admission in self._admissions.items()},
+            "topic_limit": {topic: admission.stats() for topic, admission in self._topic_admissions.items()},
+            "clients": self._clients.stats(),
+        }
+
+    def create_app(self) -> Quart:
         app = Quart(__name__)
 
+        @app.route(STATS_ROUTE, methods=["GET"])
+        async def stats():
+            return self.stats()
+
+        @app.route(BATCH_ROUTE, methods=["POST"])
+        async def batch():
+            requests = await request.get_json(silent=True)
+            if not isinstance(requests, list):
+                abort(400, "request body must be a JSON array of {topic, args} objects")
+            if len(requests) > MAX_BATCH_SIZE:
+                abort(413, f"batches are limited to {MAX_BATCH_SIZE} requests")
+            try:
+                timeout = float(request.args.get("timeout", BATCH_ITEM_TIMEOUT))
+            except ValueError:
+                abort(400, "timeout must be a number of seconds")
+            if not 0 < timeout < math.inf:
+                abort(400, "timeout must be a positive number of seconds")
+            client = self._clients.client(request.headers, request.remote_addr)
+            with defer_termination():
+                replies = await asyncio.gather(*(self._batch_item(item, timeout, client) for item in requests))
+            return Response(b"[" + b", ".join(replies) + b"]", mimetype="application/json")
+
+        @app.websocket(SESSION_ROUTE)
+        async def session():
+            await self._run_session(websocket)
+
         @app.route("/<path:path>", methods=["GET", "POST"])
         async def route(path: str):
+            topic = path.replace("/", ".")
+            client = self._clients.client(request.headers, request.remote_addr)
+            retry_after = client.take()
+            if retry_after:
+                return Response("too many requests", status=429, headers={"Retry-After": str(math.ceil(retry_after))})
+            mimetype = stream_mimetype(value for value, _ in request.accept_mimetypes)
+            if mimetype:
+                # the body is produced after this handler returns, outside of the request context
+                return Response(stream_inner(topic, request.args.to_dict(), client, mimetype), mimetype=mimetype)
             with defer_termination():
-                async with self._concurrent_rpcs_limiter:
-                    return await route_inner(path)
+                return await route_inner(path, topic, client)
 
-        async def route_inner(path: str):
-            topic = path.replace("/", ".")
-            # TODO what do we do if multiple results are being yielded by a generator?
-            #  We're not injecting the handler, so we can't inspect for that.
-            result_coro = self._rpc(topic, request.args).__anext__()
-            message_out: Message = await asyncio.wait_for(result_coro, timeout=RPC_TIMEOUT)
-            return encodes(message_out)
+        async def route_inner(path: str, topic: str, client: Client):
+            args = request.args.to_dict()
+            cache = self._caches.get(self._routes.match(path).prefix)
+            try:
+                if cache is not None and request.method == "GET":
+                    return await cache.get(cache_key(topic, args), lambda: self._rpc_body(topic, args, client))
+                body, _ = await self._rpc_body(topic, args, client)
+                return body
+            except asyncio.TimeoutError:
+                abort(504)
+            except Overloaded:
+                return Response("too many requests in flight", status=503, headers={"Retry-After": str(RETRY_AFTER)})
+
+        async def stream_inner(topic: str, args: dict, client: Client, mimetype: str) -> AsyncGenerator[str, None]:
+            # each chunk is only produced once the server has written the previous one out to the client. A stream may
+            # stay open indefinitely, so unlike a single reply, it doesn't defer termination
+            try:
+                async for reply in self._rpc_stream(topic, args, client, idle_timeout=STREAM_IDLE_TIMEOUT):
+                    yield encodes_chunk(reply.body.decode("utf-8"), mimetype, event="error" if reply.error else None)
+            except asyncio.TimeoutError:
+                error = {"type": "TimeoutError", "message": f"no reply for {STREAM_IDLE_TIMEOUT} seconds"}
+                yield encodes_chunk(Message(error=error), mimetype, event="error")
+            except (StreamOverflow, Overloaded) as err:
+                yield encodes_chunk(Message(error={"type": type(err).__name__, "message": str(err)}), mimetype, event="error")
+
+        # a streamed response may run for as long as it keeps receiving replies
+        app.config["RESPONSE_TIMEOUT"] = None
+        return app
 
+    async def _run_server(self):
+        sock = bind_socket("0.0.0.0", PORT, reuse_port=self._config.workers > 1)
         hypercorn_config = hypercorn.config.Config()
-        hypercorn_config.bind = [f"0.0.0.0:{PORT}"]
+        hypercorn_config.bind = [f"fd://{sock.detach()}"]  # hypercorn takes ownership of the socket
+
+        await hypercorn.asyncio.serve(self.create_app(), hypercorn_config)
+
+    def _admission(self, topic: str, settings: RouteSettings) -> FairQueue:
+        """The fair queue for the route's configured limit, or else for a limit of the topic's own.
 
-        await hypercorn.asyncio.serve(app, hypercorn_config)
+        A topic's own limit starts at MAX_CONCURRENT_RPCS, so that only a topic whose replies slow down is shed, and only
+        its requests are. The least recently used idle topics' limits are forgotten beyond MAX_TOPIC_ADMISSIONS.
+        """
+        admission = self._admissions.get(settings.prefix)
+        if admission is not None:
+            return admission
+        admission = self._topic_admissions.get(topic)
+        if admission is None:
+            admission = self._topic_admissions[topic] = FairQueue(AdaptiveLimiter(MAX_CONCURRENT_RPCS, initial_limit=MAX_CONCURRENT_RPCS))
+            if len(self._topic_admissions) > MAX_TOPIC_ADMISSIONS:
+                # forgetting a busy topic's limit would let its next requests in past the ones still in flight
+                idle = next((name for name, other in self._topic_admissions.items() if other.idle and name != topic), None)
+                if idle is not None:
+                    del self._topic_admissions[idle]
+        else:
+            self._topic_admissions.move_to_end(topic)
+        return admission
 
-    async def _rpc(self, topic: str, data: dict) -> AsyncGenerator[Message, None]:
-        message = decode(**data)
-        message.key = topic
-        message.scope.reply_to = instance_id()
-        correlation_id = message.scope.correlation_id = uniqueid()
+    async def _rpc(self, topic: str, data: dict, client: Client, timeout: Optional[float] = None) -> EncodedMessage:
+        """Publish a request and wait for its reply, or raise Overloaded if its route's limit is reached and it can't
+        get a turn at it from the fair queue.
 
-        self._rpc_return_ready[correlation_id] = asyncio.Condition()
+        The timeout defaults to the route's, or RPC_TIMEOUT.
+        """
+        settings = self._routes.match(topic)
+        timeout = timeout or settings.timeout or RPC_TIMEOUT
+        async with self._admission(topic, settings).admit(client), self._answering():
+            if settings.hedge:
+                return await self._hedged_rpc(topic, data, timeout)
+            message = make_request(topic, data)
+            correlation_id = message.scope.correlation_id
+            reply = self._replies.register(correlation_id, timeout)
+            try:
+                await self._publish(message)
+                return await asyncio.wait_for(reply, timeout=timeout)
+            finally:
+                # also on timeout or cancellation, so that the table only ever holds requests that are still waiting
+                self._replies.discard(correlation_id)
+
+    @asynccontextmanager
+    async def _answering(self, sample: bool = True) -> AsyncIterator[None]:
+        """Count a request as in flight until it's answered, and unless sample is False, observe how long that took."""
+        self._metrics.in_flight.inc()
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._metrics.in_flight.dec()
+            if sample:
+                self._metrics.handler_duration.observe(time.monotonic() - start)
+
+    async def _hedged_rpc(self, topic: str, data: dict, timeout: float) -> EncodedMessage:
+        """Publish a request, and publish it again if it goes unanswered for longer than is usual for its topic, within
+        the hedging budget. Return whichever reply arrives first; the other request's correlation id is discarded, so
+        that its reply is dropped as late."""
+        deadline = time.monotonic() + timeout
+        attempts: Dict["asyncio.Future[EncodedMessage]", Tuple[str, float]] = {}  # reply -> correlation id, time published
         try:
-            amqp_message = aio_pika.Message(body=encodes(message).encode("utf-8"))
-            routing_key = str(PubTopic(message.key))
-            await self._exchange.publish(amqp_message, routing_key)
-            async with self._rpc_return_ready[correlation_id]:
-                await self._rpc_return_ready[correlation_id].wait()
-            yield self._rpc_return_values.pop(correlation_id)
+            await self._publish_attempt(topic, data, timeout, attempts)
+            delay = self._hedging.delay(topic)
+            if delay is not None and delay < timeout:
+                done, _ = await asyncio.wait(attempts, timeout=delay)
+                if not done and self._hedging.spend():
+                    await self._publish_attempt(topic, data, deadline - time.monotonic(), attempts)
+            done, _ = await asyncio.wait(attempts, timeout=deadline - time.monotonic(), return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                raise asyncio.TimeoutError()
+            reply = done.pop()
+            result = reply.result()  # raises TimeoutError if the attempt's registration was swept
+            first = next(iter(attempts))
+            _, published = attempts[first]
+            self._hedging.record(topic, time.monotonic() - published, hedge_won=reply is not first)
+            return result
         finally:
-            del self._rpc_return_ready[correlation_id]
+            for correlation_id, _ in attempts.values():
+                self._replies.discard(correlation_id)
+
+    async def _publish_attempt(self, topic: str, data: dict, timeout: float, attempts: Dict["asyncio.Future[EncodedMessage]", Tuple[str, float]]) -> None:
+        message = make_request(topic, data)
+        correlation_id = message.scope.correlation_id
+        attempts[self._replies.register(correlation_id, timeout)] = correlation_id, time.monotonic()
+        await self._publish(message)
+
+    async def _rpc_body(self, topic: str, data: dict, client: Client, timeout: Optional[float] = None) -> Tuple[bytes, bool]:
+        """Return the reply to a request as the component encoded it, and whether it may be cached: only replies
+        without errors are."""
+        reply = await self._rpc(topic, data, client, timeout=timeout)
+        return reply.body, reply.error is None
+
+    async def _batch_item(self, item: Any, timeout: float, client: Client) -> bytes:
+        """Make one request of a batch, returning its encoded reply, or a message whose error says why there isn't
+        one."""
+        retry_after = client.take()
+        if retry_after:
+            error = rate_limited(retry_after)
+        elif not isinstance(item, dict) or not isinstance(item.get("topic"), str) or not isinstance(item.get("args", {}), dict):
+            error = {"type": "ValueError", "message": "expected an object with a topic and optional args"}
+        else:
+            topic = item["topic"].strip("/").replace("/", ".")
+            # no longer than a single request to the topic may take
+            timeout = min(timeout, self._routes.match(topic).timeout or RPC_TIMEOUT)
+            try:
+                return (await self._rpc(topic, item.get("args", {}), client, timeout=timeout)).body
+            except asyncio.TimeoutError:
+                error = {"type": "TimeoutError", "message": f"no reply within {timeout} seconds"}
+            except Overloaded as err:
+                error = {"type": "Overloaded", "message": str(err)}
+        return encodes(Message(error=error)).encode("utf-8")
+
+    async def _rpc_stream(self, topic: str, data: dict, client: Client, idle_timeout: float) -> AsyncGenerator[EncodedMessage, None]:
+        """Yield every reply to a request until the component that handled it signals the end of the stream. If the
+        handler failed, the end of the stream carries its error, and is yielded as the last reply."""
+        # a stream lasts as long as its replies keep coming, so its duration says nothing about the component's latency
+        async with self._admission(topic, self._routes.match(topic)).admit(client, sample=False), self._answering(sample=False):
+            message = make_request(topic, data)
+            message.scope.stream = True
+            correlation_id = message.scope.correlation_id
+            replies = self._replies.register_stream(correlation_id, idle_timeout, STREAM_BUFFER)
+            try:
+                await self._publish(message)
+                while True:
+                    reply = await asyncio.wait_for(replies.get(), timeout=idle_timeout)
+                    if isinstance(reply, Exception):
+                        raise reply
+                    if reply.end_of_stream:
+                        if reply.error:
+                            yield reply
+                        return
+                    yield reply
+            finally:
+                self._replies.discard(correlation_id)
+
+    async def _run_session(self, ws: Any) -> None:
+        """Serve requests multiplexed over a websocket until it closes.
+
+        Each frame from the client is a JSON object with an id, a topic and args, and optionally stream: true. Each
+        reply is sent back as {"id": id, "reply": message} as soon as it arrives, and a streamed request's last reply
+        is followed by {"id": id, "end": true}. Once the session has SESSION_MAX_IN_FLIGHT requests in flight, further
+        frames aren't read until one of them completes, and requests wait to send their replies while SESSION_OUTBOX
+        replies are waiting to be sent, so a client that doesn't keep up is slowed down rather than buffered for.
+        """
+        slots = asyncio.Semaphore(SESSION_MAX_IN_FLIGHT)
+        outbox: "asyncio.Queue[str]" = asyncio.Queue(maxsize=SESSION_OUTBOX)
+        in_flight: Set["asyncio.Future[None]"] = set()
+
+        def done(task: "asyncio.Future[None]") -> None:
+            in_flight.discard(task)
+            slots.release()
+
+        client = self._clients.client(ws.headers, ws.remote_addr)
+        writer = asyncio.ensure_future(self._write_session(ws, outbox))
+        try:
+            while True:
+                await slots.acquire()
+                frame = await ws.receive()
+                task = asyncio.ensure_future(self._session_request(frame, client, outbox))
+                in_flight.add(task)
+                task.add_done_callback(done)
+        finally:
+            writer.cancel()
+            for task in list(in_flight):
+                task.cancel()
+
+    @staticmethod
+    async def _write_session(ws: Any, outbox: "asyncio.Queue[str]") -> None:
+        while True:
+            await ws.send(await outbox.get())
+
+    async def _session_request(self, frame: str, client: Client, outbox: "asyncio.Queue[str]") -> None:
+        try:
+            item = json.loads(frame)
+        except ValueError:
+            item = None
+        request_id = item.get("id") if isinstance(item, dict) else None
+        error = None
+        retry_after = client.take()
+        if retry_after:
+            error = rate_limited(retry_after)
+        elif not isinstance(item, dict) or not isinstance(item.get("topic"), str) or not isinstance(item.get("args", {}), dict):
+            error = {"type": "ValueError", "message": "expected an object with an id, a topic and optional args"}
+        if error:
+            await outbox.put(session_frame(request_id, encodes(Message(error=error))))
+            return
+        topic = item["topic"].strip("/").replace("/", ".")
+        args = item.get("args", {})
+        stream = bool(item.get("stream"))
+        # as over HTTP, a streamed request may stay open indefinitely, so only a single reply defers termination
+        with nullcontext() if stream else defer_termination():
+            try:
+                if stream:
+                    async for reply in self._rpc_stream(topic, args, client, idle_timeout=STREAM_IDLE_TIMEOUT):
+                        await outbox.put(session_frame(request_id, reply.body.decode("utf-8")))
+                else:
+                    reply = await self._rpc(topic, args, client)
+                    await outbox.put(session_frame(request_id, reply.body.decode("utf-8")))
+            except asyncio.TimeoutError:
+                error = {"type": "TimeoutError", "message": "no reply in time"}
+            except (StreamOverflow, Overloaded) as err:
+                error = {"type": type(err).__name__, "message": str(err)}
+            except asyncio.CancelledError:  # an Exception before python 3.8
+                raise
+            except Exception as err:  # pylint: disable=broad-except
+                # nothing awaits a session's request tasks, so an error would otherwise go unseen by anyone
+                logger.exception("failed to answer session request %r", request_id)
+                error = {"type": type(err).__name__, "message": str(err)}
+            if error:
+                await outbox.put(session_frame(request_id, encodes(Message(error=error))))
+            if stream:
+                await outbox.put(json.dumps({"id": request_id, "end": True}))
+
+    async def _publish(self, message: Message) -> None:
+        message.scope.published = time.time()
+        start = time.monotonic()
+        amqp_message = aio_pika.Message(body=encodes(message).encode("utf-8"))
+        self._metrics.encode_duration.observe(time.monotonic() - start)
+        routing_key = str(PubTopic(message.key))
+        start = time.monotonic()
+        await self._exchange.publish(amqp_message, routing_key)
+        self._metrics.publish_duration.observe(time.monotonic() - start)
 
     async def _run_rpc_consumer(self):
-        async for amqp_message in self._queue:
-            amqp_message.ack()
-            ergo_message = decodes(amqp_message.body.decode("utf-8"))
-            correlation_id = ergo_message.scope.correlation_id
-            self._rpc_return_values[correlation_id] = ergo_message
-            async with self._rpc_return_ready[correlation_id]:
-                self._rpc_return_ready[correlation_id].notify()
+        """Receive replies in the order they arrive, decode up to reply_consumers of them at once, and resolve them in
+        the same order, so that a streamed response's replies stay in order."""
+        no_ack = self._config.reply_no_ack
+        decoded: "asyncio.Queue[asyncio.Future[EncodedMessage]]" = asyncio.Queue(maxsize=self._config.reply_consumers)
+        resolver = asyncio.ensure_future(self._resolve_replies(decoded))
+        try:
+            async with self._queue.iterator(no_ack=no_ack) as amqp_messages:
+                async for amqp_message in amqp_messages:
+                    self._metrics.consumed.inc()
+                    if not no_ack:
+                        await amqp_message.ack()
+                        self._metrics.acked.inc()
+                    await decoded.put(self._decode_reply(amqp_message.body))
+        finally:
+            resolver.cancel()
+
+    async def _resolve_replies(self, decoded: "asyncio.Queue[asyncio.Future[EncodedMessage]]") -> None:
+        while True:
+            future = await decoded.get()
+            try:
+                reply = await future
+            except Exception as err:  # pylint: disable=broad-except
+                self._metrics.errored.inc()
+                logger.warning("dropped a reply that couldn't be decoded: %r", err)
+                continue
+            if reply.error:
+                self._metrics.errored.inc()
+            self._metrics.received(reply.metadata.get("published"))
+            self._replies.resolve(reply.correlation_id, reply)
+
+    def _decode_reply(self, body: bytes) -> "asyncio.Future[EncodedMessage]":
+        # replies are passed through to clients as they were encoded, so only their metadata needs decoding
+        loop = asyncio.get_running_loop()
+        if len(body) >= THREADED_DECODE_BYTES:
+            return loop.run_in_executor(None, self._peek, body)
+        future = loop.create_future()
+        try:
+            future.set_result(self._peek(body))
+        except Exception as err:  # pylint: disable=broad-except
+            future.set_exception(err)
+        return future
+
+    def _peek(self, body: bytes) -> EncodedMessage:
+        start = time.monotonic()
+        reply = peek(body)
+        self._metrics.decode_duration.observe(time.monotonic() - start)
+        return reply
+
+    async def _run_sweeper(self):
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            self._replies.sweep()
 
     async def _setup_amqp(self, config: Config) -> Tuple[aio_pika.Exchange, aio_pika.Queue]:
         host = self._config.host
@@ -90,7 +474,40 @@ class HttpGatewayServer:
         broker_url = set_param(host, "heartbeat", str(heartbeat)) if heartbeat else host
         connection: aio_pika.Connection = await aio_pika.connect_robust(broker_url)
         channel: aio_pika.Channel = await connection.channel()
+        await channel.set_qos(prefetch_count=config.reply_prefetch)
         exchange: aio_pika.Exchange = await channel.declare_exchange(name=config.exchange, passive=True)
         queue: aio_pika.Queue = await channel.declare_queue(name=f"gateway:{instance_id()}", exclusive=True)
         await queue.bind(exchange=exchange, routing_key=str(SubTopic(instance_id())))
         return exchange, queue
+
+
+def make_request(topic: str, data: dict) -> Message:
+    """Summary.
+
+    Args:
+        topic (str): Description
+        data (dict): request parameters
+
+    Returns:
+        Message: addressed to topic, with its replies addressed to this gateway under a new correlation id
+    """
+    message = decode(**data)
+    message.key = topic
+    message.scope.reply_to = instance_id()
+    message.scope.correlation_id = uniqueid()
+    return message
+
+
+def rate_limited(retry_after: float) -> Dict[str, str]:
+    """The error for a request from a client that has run out of tokens."""
+    return {"type": "RateLimited", "message": f"too many requests; retry in {retry_after:.3f} seconds"}
+
+
+def session_frame(request_id: Any, reply: str) -> str:
+    """Tag an encoded reply with the id of the websocket session request it answers."""
+    return f'{{"id": {json.dumps(request_id)}, "reply": {reply}}}'
+
+
+def cache_key(topic: str, args: dict) -> Tuple[str, Tuple[Tuple[str, Any], ...]]:
+    """Key a request by its topic and its arguments, in a canonical order."""
+    return topic, tuple(sorted(args.items()))
@@ -2,8 +2,21 @@
 # pylint: disable=W0223
 
 """Summary."""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, AsyncGenerator, Generator, Iterator, List, Union
+
+import hypercorn.asyncio
+import hypercorn.config
+
+from ergo.amqp_invoker import make_error_output
 from ergo.function_invocable import FunctionInvocable
 from ergo.invoker import Invoker
+from ergo.message import Message, decode, encodes, encodes_chunk
+from ergo.metrics import ComponentMetrics, atimed, serve_metrics, timed
+from ergo.workers import Supervisor, bind_socket
 
 
 class HttpInvoker(Invoker):
@@ -19,6 +32,7 @@ class HttpInvoker(Invoker):
         super().__init__(invocable)
         self._route: str = '/'
         self._port: int = 80
+        self._metrics = ComponentMetrics(str(invocable.config.func))
 
     @property
     def route(self) -> str:
@@ -59,3 +73,132 @@ class HttpInvoker(Invoker):
 
         """
         self._port = arg
+
+    def start(self) -> int:
+        """Serve the app returned by create_app with hypercorn, in as many worker processes as the config asks for.
+
+        Returns:
+            int: Description
+
+        """
+        workers = self._invocable.config.workers
+        if workers > 1:
+            return Supervisor(self.serve, workers).run()
+        self.serve(0)
+        return 0
+
+    def create_app(self) -> Any:
+        """Build the WSGI or ASGI app that serves the handler at route.
+
+        Raises:
+            NotImplementedError: Description
+
+        """
+        raise NotImplementedError()
+
+    def serve(self, worker: int = 0) -> None:
+        """Serve requests in this process until it receives SIGINT or SIGTERM.
+
+        Args:
+            worker (int): index of this worker process
+
+        """
+        config = self._invocable.config
+        if config.metrics_port is not None:
+            serve_metrics(config.metrics_port + worker)
+        sock = bind_socket('0.0.0.0', self._port, reuse_port=config.workers > 1)
+        hypercorn_config = hypercorn.config.Config()
+        hypercorn_config.bind = [f'fd://{sock.detach()}']  # hypercorn takes ownership of the socket
+        hypercorn_config.keep_alive_timeout = config.keep_alive_timeout
+        hypercorn_config.wsgi_max_body_size = config.max_body_size
+        loop = asyncio.new_event_loop()
+        # WSGI apps are called on the loop's default executor, so its size is the number of requests served at once
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=config.threads))
+        try:
+            loop.run_until_complete(hypercorn.asyncio.serve(self.create_app(), hypercorn_config))
+        finally:
+            if hasattr(loop, 'shutdown_default_executor'):  # python 3.9+; older loops don't wait for the executor
+                loop.run_until_complete(loop.shutdown_default_executor())
+            loop.close()
+
+    def decode_request(self, params: dict) -> Message:
+        """Summary.
+
+        Args:
+            params (dict): the request's parameters
+
+        Returns:
+            Message: Description
+
+        """
+        start = time.monotonic()
+        message_in = decode(**params)
+        self._metrics.decode_duration.observe(time.monotonic() - start)
+        return message_in
+
+    def encode_response(self, data_out: Union[Message, List[Message]]) -> str:
+        """Summary.
+
+        Args:
+            data_out (Union[Message, List[Message]]): Description
+
+        Returns:
+            str: Description
+
+        """
+        start = time.monotonic()
+        body = encodes(data_out)
+        self._metrics.encode_duration.observe(time.monotonic() - start)
+        return body
+
+    @contextmanager
+    def handling(self) -> Iterator[None]:
+        """Count a request as in flight while it's handled, and as errored if handling it raises.
+
+        Streamed responses are produced after the app's handler returns, so stream_handler and astream_handler count
+        their requests themselves.
+        """
+        self._metrics.consumed.inc()
+        self._metrics.in_flight.inc()
+        try:
+            yield
+        except Exception:
+            self._metrics.errored.inc()
+            raise
+        finally:
+            self._metrics.in_flight.dec()
+
+    def stream_handler(self, message_in: Message, mimetype: str) -> Generator[str, None, None]:
+        """Yield each of the handler's results as a chunk of a streamed response as soon as it's produced.
+
+        Args:
+            message_in (Message): Description
+            mimetype (str): one of ergo.message.STREAM_MIMETYPES
+
+        """
+        with self.handling():
+            try:
+                for message_out in timed(self.invoke_handler(message_in), self._metrics.handler_duration):
+                    yield encodes_chunk(message_out, mimetype)
+            except Exception as err:  # pylint: disable=broad-except
+                self._metrics.errored.inc()
+                # the response status has already been sent, so the error travels as the final chunk
+                message_in.error = make_error_output(err)
+                yield encodes_chunk(message_in, mimetype, event="error")
+
+    async def astream_handler(self, message_in: Message, mimetype: str) -> AsyncGenerator[str, None]:
+        """As stream_handler, for apps running on an event loop.
+
+        Args:
+            message_in (Message): Description
+            mimetype (str): one of ergo.message.STREAM_MIMETYPES
+
+        """
+        with self.handling():
+            try:
+                async for message_out in atimed(self._invocable.ainvoke(message_in), self._metrics.handler_duration):
+                    yield encodes_chunk(message_out, mimetype)
+            except Exception as err:  # pylint: disable=broad-except
+                self._metrics.errored.inc()
+                message_in.error = make_error_output(err)
+                yield encodes_chunk(message_in, mimetype, event="error")
@@ -1,16 +1,39 @@
 """Summary."""
+from __future__ import annotations
+
+import weakref
+from typing import Any, Tuple
 
 
 class Key:
-    """Summary."""
+    """
+    Summary.
+
+    Keys are interned: constructing a Key from a string that a live Key was already made from returns that same Key,
+    so comparing keys is usually an identity check, and their hash is computed only once.
+    """
+
+    __slots__ = ('_key', '_hash', '__weakref__')
+    _interned: weakref.WeakValueDictionary[str, Key] = weakref.WeakValueDictionary()
 
-    def __init__(self, key_str: str):
+    def __new__(cls, key_str: str) -> Key:
         """Summary.
 
         Args:
             key_str (str): Description
         """
-        self._key = key_str
+        key = cls._interned.get(key_str)
+        if key is None:
+            key = super().__new__(cls)
+            key._key = key_str
+            key._hash = hash(key_str)
+            # if another thread interned key_str in the meantime, use its Key
+            key = cls._interned.setdefault(key_str, key)
+        return key
+
+    def __reduce__(self) -> Tuple[type, Tuple[str]]:
+        # __new__ requires the key string, and copies should be interned like any other Key
+        return Key, (self._key,)
 
     def __str__(self) -> str:
         """Summary.
@@ -20,8 +43,12 @@ class Key:
         """
         return self._key
 
-    def __eq__(self, other):
-        return str(self) == str(other)
+    def __eq__(self, other: Any) -> bool:
+        if self is other:
+            return True
+        if isinstance(other, Key):
+            return self._key == other._key
+        return self._key == str(other)
 
-    def __hash__(self):
-        return self.__str__().__hash__()
+    def __hash__(self) -> int:
+        return self._hash
@@ -0,0 +1,96 @@
+"""Summary."""
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Union
+
+INITIAL_LIMIT = 100
+MIN_LIMIT = 1
+BACKOFF = 0.9  # multiplies the limit when requests are taking too long
+TOLERANCE = 2.0  # a request is slow if it takes this many times longer than the average
+SMOOTHING = 0.02  # weight of each request's latency in the average
+
+
+class Overloaded(Exception):
+    """Raised instead of admitting a request while as many requests as the limit allows are in flight."""
+
+
+class AdaptiveLimiter:
+    """
+    Limit the number of requests in flight, adapting the limit to observed latency.
+
+    The limit grows additively while at least half of it is in use and requests are fast, and shrinks multiplicatively
+    when a request times out or takes more than TOLERANCE times the average latency, at most once per such request's
+    latency, so that one slow spell shrinks it once. Requests beyond the limit are rejected immediately rather than
+    queued, so that a slow component sheds load instead of accumulating it.
+    """
+
+    def __init__(self, max_limit: int, initial_limit: int = INITIAL_LIMIT, min_limit: int = MIN_LIMIT) -> None:
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.limit = float(max(self.min_limit, min(initial_limit, max_limit)))
+        self.in_flight = 0
+        self.average_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    @contextmanager
+    def admit(self, sample: bool = True) -> Iterator[None]:
+        """Hold a slot for the duration of a request.
+
+        Args:
+            sample (bool): adapt the limit to the request's latency; pass False for requests whose duration isn't
+                governed by how quickly the component replies, such as streams
+
+        Raises:
+            Overloaded: if the limit has been reached
+        """
+        if self.in_flight >= int(self.limit):
+            self.rejected += 1
+            raise Overloaded(f"{self.in_flight} requests in flight")
+        self.in_flight += 1
+        self.admitted += 1
+        start = time.monotonic()
+        try:
+            yield
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            now = time.monotonic()
+            self._decrease(now, now - start)
+            raise
+        else:
+            if sample:
+                self._sample(time.monotonic() - start)
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Union[int, float, None]]:
+        """Summary.
+
+        Returns:
+            Dict[str, Union[int, float, None]]: Description
+        """
+        return {
+            'limit': int(self.limit),
+            'in_flight': self.in_flight,
+            'average_latency': self.average_latency,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts,
+        }
+
+    def _sample(self, latency: float) -> None:
+        average = self.average_latency
+        if average is not None and latency > TOLERANCE * average:
+            self._decrease(time.monotonic(), latency)
+        elif 2 * self.in_flight >= self.limit:
+            self.limit = min(self.limit + 1, self.max_limit)
+        self.average_latency = latency if average is None else average + SMOOTHING * (latency - average)
+
+    def _decrease(self, now: float, latency: float) -> None:
+        # requests that were already in flight when the limit last shrank don't shrink it again
+        if now - latency >= self._last_decrease:
+            self.limit = max(self.limit * BACKOFF, self.min_limit)
+            self._last_decrease = now
@@ -8,6 +8,13 @@ import jsons
 
 from ergo.scope import Scope
 
+NDJSON_MIMETYPE = "application/x-ndjson"
+EVENT_STREAM_MIMETYPE = "text/event-stream"
+STREAM_MIMETYPES = (NDJSON_MIMETYPE, EVENT_STREAM_MIMETYPE)
+SCOPE_MARKER = b'"scope": {"id": '  # how encodes() begins a message's scope
+
+_decoder = json.JSONDecoder()
+
 
 @dataclass
 class Message:
@@ -18,10 +25,56 @@ class Message:
     error: Optional[Dict[str, Any]] = None
 
 
+@dataclass
+class EncodedMessage:
+    """A message as it was received, with only its scope's metadata and its error decoded."""
+
+    body: bytes
+    metadata: Dict[str, Any]
+    error: Optional[Dict[str, Any]] = None
+
+    @property
+    def correlation_id(self) -> Optional[str]:
+        return self.metadata.get("correlation_id")
+
+    @property
+    def end_of_stream(self) -> bool:
+        return bool(self.metadata.get("end_of_stream"))
+
+    def decode(self) -> Message:
+        return decodes(self.body.decode("utf-8"))
+
+
 def decodes(s: str) -> Message:
     return decode(**json.loads(s))
 
 
+def peek(body: bytes) -> EncodedMessage:
+    """Decode just the scope metadata and error of a message encoded by encodes(), which come after its data, by
+    parsing the message from the start of its scope. Messages encoded some other way are decoded in full.
+
+    Args:
+        body (bytes): Description
+
+    Returns:
+        EncodedMessage: Description
+    """
+    start = body.rfind(SCOPE_MARKER)
+    if start >= 0:
+        # everything before the scope is left undecoded; the scope is followed only by the error
+        tail = body[start + len(b'"scope": '):].decode("utf-8")
+        try:
+            scope, end = _decoder.raw_decode(tail)
+            if tail.startswith(', "error": ', end) and tail.endswith("}"):
+                error, end = _decoder.raw_decode(tail, end + len(', "error": '))
+                if end == len(tail) - 1 and isinstance(scope.get("metadata"), dict):
+                    return EncodedMessage(body, scope["metadata"], error)
+        except (ValueError, AttributeError):
+            pass
+    message = decodes(body.decode("utf-8"))
+    return EncodedMessage(body, message.scope.metadata, message.error)
+
+
 def decode(**kwargs: Any) -> Message:
     # if kwargs includes `data`, assume this message was sent by an upstream component, and the other kwargs are
     #   metadata
@@ -32,10 +85,36 @@ def decode(**kwargs: Any) -> Message:
     return ret
 
 
+def end_of_stream(request_scope: Scope, error: Optional[Dict[str, Any]] = None) -> Message:
+    """The message a component sends to a streaming request's reply_to after its last reply, carrying the error that
+    ended the stream early, if any."""
+    metadata = {"reply_to": request_scope.reply_to, "correlation_id": request_scope.correlation_id, "end_of_stream": True}
+    return Message(key=request_scope.reply_to, scope=Scope(metadata=metadata), error=error)
+
+
 def encodes(data: Union[Message, Iterable[Message]]) -> str:
     return json.dumps(data, cls=ErgoEncoder)
 
 
+def encodes_chunk(message: Union[Message, str], mimetype: str, event: Optional[str] = None) -> str:
+    """Encode a message, unless it's already encoded, as one chunk of a streamed response, either a line of NDJSON or
+    a server-sent event."""
+    body = message if isinstance(message, str) else encodes(message)
+    if mimetype == EVENT_STREAM_MIMETYPE:
+        event_field = f"event: {event}\n" if event else ""
+        return f"{event_field}data: {body}\n\n"
+    return f"{body}\n"
+
+
+def stream_mimetype(accepted_mimetypes: Iterable[str]) -> Optional[str]:
+    """Return the first streaming mimetype a client explicitly accepts. Wildcards don't count, so that clients have
+    to opt in to streamed responses."""
+    for mimetype in accepted_mimetypes:
+        if mimetype in STREAM_MIMETYPES:
+            return mimetype
+    return None
+
+
 class ErgoEncoder(json.JSONEncoder):
     def default(self, o: Any) -> Any:
         if dataclasses.is_dataclass(o):
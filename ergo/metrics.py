@@ -0,0 +1,294 @@
+"""Summary."""
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, AsyncIterable, AsyncIterator, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"  # the Prometheus text exposition format
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)  # seconds
+DRAIN_THRESHOLD = 1024  # recorded values a metric buffers before the thread recording one folds them in
+
+T = TypeVar("T")
+M = TypeVar("M", bound="Metric")
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Labels, float]  # name suffix, extra labels, value
+
+
+class Metric(ABC):
+    """
+    A counter, gauge or histogram.
+
+    Recording a value appends it to a deque, which is atomic and doesn't take a lock, so threads recording the same
+    metric never wait on one another. The values are folded into the metric's totals when it's collected, or by
+    whichever thread finds DRAIN_THRESHOLD values buffered and the fold lock free, so the buffer stays bounded between
+    scrapes.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Labels) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._pending: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def collect(self) -> List[Sample]:
+        """Summary.
+
+        Returns:
+            List[Sample]: Description
+        """
+        with self._lock:
+            self._drain()
+            return self._samples()
+
+    def _record(self, value: float) -> None:
+        pending = self._pending
+        pending.append(value)
+        if len(pending) >= DRAIN_THRESHOLD and self._lock.acquire(blocking=False):
+            try:
+                self._drain()
+            finally:
+                self._lock.release()
+
+    def _drain(self) -> None:
+        pending = self._pending
+        for _ in range(len(pending)):
+            self._fold(pending.popleft())
+
+    @abstractmethod
+    def _fold(self, value: float) -> None:
+        """Add a recorded value to the metric's totals."""
+
+    @abstractmethod
+    def _samples(self) -> List[Sample]:
+        """The metric's totals, as Prometheus samples."""
+
+
+class Counter(Metric):
+    """Summary."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Labels) -> None:
+        super().__init__(name, documentation, labels)
+        self._value = 0.0
+
+    @property
+    def value(self) -> float:
+        return self.collect()[0][2]
+
+    def inc(self, amount: float = 1) -> None:
+        self._record(amount)
+
+    def _fold(self, value: float) -> None:
+        self._value += value
+
+    def _samples(self) -> List[Sample]:
+        return [("", (), self._value)]
+
+
+class Gauge(Counter):
+    """Summary."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1) -> None:
+        self._record(-amount)
+
+
+class Histogram(Metric):
+    """Counts of observed values in cumulative buckets, with their sum."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Labels, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, documentation, labels)
+        self._bounds = tuple(sorted(buckets))
+        self._counts = [0] * (len(self._bounds) + 1)  # the last counts values above every bound
+        self._sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self._record(value)
+
+    def _fold(self, value: float) -> None:
+        self._counts[bisect_left(self._bounds, value)] += 1
+        self._sum += value
+
+    def _samples(self) -> List[Sample]:
+        samples: List[Sample] = []
+        cumulative = 0
+        for bound, count in zip(self._bounds + (float("inf"),), self._counts):
+            cumulative += count
+            samples.append(("_bucket", (("le", format_value(bound)),), cumulative))
+        samples.append(("_sum", (), self._sum))
+        samples.append(("_count", (), cumulative))
+        return samples
+
+
+class Registry:
+    """The metrics of one process, by name and labels."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[Tuple[str, Labels], Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, **labels: str) -> Counter:
+        return self._get(Counter, name, documentation, labels)
+
+    def gauge(self, name: str, documentation: str, **labels: str) -> Gauge:
+        return self._get(Gauge, name, documentation, labels)
+
+    def histogram(self, name: str, documentation: str, **labels: str) -> Histogram:
+        return self._get(Histogram, name, documentation, labels)
+
+    def render(self) -> str:
+        """Format every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: Description
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines: List[str] = []
+        name = None
+        for metric in metrics:
+            if metric.name != name:
+                name = metric.name
+                lines.append(f"# HELP {name} {metric.documentation}")
+                lines.append(f"# TYPE {name} {metric.kind}")
+            for suffix, extra_labels, value in metric.collect():
+                lines.append(f"{name}{suffix}{format_labels(metric.labels + extra_labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _get(self, kind: Type[M], name: str, documentation: str, labels: Dict[str, str]) -> M:
+        key = name, tuple(sorted(labels.items()))
+        with self._lock:
+            metric = self._metrics.get(key)
+            if metric is None:
+                metric = self._metrics[key] = kind(name, documentation, key[1])
+        if type(metric) is not kind:  # pylint: disable=unidiomatic-typecheck
+            raise ValueError(f"{name} is already registered as a {metric.kind}")
+        return metric
+
+
+REGISTRY = Registry()
+
+
+class ComponentMetrics:
+    """
+    The metrics an invoker or gateway records, labelled with its component.
+
+    handler_duration is the time spent in the handler for a component, and the time taken to answer each request for
+    the gateway. queue_duration is the time between a message being published and it being received, according to the
+    publish timestamp in its scope's metadata, so it's only as accurate as the clocks of the two hosts agree.
+    """
+
+    def __init__(self, component: str, registry: Registry = REGISTRY) -> None:
+        self.consumed = registry.counter("ergo_messages_consumed_total", "Messages or requests received.", component=component)
+        self.acked = registry.counter("ergo_messages_acked_total", "Messages acknowledged to the broker.", component=component)
+        self.errored = registry.counter("ergo_messages_errored_total", "Messages or requests whose handling failed.", component=component)
+        self.in_flight = registry.gauge("ergo_messages_in_flight", "Messages or requests received and not yet handled.", component=component)
+        self.handler_duration = registry.histogram("ergo_handler_duration_seconds", "Time spent handling each message or request.", component=component)
+        self.decode_duration = registry.histogram("ergo_decode_duration_seconds", "Time spent decoding each message received.", component=component)
+        self.encode_duration = registry.histogram("ergo_encode_duration_seconds", "Time spent encoding each message published.", component=component)
+        self.publish_duration = registry.histogram("ergo_publish_duration_seconds", "Time taken to publish each message to the broker.", component=component)
+        self.queue_duration = registry.histogram("ergo_queue_duration_seconds", "Time between each message being published and received.", component=component)
+
+    def received(self, published: Optional[float]) -> None:
+        """Record the time a message spent queued, if it carries a publish timestamp.
+
+        Args:
+            published (Optional[float]): seconds since the epoch
+        """
+        if published is not None:
+            self.queue_duration.observe(max(time.time() - published, 0.0))
+
+
+def timed(iterable: Iterable[T], histogram: Histogram) -> Iterator[T]:
+    """Yield from iterable, then observe the time spent producing its items, but not consuming them, once it's
+    exhausted or closed."""
+    iterator = iter(iterable)
+    elapsed = 0.0
+    try:
+        while True:
+            start = time.monotonic()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.monotonic() - start
+            yield item
+    finally:
+        histogram.observe(elapsed)
+
+
+async def atimed(iterable: AsyncIterable[T], histogram: Histogram) -> AsyncIterator[T]:
+    """As timed, for an async iterable. The time spent producing items includes the time spent awaiting them."""
+    iterator = iterable.__aiter__()
+    elapsed = 0.0
+    try:
+        while True:
+            start = time.monotonic()
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+            finally:
+                elapsed += time.monotonic() - start
+            yield item
+    finally:
+        histogram.observe(elapsed)
+
+
+def serve_metrics(port: int, registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """Serve the registry's metrics to GET requests on any path of the port, from a daemon thread.
+
+    Args:
+        port (int): Description
+        registry (Registry): Description
+
+    Returns:
+        ThreadingHTTPServer: call shutdown() to stop serving
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{key}="{escape(value)}"' for key, value in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
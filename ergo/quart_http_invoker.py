@@ -0,0 +1,65 @@
+"""Summary."""
+import inspect
+from typing import List, Union
+
+from quart import Quart, Response, abort, request
+
+from ergo.http_invoker import HttpInvoker
+from ergo.message import Message, stream_mimetype
+from ergo.metrics import atimed
+
+
+class QuartHttpInvoker(HttpInvoker):
+    """
+    Serve the handler from an ASGI app.
+
+    Coroutine functions and async generators run on the event loop, so one worker can wait on thousands of slow
+    requests at once. Other handlers run on the loop's default executor, which has `threads` threads.
+    """
+
+    def create_app(self) -> Quart:
+        """Summary.
+
+        Returns:
+            Quart: Description
+
+        """
+        app: Quart = Quart(__name__)
+        app.config['MAX_CONTENT_LENGTH'] = self._invocable.config.max_body_size
+
+        @app.route(self.route, methods=['GET', 'POST'])
+        async def handler() -> Union[str, Response]:
+            """Summary.
+
+            Returns:
+                Union[str, Response]: Description
+
+            """
+            data_in: Message = self.decode_request(await request_params())
+            mimetype = stream_mimetype(value for value, _ in request.accept_mimetypes)
+            if mimetype:
+                return Response(self.astream_handler(data_in, mimetype), mimetype=mimetype)
+            with self.handling():
+                data_out: List[Message] = [message async for message in atimed(self._invocable.ainvoke(data_in), self._metrics.handler_duration)]
+            func = self._invocable.func
+            if not (inspect.isgeneratorfunction(func) or inspect.isasyncgenfunction(func)):
+                data_out = data_out[0]
+            return self.encode_response(data_out)
+
+        return app
+
+
+async def request_params() -> dict:
+    """Query string parameters, overridden by the members of a JSON object request body.
+
+    Returns:
+        dict: Description
+
+    """
+    params = request.args.to_dict()
+    if request.is_json:
+        body = await request.get_json(silent=True)
+        if not isinstance(body, dict):
+            abort(400, 'request body must be a JSON object')
+        params.update(body)
+    return params
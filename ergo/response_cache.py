@@ -0,0 +1,136 @@
+"""Summary."""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, Union
+
+ENTRY_OVERHEAD = 256  # approximate bytes of bookkeeping per entry, on top of its body
+
+logger = logging.getLogger(__name__)
+
+Fetch = Callable[[], Awaitable[Tuple[bytes, bool]]]
+
+
+class _Entry:
+    __slots__ = ('body', 'expires', 'size')
+
+    def __init__(self, body: bytes, expires: float, size: int) -> None:
+        self.body = body
+        self.expires = expires
+        self.size = size
+
+
+class ResponseCache:
+    """
+    An LRU cache of response bodies, bounded by their approximate size in memory.
+
+    get() returns a cached body while it's fresh. For `stale` seconds after that, it still returns the cached body, but
+    refreshes it in the background. Otherwise it fetches the body, and concurrent gets of the same key wait for that
+    one fetch instead of making their own.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, stale: float = 0.0) -> None:
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._stale = stale
+        self._entries: 'OrderedDict[Hashable, _Entry]' = OrderedDict()  # least recently used first
+        self._fetches: Dict[Hashable, 'asyncio.Future[bytes]'] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.collapsed = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: Hashable, fetch: Fetch) -> bytes:
+        """Summary.
+
+        Args:
+            key (Hashable): Description
+            fetch (Fetch): returns the body, and whether it may be cached
+
+        Returns:
+            bytes: Description
+        """
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if now < entry.expires:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.body
+            if now < entry.expires + self._stale:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                if key not in self._fetches:
+                    self._start_fetch(key, fetch).add_done_callback(log_refresh_error)
+                return entry.body
+            self._remove(key)
+        pending = self._fetches.get(key)
+        if pending is None:
+            self.misses += 1
+            pending = self._start_fetch(key, fetch)
+            # if every requester gives up, nobody retrieves a failed fetch's exception
+            pending.add_done_callback(lambda future: future.cancelled() or future.exception())
+        else:
+            self.collapsed += 1
+        # shielded, so that one requester giving up doesn't cancel the fetch for the others
+        return await asyncio.shield(pending)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Summary.
+
+        Returns:
+            Dict[str, Union[int, float]]: Description
+        """
+        lookups = self.hits + self.stale_hits + self.misses + self.collapsed
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'max_bytes': self._max_bytes,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'collapsed': self.collapsed,
+            'evictions': self.evictions,
+            'hit_ratio': (self.hits + self.stale_hits + self.collapsed) / lookups if lookups else 0.0,
+        }
+
+    def _start_fetch(self, key: Hashable, fetch: Fetch) -> 'asyncio.Future[bytes]':
+        future = asyncio.ensure_future(self._fetch(key, fetch))
+        self._fetches[key] = future
+        return future
+
+    async def _fetch(self, key: Hashable, fetch: Fetch) -> bytes:
+        try:
+            body, cacheable = await fetch()
+        finally:
+            del self._fetches[key]
+        if cacheable:
+            self._put(key, body)
+        return body
+
+    def _put(self, key: Hashable, body: bytes) -> None:
+        size = len(body) + ENTRY_OVERHEAD
+        if size > self._max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(body, time.monotonic() + self._ttl, size)
+        self.bytes += size
+        while self.bytes > self._max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+
+
+def log_refresh_error(future: 'asyncio.Future[bytes]') -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning('failed to refresh a cached response: %r', future.exception())
@@ -0,0 +1,63 @@
+"""Summary."""
+import dataclasses
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class RouteSettings:
+    """Gateway settings for the requests under a route prefix."""
+
+    prefix: str = ""
+    cache_ttl: Optional[float] = None  # seconds a reply to a GET is cached; caching is off unless set
+    cache_stale: float = 0.0  # seconds past cache_ttl that a cached reply is still served while it's refreshed
+    cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES
+    limit: Optional[int] = None  # most requests in flight at once; unless set, the route shares the gateway's limit
+    timeout: Optional[float] = None  # seconds to wait for a reply before responding 504
+    hedge: bool = False  # make slow requests again, which is only safe if the components under the route are idempotent
+
+
+class RouteTable:
+    """
+    Find the settings for a request path by its longest configured prefix.
+
+    Prefixes match whole path segments, so 'catalog/products' applies to '/catalog/products' and
+    '/catalog/products/list', but not to '/catalog/productsearch'. Segments may be separated by '/' or '.'.
+    """
+
+    def __init__(self, routes: Dict[str, Dict[str, Any]]) -> None:
+        self._default = RouteSettings()
+        self._routes: Dict[Tuple[str, ...], RouteSettings] = {}
+        fields = {field.name for field in dataclasses.fields(RouteSettings)} - {"prefix"}
+        for prefix, settings in routes.items():
+            unexpected = set(settings or {}) - fields
+            if unexpected:
+                raise ValueError(f"unexpected settings for route {prefix}: {', '.join(sorted(unexpected))}")
+            segments = split_path(prefix)
+            self._routes[segments] = RouteSettings(prefix="/".join(segments), **(settings or {}))
+        self._max_depth = max((len(segments) for segments in self._routes), default=0)
+
+    def __iter__(self):
+        return iter(self._routes.values())
+
+    def match(self, path: str) -> RouteSettings:
+        """Summary.
+
+        Args:
+            path (str): request path, such as 'catalog/products/list'
+
+        Returns:
+            RouteSettings: the settings of the longest matching prefix, or defaults
+        """
+        segments = split_path(path)
+        for depth in range(min(len(segments), self._max_depth), -1, -1):
+            settings = self._routes.get(segments[:depth])
+            if settings is not None:
+                return settings
+        return self._default
+
+
+def split_path(path: str) -> Tuple[str, ...]:
+    return tuple(segment for segment in path.replace(".", "/").split("/") if segment)
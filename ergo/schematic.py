@@ -1,13 +1,27 @@
 """Summary."""
+import concurrent.futures
 import glob
 import itertools
+import json
 import os
 import sys
-from typing import Dict, Generator, List, Tuple, Union
+import tempfile
+from typing import Any, Dict, Generator, Iterable, List, Optional, Tuple, Union
 
 import graphviz
 import yaml
 
+from ergo.topic_index import TopicIndex
+from ergo.topology import topic_list
+
+# per user rather than per checkout, so that a cache file shipped in a repository is never read
+CONFIG_CACHE_PATH = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'ergo', 'config_cache.json')
+CONFIG_CACHE_MAX_FILES = 10**5
+PARALLEL_PARSE_MIN_FILES = 64
+PARALLEL_PARSE_CHUNKSIZE = 32
+# libyaml's loader is several times faster than the pure python one, when pyyaml was built with it
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 
 def format_component(config: Dict[str, Union[None, str, List[str]]]) -> Tuple[str, str]:
     """Summary.
@@ -31,43 +45,136 @@ def format_topic(typestr: str, config: Dict[str, Union[None, str, List[str]]]) -
     Yields:
         Generator[Tuple[str, str], None, None]: Description
     """
-    tlist = config.get(typestr) or []
-    if isinstance(tlist, str):
-        tlist = [tlist]
-
-    for topic_element in tlist:
+    for topic_element in topic_list(config, typestr):
         topic_str = '.'.join(sorted('&#x3a;'.join(topic_element.split(':')).split('.')))
         yield (f'topic_{topic_str}', topic_str)
 
 
-def load_configs(folders: List[str]) -> List[Dict[str, Union[None, str, List[str]]]]:
+def load_configs(folders: List[str], cache_path: Optional[str] = CONFIG_CACHE_PATH) -> List[Dict[str, Union[None, str, List[str]]]]:
     """Summary.
 
     Args:
         folders (List[str]): Description
+        cache_path (Optional[str]): where to cache parsed files between runs, or None not to cache them
 
     Returns:
         List[Dict[str, Union[None, str, List[str]]]]: Description
     """
     configs = []
 
+    yaml_files_by_folder = {}
     for folder in folders:
         yaml_files = glob.glob(os.path.join(folder, '**/*.y*ml'), recursive=True)
+        yaml_files_by_folder[folder] = [f for f in yaml_files if not os.path.basename(f).startswith('serverless')]  # skip serverless config files
+    parsed = parse_yaml_files(list(itertools.chain.from_iterable(yaml_files_by_folder.values())), cache_path)
+
+    for folder, yaml_files in yaml_files_by_folder.items():
         for yaml_file in yaml_files:
-            if not os.path.basename(yaml_file).startswith('serverless'):  # skip serverless config files
-                with open(yaml_file, 'r', encoding='utf8') as stream:
-                    config = yaml.safe_load(stream)
-                    if config and 'func' in config:
-                        # example:
-                        # root_folder/api_connector/ship_dc/api_connector.yaml becomes
-                        # api_connector/ship_dc/api_connector
-                        folder_plus_path_separator_len = len(os.path.normpath(folder)) + 1
-                        component_name = yaml_file[folder_plus_path_separator_len:].split('.')[0]
-                        config['name'] = component_name
-                        configs.append(config)
+            config = parsed[yaml_file]
+            if config and 'func' in config:
+                # example:
+                # root_folder/api_connector/ship_dc/api_connector.yaml becomes
+                # api_connector/ship_dc/api_connector
+                folder_plus_path_separator_len = len(os.path.normpath(folder)) + 1
+                component_name = yaml_file[folder_plus_path_separator_len:].split('.')[0]
+                config = dict(config, name=component_name)
+                configs.append(config)
     return configs
 
 
+def parse_yaml_files(yaml_files: List[str], cache_path: Optional[str] = CONFIG_CACHE_PATH) -> Dict[str, Any]:
+    """Parse yaml files, in parallel when there are many of them.
+
+    Files whose modification time and size match an entry in the cache at cache_path aren't parsed again. This call's
+    files are merged into the cache whenever any of them had to be parsed.
+
+    Args:
+        yaml_files (List[str]): Description
+        cache_path (Optional[str]): Description
+
+    Returns:
+        Dict[str, Any]: parsed contents by path
+    """
+    cache = read_config_cache(cache_path) if cache_path else {}
+    entries = {}
+    stale = []
+    for yaml_file in yaml_files:
+        stat = os.stat(yaml_file)
+        key = os.path.abspath(yaml_file)
+        entry = cache.get(key)
+        if isinstance(entry, list) and entry[:2] == [stat.st_mtime_ns, stat.st_size]:
+            entries[key] = entry
+        else:
+            entries[key] = [stat.st_mtime_ns, stat.st_size, None]
+            stale.append(yaml_file)
+
+    if len(stale) >= PARALLEL_PARSE_MIN_FILES:
+        with concurrent.futures.ProcessPoolExecutor() as pool:
+            parsed: Iterable[Any] = list(pool.map(parse_yaml_file, stale, chunksize=PARALLEL_PARSE_CHUNKSIZE))
+    else:
+        parsed = map(parse_yaml_file, stale)
+    for yaml_file, data in zip(stale, parsed):
+        key = os.path.abspath(yaml_file)
+        entries[key] = entries[key][:2] + [data]
+
+    if cache_path and stale:
+        write_config_cache(cache_path, cache, {os.path.abspath(yaml_file): entries[os.path.abspath(yaml_file)] for yaml_file in stale})
+    return {yaml_file: entries[os.path.abspath(yaml_file)][2] for yaml_file in yaml_files}
+
+
+def parse_yaml_file(yaml_file: str) -> Any:
+    with open(yaml_file, 'r', encoding='utf8') as stream:
+        return yaml.load(stream, Loader=YAML_LOADER)
+
+
+def read_config_cache(cache_path: str) -> Dict[str, List[Any]]:
+    """Summary.
+
+    Args:
+        cache_path (str): Description
+
+    Returns:
+        Dict[str, List[Any]]: modification time, size and parsed contents, by absolute path
+    """
+    try:
+        with open(cache_path, 'r', encoding='utf8') as fh:
+            cache = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def write_config_cache(cache_path: str, cache: Dict[str, List[Any]], entries: Dict[str, List[Any]]) -> None:
+    """Merge newly parsed entries into the cache read earlier, and write it back.
+
+    Only entries whose contents survive a round trip through JSON are cached; yaml can hold keys and values that JSON
+    can't, such as integer keys and dates.
+
+    Args:
+        cache_path (str): Description
+        cache (Dict[str, List[Any]]): Description
+        entries (Dict[str, List[Any]]): Description
+    """
+    merged = dict(cache)
+    for key, entry in entries.items():
+        merged.pop(key, None)
+        try:
+            if json.loads(json.dumps(entry[2])) == entry[2]:
+                merged[key] = entry  # most recently parsed last
+        except (TypeError, ValueError):
+            pass
+    for key in list(merged)[:max(len(merged) - CONFIG_CACHE_MAX_FILES, 0)]:
+        del merged[key]
+    try:
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', encoding='utf8', dir=os.path.dirname(cache_path) or '.', delete=False) as fh:
+            json.dump(merged, fh)
+        os.replace(fh.name, cache_path)
+    except OSError:
+        # caching is an optimization; a read-only cache directory shouldn't break `ergo graph`
+        pass
+
+
 def topics(dot: graphviz.Digraph, configs: List[Dict[str, Union[None, str, List[str]]]]) -> None:  # type: ignore[no-any-unimported]
     """Summary.
 
@@ -89,6 +196,31 @@ def topics(dot: graphviz.Digraph, configs: List[Dict[str, Union[None, str, List[
             dot.edge(topic_element[0], format_component(config)[0])
 
 
+def derive_edges(configs: List[Dict[str, Union[None, str, List[str]]]]) -> List[Tuple[str, str]]:
+    """Find every edge from a published topic node to a subscribed topic node whose keys it contains.
+
+    Subscribed topics are indexed by key, so this visits each published topic once rather than every pair of configs.
+
+    Args:
+        configs (List[Dict[str, Union[None, str, List[str]]]]): Description
+
+    Returns:
+        List[Tuple[str, str]]: (published topic node, subscribed topic node) pairs, without duplicates
+    """
+    index: TopicIndex[str] = TopicIndex()
+    sub_topics = dict(itertools.chain.from_iterable(format_topic('subtopic', sub) for sub in configs))
+    for sub_topic_id, sub_topic_str in sub_topics.items():
+        index.add(sub_topic_str, sub_topic_id)
+
+    pub_topics = dict(itertools.chain.from_iterable(itertools.chain(format_topic('pubtopic', pub), format_topic('error_pubtopic', pub)) for pub in configs))
+    edges: Dict[Tuple[str, str], None] = {}
+    for pub_topic_id, pub_topic_str in pub_topics.items():
+        for sub_topic_id in index.match(pub_topic_str):
+            if sub_topic_id != pub_topic_id:
+                edges[(pub_topic_id, sub_topic_id)] = None
+    return list(edges)
+
+
 def derived_topics(dot: graphviz.Digraph, configs: List[Dict[str, Union[None, str, List[str]]]]) -> None:  # type: ignore[no-any-unimported]
     """Summary.
 
@@ -96,18 +228,8 @@ def derived_topics(dot: graphviz.Digraph, configs: List[Dict[str, Union[None, st
         dot (graphviz.Digraph): Description
         configs (List[Dict[str, Union[None, str, List[str]]]]): Description
     """
-    for pub in configs:
-        for sub in configs:
-            for pub_topic in itertools.chain(
-                format_topic('pubtopic', pub),
-                format_topic('error_pubtopic', pub),
-            ):
-                for sub_topic in format_topic('subtopic', sub):
-                    if sub_topic[0] == pub_topic[0]:
-                        continue
-
-                    if all(topic_element in pub_topic[1].split('.') for topic_element in sub_topic[1].split('.')):
-                        dot.edge(pub_topic[0], sub_topic[0])
+    for edge in derive_edges(configs):
+        dot.edge(*edge)
 
 
 def components(dot: graphviz.Digraph, configs: List[Dict[str, Union[None, str, List[str]]]]) -> None:  # type: ignore[no-any-unimported]
@@ -28,3 +28,25 @@ class Scope:
     @correlation_id.setter
     def correlation_id(self, value: str):
         self.metadata["correlation_id"] = value
+
+    @property
+    def published(self) -> Optional[float]:
+        """When the message was last published, in seconds since the epoch."""
+        return self.metadata.get("published")
+
+    @published.setter
+    def published(self, value: float):
+        self.metadata["published"] = value
+
+    @property
+    def stream(self) -> bool:
+        """Whether the requester wants to be told when the last reply has been sent, with an end_of_stream message."""
+        return bool(self.metadata.get("stream"))
+
+    @stream.setter
+    def stream(self, value: bool):
+        self.metadata["stream"] = value
+
+    @property
+    def end_of_stream(self) -> bool:
+        return bool(self.metadata.get("end_of_stream"))
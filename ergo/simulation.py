@@ -0,0 +1,257 @@
+"""Summary."""
+import heapq
+import itertools
+import random
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from ergo.amqp_invoker import PREFETCH_COUNT
+from ergo.topology import ConfigDict, Topology, topic_list
+from ergo.util import percentile
+
+DEFAULT_DURATION = 600.0  # simulated seconds
+DEFAULT_SERVICE_TIME = {'distribution': 'exponential', 'mean': 0.01}  # seconds
+MAX_EVENTS = 10**7
+SATURATED_UTILIZATION = 0.99
+
+
+def make_sampler(spec: Dict[str, Any], rng: random.Random) -> Callable[[], float]:
+    """Build a service time sampler from a spec such as {'distribution': 'exponential', 'mean': 0.05}.
+
+    Supported distributions are exponential (mean), constant (value), uniform (low, high) and lognormal (mu, sigma of
+    the underlying normal distribution).
+    """
+    distribution = spec.get('distribution', 'exponential')
+    if distribution == 'exponential':
+        rate = 1 / float(spec['mean'])
+        return lambda: rng.expovariate(rate)
+    if distribution == 'constant':
+        value = float(spec['value'])
+        return lambda: value
+    if distribution == 'uniform':
+        low, high = float(spec['low']), float(spec['high'])
+        return lambda: rng.uniform(low, high)
+    if distribution == 'lognormal':
+        mu, sigma = float(spec['mu']), float(spec['sigma'])
+        return lambda: rng.lognormvariate(mu, sigma)
+    raise ValueError(f'unexpected service time distribution: {distribution}')
+
+
+@dataclass
+class ComponentStats:
+    handled: int = 0
+    throughput: float = 0.0  # messages per second
+    utilization: float = 0.0  # fraction of handler slots busy
+    mean_queue_depth: float = 0.0  # messages queued or prefetched but not yet being handled, averaged over time
+    max_queue_depth: int = 0
+    final_queue_depth: int = 0
+
+
+@dataclass
+class SimulationResult:
+    duration: float
+    components: Dict[str, ComponentStats] = field(default_factory=dict)
+    latency: Dict[str, float] = field(default_factory=dict)  # end-to-end seconds, by percentile name
+    completed: int = 0
+    truncated: bool = False  # whether the simulation stopped at MAX_EVENTS
+
+    @property
+    def bottleneck(self) -> Optional[str]:
+        if not self.components:
+            return None
+        return max(self.components, key=lambda name: self.components[name].utilization)
+
+
+class _Component:
+    """A component's queue and replicas. Each replica prefetches up to `prefetch` messages and handles up to
+    `concurrency` of them at once, as an AmqpInvoker would."""
+
+    def __init__(self, name: str, replicas: int, prefetch: int, concurrency: int, sample: Callable[[], float], yield_ratio: float) -> None:
+        self.name = name
+        self.queue: Deque[float] = deque()  # origin times of messages waiting on the broker
+        self.prefetched = [0] * replicas  # unacknowledged messages held by each replica
+        self.waiting: List[Deque[float]] = [deque() for _ in range(replicas)]  # prefetched, not yet being handled
+        self.busy = [0] * replicas
+        self.prefetch = prefetch
+        self.concurrency = concurrency
+        self.sample = sample
+        self.yield_ratio = yield_ratio
+        self.next_replica = 0
+        self.stats = ComponentStats()
+        self.busy_time = 0.0
+        self.depth_area = 0.0
+        self.depth = 0
+        self._last_change = 0.0
+
+    def depth_changed(self, now: float, delta: int, warmup: float) -> None:
+        start = max(self._last_change, warmup)
+        if now > start:
+            self.depth_area += self.depth * (now - start)
+            # a depth only counts once it has lasted, not when a message passes straight through the queue to a handler
+            self.stats.max_queue_depth = max(self.stats.max_queue_depth, self.depth)
+        self.depth += delta
+        self._last_change = now
+
+
+class Simulation:
+    """
+    Discrete-event simulation of messages flowing through a topology.
+
+    Messages arrive on each ingress topic as a Poisson process. Each is delivered to every component subscribed to its
+    topic; when a component finishes handling one, it publishes `yield_ratio` messages (on average) to its pubtopic. A
+    message's end-to-end latency is measured from its arrival at ingress to the time a component finishes handling a
+    message descended from it that isn't routed any further.
+    """
+
+    def __init__(self, configs: List[ConfigDict], spec: Dict[str, Any]) -> None:
+        self._topology = Topology(configs)
+        self._rng = random.Random(spec.get('seed', 0))
+        self._duration = float(spec.get('duration', DEFAULT_DURATION))
+        self._warmup = float(spec.get('warmup', 0))
+        if self._duration <= 0:
+            raise ValueError(f'duration must be positive, not {self._duration}')
+        if not 0 <= self._warmup < self._duration:
+            raise ValueError(f'warmup must be at least 0 and less than the duration ({self._duration}), not {self._warmup}')
+        self._arrivals: Dict[str, float] = {topic: float(rate) for topic, rate in (spec.get('arrivals') or {}).items()}
+        defaults = spec.get('defaults') or {}
+        self._components: Dict[str, _Component] = {}
+        for name, config in self._topology.configs.items():
+            settings = {**defaults, **(spec.get('components') or {}).get(name, {})}
+            concurrency = int(settings.get('concurrency', config.get('concurrency') or 1))  # type: ignore[arg-type]
+            self._components[name] = _Component(
+                name,
+                replicas=int(settings.get('replicas', 1)),
+                prefetch=int(settings.get('prefetch', max(PREFETCH_COUNT, concurrency))),
+                concurrency=concurrency,
+                sample=make_sampler(settings.get('service_time', DEFAULT_SERVICE_TIME), self._rng),
+                yield_ratio=float(settings.get('yield_ratio', self._topology.yield_ratio(name))),
+            )
+        self._events: List[Tuple[float, int, str, Any]] = []
+        self._sequence = itertools.count()
+        self._latencies: List[float] = []
+
+    def run(self) -> SimulationResult:
+        for topic, rate in self._arrivals.items():
+            if rate > 0:
+                self._schedule(self._rng.expovariate(rate), 'arrival', topic)
+        events = 0
+        truncated = False
+        while self._events:
+            now, _, kind, payload = heapq.heappop(self._events)
+            if now > self._duration:
+                break
+            events += 1
+            if events > MAX_EVENTS:
+                truncated = True
+                break
+            if kind == 'arrival':
+                self._schedule(now + self._rng.expovariate(self._arrivals[payload]), 'arrival', payload)
+                self._publish(now, payload, origin=now)
+            else:
+                self._complete(now, *payload)
+        return self._result(truncated)
+
+    def _schedule(self, at: float, kind: str, payload: Any) -> None:
+        heapq.heappush(self._events, (at, next(self._sequence), kind, payload))
+
+    def _publish(self, now: float, topic: str, origin: float) -> bool:
+        subscribers = self._topology.subscribers(topic)
+        for name in subscribers:
+            component = self._components[name]
+            component.queue.append(origin)
+            component.depth_changed(now, 1, self._warmup)
+            self._dispatch(now, component)
+        return bool(subscribers)
+
+    def _dispatch(self, now: float, component: _Component) -> None:
+        """Deliver queued messages round robin to replicas with prefetch capacity."""
+        replicas = len(component.prefetched)
+        for _ in range(replicas):
+            if not component.queue:
+                break
+            replica = component.next_replica
+            component.next_replica = (replica + 1) % replicas
+            self._prefetch(now, component, replica)
+
+    def _prefetch(self, now: float, component: _Component, replica: int) -> None:
+        while component.queue and component.prefetched[replica] < component.prefetch:
+            component.prefetched[replica] += 1
+            component.waiting[replica].append(component.queue.popleft())
+        while component.waiting[replica] and component.busy[replica] < component.concurrency:
+            component.busy[replica] += 1
+            origin = component.waiting[replica].popleft()
+            component.depth_changed(now, -1, self._warmup)
+            service_time = component.sample()
+            if now >= self._warmup:
+                component.busy_time += min(service_time, self._duration - now)
+            self._schedule(now + service_time, 'complete', (component.name, replica, origin))
+
+    def _complete(self, now: float, name: str, replica: int, origin: float) -> None:
+        component = self._components[name]
+        component.busy[replica] -= 1
+        component.prefetched[replica] -= 1
+        if now >= self._warmup:
+            component.stats.handled += 1
+        outputs = int(component.yield_ratio) + int(self._rng.random() < component.yield_ratio % 1)
+        routed = False
+        for pubtopic in topic_list(self._topology.configs[name], 'pubtopic'):
+            for _ in range(outputs):
+                routed = self._publish(now, pubtopic, origin) or routed
+        if not routed and origin >= self._warmup:
+            self._latencies.append(now - origin)
+        # the replica has room for another message, and a free handler slot
+        self._prefetch(now, component, replica)
+
+    def _result(self, truncated: bool) -> SimulationResult:
+        measured = self._duration - self._warmup
+        result = SimulationResult(duration=measured, truncated=truncated)
+        for name, component in self._components.items():
+            component.depth_changed(self._duration, 0, self._warmup)
+            stats = component.stats
+            stats.throughput = stats.handled / measured
+            stats.utilization = component.busy_time / (measured * len(component.busy) * component.concurrency)
+            stats.mean_queue_depth = component.depth_area / measured
+            stats.final_queue_depth = component.depth
+            result.components[name] = stats
+        latencies = sorted(self._latencies)
+        result.completed = len(latencies)
+        if latencies:
+            result.latency = {
+                'p50': percentile(latencies, 0.5),
+                'p95': percentile(latencies, 0.95),
+                'p99': percentile(latencies, 0.99),
+                'max': latencies[-1],
+            }
+        return result
+
+
+def simulate(configs: List[ConfigDict], spec: Dict[str, Any]) -> SimulationResult:
+    """Summary.
+
+    Args:
+        configs (List[ConfigDict]): component configs, as loaded by schematic.load_configs
+        spec (Dict[str, Any]): arrival rates, and service times, replicas and prefetch by component
+
+    Returns:
+        SimulationResult: Description
+    """
+    return Simulation(configs, spec).run()
+
+
+def format_result(result: SimulationResult) -> str:
+    width = max([len('component'), *(len(name) for name in result.components)])
+    lines = [f'{"component":<{width}}  throughput/s  utilization  mean depth  max depth  final depth']
+    for name, stats in sorted(result.components.items()):
+        saturated = '  saturated' if stats.utilization >= SATURATED_UTILIZATION else ''
+        lines.append(
+            f'{name:<{width}}  {stats.throughput:>12.2f}  {stats.utilization:>11.1%}  {stats.mean_queue_depth:>10.2f}  {stats.max_queue_depth:>9}  {stats.final_queue_depth:>11}{saturated}'
+        )
+    lines.append('')
+    lines.append(f'completed messages: {result.completed}')
+    for name, seconds in result.latency.items():
+        lines.append(f'  {name} latency: {seconds * 1000:.1f} ms')
+    lines.append(f'bottleneck: {result.bottleneck}')
+    if result.truncated:
+        lines.append(f'warning: stopped after {MAX_EVENTS} events, before the end of the simulation')
+    return '\n'.join(lines)
@@ -0,0 +1,91 @@
+"""Summary."""
+import dataclasses
+import datetime
+import sys
+from collections import deque
+from typing import Deque, Generator, List, Optional, TextIO, Tuple
+
+from ergo.amqp_invoker import make_error_output
+from ergo.function_invocable import FunctionInvocable
+from ergo.message import Message, decodes, encodes
+from ergo.topic_index import TopicIndex
+from ergo.util import uniqueid
+
+
+class StackBus:
+    """
+    Route messages between components in a single process, without a broker.
+
+    Each component subscribes with its subtopic and its instance id, using the same any-order key semantics as a topic
+    exchange. Messages are handed to their subscribers in memory without being serialized, in the order they were
+    published. Messages that no component subscribes to, and messages that fail, leave the bus through drain().
+    """
+
+    def __init__(self, invocables: List[FunctionInvocable]) -> None:
+        self._subscriptions: TopicIndex[FunctionInvocable] = TopicIndex()
+        if len(invocables) > 1:
+            # give each component its own instance id, so that replies are only delivered to the requester
+            for invocable in invocables:
+                invocable.config.instance_id = uniqueid()
+        for invocable in invocables:
+            self._subscriptions.add(invocable.config.subtopic, invocable)
+            self._subscriptions.add(invocable.config.instance_id, invocable)
+        self._deliveries: Deque[Tuple[FunctionInvocable, Message]] = deque()
+        self._egress: Deque[Message] = deque()
+
+    def publish(self, message: Message, routing_key: Optional[str] = None) -> None:
+        """Queue a message for each component subscribed to routing_key, which defaults to the message's key."""
+        subscribers = self.subscribers(message.key if routing_key is None else routing_key)
+        if not subscribers:
+            self._egress.append(message)
+        for i, invocable in enumerate(subscribers):
+            self._deliveries.append((invocable, message if i == 0 else fork(message)))
+
+    def subscribers(self, routing_key: Optional[str]) -> List[FunctionInvocable]:
+        # a component receives a message once, even if both of its subscriptions match
+        return list(dict.fromkeys(self._subscriptions.match(routing_key)))
+
+    def drain(self) -> Generator[Message, None, None]:
+        """Deliver queued messages until none are left, yielding each message that leaves the bus."""
+        while self._deliveries or self._egress:
+            while self._egress:
+                yield self._egress.popleft()
+            if self._deliveries:
+                self._handle_message(*self._deliveries.popleft())
+
+    def start(self, stdin: Optional[TextIO] = None, stdout: Optional[TextIO] = None) -> int:
+        """Publish each line of stdin as a message, and write each message that leaves the bus to stdout as a line of
+        JSON.
+
+        Returns:
+            int: Description
+
+        """
+        stdin = stdin or sys.stdin
+        stdout = stdout or sys.stdout
+        for line in stdin:
+            if not line.strip():
+                continue
+            self.publish(decodes(line))
+            for message in self.drain():
+                stdout.write(f'{encodes(message)}\n')
+            stdout.flush()
+        return 0
+
+    def _handle_message(self, invocable: FunctionInvocable, message_in: Message) -> None:
+        try:
+            for message_out in invocable.invoke(message_in):
+                self.publish(message_out)
+        except Exception as err:  # pylint: disable=broad-except
+            dt = datetime.datetime.now(datetime.timezone.utc)
+            message_in.error = make_error_output(err)
+            message_in.scope.metadata['timestamp'] = dt.isoformat()
+            self._egress.append(message_in)
+            if invocable.config.error_pubtopic is not None:
+                self.publish(fork(message_in), invocable.config.error_pubtopic)
+
+
+def fork(message: Message) -> Message:
+    """Copy a message for an additional subscriber, so that handlers don't see each other's changes to its scope."""
+    scope = dataclasses.replace(message.scope, metadata=dict(message.scope.metadata), data=dict(message.scope.data))
+    return dataclasses.replace(message, log=list(message.log), scope=scope)
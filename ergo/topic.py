@@ -1,13 +1,21 @@
 """Summary."""
 from __future__ import annotations
 
-from typing import List, Optional
+from functools import lru_cache
+from typing import FrozenSet, Optional, Tuple
 
 from ergo.key import Key
 
+PARSED_TOPICS_CACHE_SIZE = 4096
+
 
 class Topic:
-    """Summary."""
+    """
+    Summary.
+
+    A topic's keys and canonical string are computed once, so comparing, overlapping and stringifying topics doesn't
+    re-split, re-sort or re-join them.
+    """
 
     def __init__(self, topic_str: Optional[str]):
         """Summary.
@@ -15,24 +23,51 @@ class Topic:
         Args:
             topic_str (str): Description
         """
-        self._keys: List[Key] = []
-        if topic_str:
-            self._keys = [Key(key_str) for key_str in topic_str.split('.')]
+        self._keys, self._sorted_key_strs = parse_topic(topic_str)
+        self._str: Optional[str] = None
 
-    def overlap(self, other: Topic):
-        return set(self._keys) & set(other._keys)
+    @property
+    def keys(self) -> FrozenSet[Key]:
+        """Summary.
 
-    def __str__(self) -> str:
+        Returns:
+            FrozenSet[Key]: Description
+        """
+        return self._keys
+
+    def overlap(self, other: Topic) -> FrozenSet[Key]:
+        return self._keys & other._keys
+
+    def _format(self, sorted_key_strs: Tuple[str, ...]) -> str:
         """Summary.
 
+        Args:
+            sorted_key_strs (Tuple[str, ...]): Description
+
         Returns:
             str: Description
         """
         ret = '#'
-        if self._keys:
-            ret = '#.%s.#' % '.#.'.join(sorted([str(key) for key in self._keys]))
+        if sorted_key_strs:
+            ret = '#.%s.#' % '.#.'.join(sorted_key_strs)
         return ret
 
+    def __str__(self) -> str:
+        """Summary.
+
+        Returns:
+            str: Description
+        """
+        if self._str is None:
+            self._str = self._format(self._sorted_key_strs)
+        return self._str
+
+    def __eq__(self, other: object) -> bool:
+        return type(self) is type(other) and str(self) == str(other)
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
 
 class SubTopic(Topic):
     """Summary."""
@@ -41,11 +76,28 @@ class SubTopic(Topic):
 class PubTopic(Topic):
     """Summary."""
 
-    def __str__(self) -> str:
+    def _format(self, sorted_key_strs: Tuple[str, ...]) -> str:
         """Summary.
 
+        Args:
+            sorted_key_strs (Tuple[str, ...]): Description
+
         Returns:
             str: Description
         """
-        ret = '.'.join(sorted([str(key) for key in self._keys]))
+        ret = '.'.join(sorted_key_strs)
         return ret
+
+
+@lru_cache(maxsize=PARSED_TOPICS_CACHE_SIZE)
+def parse_topic(topic_str: Optional[str]) -> Tuple[FrozenSet[Key], Tuple[str, ...]]:
+    """Split a topic string into its set of keys, and its key strings in canonical (sorted) order.
+
+    Args:
+        topic_str (Optional[str]): Description
+
+    Returns:
+        Tuple[FrozenSet[Key], Tuple[str, ...]]: Description
+    """
+    key_strs = topic_str.split('.') if topic_str else []
+    return frozenset(Key(key_str) for key_str in key_strs), tuple(sorted(key_strs))
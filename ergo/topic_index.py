@@ -0,0 +1,87 @@
+"""Summary."""
+import itertools
+from typing import Dict, FrozenSet, Generic, List, Set, Tuple, TypeVar, Union
+
+from ergo.key import Key
+from ergo.topic import PubTopic, SubTopic, Topic
+
+T = TypeVar('T')
+
+
+class TopicIndex(Generic[T]):
+    """
+    Find every subscription that matches a published topic.
+
+    A subscription matches when all of its keys appear in the published topic, in any order, which is how a SubTopic's
+    binding ('#.a.#.b.#') matches a PubTopic's routing key on the exchange. Subscriptions are kept in an inverted index
+    from key to subscription, along with the number of keys each subscription requires, so a lookup only visits
+    subscriptions that share a key with the published topic instead of every subscription.
+    """
+
+    def __init__(self) -> None:
+        self._ids = itertools.count()
+        self._subscriptions: Dict[int, Tuple[FrozenSet[Key], T]] = {}
+        self._postings: Dict[Key, Set[int]] = {}
+        self._wildcards: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def add(self, subtopic: Union[str, Topic, None], subscriber: T) -> int:
+        """Subscribe subscriber to subtopic.
+
+        Args:
+            subtopic (Union[str, Topic, None]): a SubTopic, or a string to construct one from
+            subscriber (T): returned by match() for every matching topic
+
+        Returns:
+            int: subscription id, to pass to remove()
+        """
+        keys = as_topic(subtopic, SubTopic).keys
+        subscription_id = next(self._ids)
+        self._subscriptions[subscription_id] = (keys, subscriber)
+        if not keys:
+            # an empty subtopic ('#') matches every topic
+            self._wildcards.add(subscription_id)
+        for key in keys:
+            self._postings.setdefault(key, set()).add(subscription_id)
+        return subscription_id
+
+    def remove(self, subscription_id: int) -> None:
+        """Summary.
+
+        Args:
+            subscription_id (int): returned by add()
+        """
+        keys, _ = self._subscriptions.pop(subscription_id)
+        self._wildcards.discard(subscription_id)
+        for key in keys:
+            subscription_ids = self._postings[key]
+            subscription_ids.discard(subscription_id)
+            if not subscription_ids:
+                del self._postings[key]
+
+    def match(self, pubtopic: Union[str, Topic, None]) -> List[T]:
+        """Return the subscribers of every subscription matching pubtopic, in the order they subscribed.
+
+        Args:
+            pubtopic (Union[str, Topic, None]): a PubTopic, or a string to construct one from
+
+        Returns:
+            List[T]: Description
+        """
+        matched_keys: Dict[int, int] = {}
+        for key in as_topic(pubtopic, PubTopic).keys:
+            for subscription_id in self._postings.get(key, ()):
+                matched_keys[subscription_id] = matched_keys.get(subscription_id, 0) + 1
+        subscriptions = self._subscriptions
+        matches = [subscription_id for subscription_id, count in matched_keys.items() if count == len(subscriptions[subscription_id][0])]
+        matches.extend(self._wildcards)
+        return [subscriptions[subscription_id][1] for subscription_id in sorted(matches)]
+
+
+def as_topic(topic: Union[str, Topic, None], topic_class: type) -> Topic:
+    if isinstance(topic, Topic):
+        return topic
+    ret: Topic = topic_class(topic)
+    return ret
@@ -0,0 +1,185 @@
+"""Summary."""
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Set, Tuple, Union
+
+from ergo.topic_index import TopicIndex
+
+ConfigDict = Dict[str, Union[None, str, List[str]]]
+
+DEFAULT_YIELD_RATIO = 1.0
+
+
+def topic_list(config: ConfigDict, typestr: str) -> List[str]:
+    """Summary.
+
+    Args:
+        config (ConfigDict): Description
+        typestr (str): 'subtopic', 'pubtopic' or 'error_pubtopic'
+
+    Returns:
+        List[str]: Description
+    """
+    tlist = config.get(typestr) or []
+    if isinstance(tlist, str):
+        tlist = [tlist]
+    return tlist
+
+
+@dataclass(frozen=True)
+class Edge:
+    source: str
+    target: str
+    topic: str
+    error: bool = False
+
+
+class Topology:
+    """
+    Component level view of a set of configs, as loaded by schematic.load_configs.
+
+    There is an edge from one component to another for each of the first's pubtopics (or error_pubtopics) that
+    matches one of the second's subtopics.
+    """
+
+    def __init__(self, configs: List[ConfigDict]) -> None:
+        self.configs: Dict[str, ConfigDict] = {str(config['name']): config for config in configs}
+        self._subscribers: TopicIndex[str] = TopicIndex()
+        for name, config in self.configs.items():
+            for subtopic in topic_list(config, 'subtopic'):
+                self._subscribers.add(subtopic, name)
+        self.edges: Dict[str, List[Edge]] = {name: list(self._derive_edges(name)) for name in self.configs}
+
+    def subscribers(self, topic: str) -> List[str]:
+        """Return the components that receive messages published to topic, each of them once."""
+        return list(dict.fromkeys(self._subscribers.match(topic)))
+
+    def yield_ratio(self, name: str) -> float:
+        """The number of messages a component is declared to publish for each message it handles."""
+        return float(self.configs[name].get('yield_ratio') or DEFAULT_YIELD_RATIO)  # type: ignore[arg-type]
+
+    def _derive_edges(self, name: str) -> Iterator[Edge]:
+        config = self.configs[name]
+        for typestr, error in (('pubtopic', False), ('error_pubtopic', True)):
+            for topic in topic_list(config, typestr):
+                for subscriber in self.subscribers(topic):
+                    yield Edge(name, subscriber, topic, error)
+
+    def strongly_connected_components(self) -> List[List[str]]:
+        """Tarjan's algorithm, without recursion so that long chains of components don't overflow the stack.
+
+        Returns:
+            List[List[str]]: components grouped by strongly connected component, downstream groups first
+        """
+        index: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        stack: List[str] = []
+        on_stack: Set[str] = set()
+        groups: List[List[str]] = []
+        for root in self.configs:
+            if root in index:
+                continue
+            work: List[Tuple[str, Iterator[Edge]]] = [(root, iter(self.edges[root]))]
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, edges = work[-1]
+                for edge in edges:
+                    if edge.target not in index:
+                        index[edge.target] = lowlink[edge.target] = len(index)
+                        stack.append(edge.target)
+                        on_stack.add(edge.target)
+                        work.append((edge.target, iter(self.edges[edge.target])))
+                        break
+                    if edge.target in on_stack:
+                        lowlink[node] = min(lowlink[node], index[edge.target])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] == index[node]:
+                        group = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            group.append(member)
+                            if member == node:
+                                break
+                        groups.append(group)
+        return groups
+
+
+@dataclass
+class Cycle:
+    components: List[str]
+    error: bool  # whether the cycle passes through an error_pubtopic
+
+
+@dataclass
+class TopologyAnalysis:
+    fan_in: Dict[str, int] = field(default_factory=dict)
+    fan_out: Dict[str, int] = field(default_factory=dict)
+    cycles: List[Cycle] = field(default_factory=list)
+    amplification: Dict[str, float] = field(default_factory=dict)
+
+
+def analyze(configs: List[ConfigDict]) -> TopologyAnalysis:
+    """
+    Compute each component's fan-in and fan-out, find cycles, and estimate the worst-case amplification of a message
+    published to each subscribed topic.
+
+    Amplification counts the handler invocations that one inbound message can cause, assuming each component publishes
+    its `yield_ratio` messages for every message it handles, and also publishes to its error_pubtopic. A topic whose
+    messages can reach a cycle has unbounded (infinite) amplification.
+    """
+    topology = Topology(configs)
+    ret = TopologyAnalysis()
+    upstream: Dict[str, Set[str]] = {name: set() for name in topology.configs}
+    for name, edges in topology.edges.items():
+        ret.fan_out[name] = len({edge.target for edge in edges})
+        for edge in edges:
+            upstream[edge.target].add(name)
+    ret.fan_in = {name: len(sources) for name, sources in upstream.items()}
+
+    # invocations[c] is the number of handler invocations caused by delivering one message to c, including its own
+    invocations: Dict[str, float] = {}
+    for group in topology.strongly_connected_components():
+        members = set(group)
+        internal = [edge for name in group for edge in topology.edges[name] if edge.target in members]
+        if internal:
+            ret.cycles.append(Cycle(sorted(group), any(edge.error for edge in internal)))
+            for name in group:
+                invocations[name] = math.inf
+            continue
+        name = group[0]
+        total = 1.0
+        for edge in topology.edges[name]:
+            ratio = 1.0 if edge.error else topology.yield_ratio(name)
+            if ratio:
+                total += ratio * invocations[edge.target]
+        invocations[name] = total
+
+    subtopics = dict.fromkeys(topic for config in topology.configs.values() for topic in topic_list(config, 'subtopic'))
+    for topic in subtopics:
+        ret.amplification[topic] = sum(invocations[name] for name in topology.subscribers(topic))
+    return ret
+
+
+def format_analysis(analysis: TopologyAnalysis) -> str:
+    width = max([len('component'), *(len(name) for name in analysis.fan_in)])
+    lines = [f'{"component":<{width}}  fan-in  fan-out']
+    for name in sorted(analysis.fan_in):
+        lines.append(f'{name:<{width}}  {analysis.fan_in[name]:>6}  {analysis.fan_out[name]:>7}')
+    lines.append('')
+    lines.append(f'cycles: {len(analysis.cycles)}')
+    for cycle in analysis.cycles:
+        via_error = ' (through an error_pubtopic)' if cycle.error else ''
+        lines.append(f'  {", ".join(cycle.components)}{via_error}')
+    lines.append('')
+    lines.append('worst-case amplification by inbound topic')
+    width = max([0, *(len(topic) for topic in analysis.amplification)])
+    for topic, amplification in sorted(analysis.amplification.items(), key=lambda item: (-item[1], item[0])):
+        lines.append(f'  {topic:<{width}}  {amplification:g}')
+    return '\n'.join(lines)
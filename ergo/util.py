@@ -1,4 +1,5 @@
 """Convenience Funcs for handling errors, logging, and monitoring."""
+import math
 import re
 import signal
 import sys
@@ -7,7 +8,7 @@ import time
 import traceback
 from functools import lru_cache
 from types import FrameType, TracebackType
-from typing import List, Optional, Tuple
+from typing import List, Optional, Sequence, Tuple
 from uuid import uuid4
 
 if sys.version_info >= (3, 8):
@@ -58,6 +59,22 @@ def timestamp() -> float:
     return time.time()
 
 
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence.
+
+    Args:
+        sorted_values (Sequence[float]): Description
+        fraction (float): e.g. 0.95 for the 95th percentile
+
+    Returns:
+        float: Description
+    """
+    if not sorted_values:
+        return float('nan')
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
 def get_stack() -> List[FrameType]:
     """Summary.
 
@@ -0,0 +1,119 @@
+"""Run a server in several worker processes that share one listening address."""
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import socket
+import time
+from typing import Callable, Dict, Optional
+
+from ergo.util import instance_id
+
+BACKLOG = 1024
+RESTART_DELAY = 1.0  # seconds; keeps a worker that fails on startup from restarting in a tight loop
+SHUTDOWN_TIMEOUT = 30.0  # seconds
+
+logger = logging.getLogger(__name__)
+
+
+def bind_socket(host: str, port: int, reuse_port: bool = False) -> socket.socket:
+    """Open a listening TCP socket.
+
+    With reuse_port, every worker binds its own socket to the same address and the kernel spreads incoming connections
+    across them, rather than waking every worker to race for each connection on one shared socket.
+
+    Args:
+        host (str): Description
+        port (int): Description
+        reuse_port (bool): set SO_REUSEPORT; raises ValueError on platforms without it
+
+    Returns:
+        socket.socket: Description
+    """
+    if reuse_port and not hasattr(socket, 'SO_REUSEPORT'):
+        raise ValueError('multiple workers require SO_REUSEPORT, which this platform does not support')
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)  # pylint: disable=no-member
+        sock.bind((host, port))
+        sock.listen(BACKLOG)
+        sock.set_inheritable(True)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class Supervisor:
+    """
+    Fork `workers` processes that each run target(worker_index), and restart any that exit until the supervisor is
+    asked to stop with SIGINT or SIGTERM, which it forwards to the workers.
+
+    Workers are forked rather than spawned so that target may close over objects that can't be pickled, such as an
+    injected handler. Each worker gets its own instance_id.
+    """
+
+    def __init__(self, target: Callable[[int], None], workers: int) -> None:
+        self._target = target
+        self._workers = workers
+        self._context = multiprocessing.get_context('fork')
+        self._processes: Dict[int, multiprocessing.process.BaseProcess] = {}
+        self._stopping = False
+
+    def run(self) -> int:
+        """Summary.
+
+        Returns:
+            int: Description
+        """
+        previous_handlers = {signum: signal.signal(signum, self._stop) for signum in (signal.SIGINT, signal.SIGTERM)}
+        try:
+            for index in range(self._workers):
+                self._start_worker(index)
+            while not self._stopping:
+                exited = multiprocessing.connection.wait([process.sentinel for process in self._processes.values()], timeout=RESTART_DELAY)
+                for index, process in list(self._processes.items()):
+                    if process.sentinel not in exited:
+                        continue
+                    process.join()
+                    if self._stopping:
+                        break
+                    logger.warning('worker %d (pid %s) exited with %s; restarting', index, process.pid, process.exitcode)
+                    time.sleep(RESTART_DELAY)
+                    self._start_worker(index)
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+            self._shutdown()
+        return 0
+
+    def _start_worker(self, index: int) -> None:
+        process = self._context.Process(target=self._run_worker, args=(index,), daemon=False)
+        process.start()
+        self._processes[index] = process
+
+    def _run_worker(self, index: int) -> None:
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, signal.SIG_DFL)
+        instance_id.cache_clear()  # the forked cache holds the supervisor's id
+        self._target(index)
+
+    def _stop(self, signum: int, _: Optional[object]) -> None:
+        self._stopping = True
+        for process in self._processes.values():
+            if process.is_alive() and process.pid:
+                os.kill(process.pid, signum)
+
+    def _shutdown(self) -> None:
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self._processes.values():
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                process.kill()
+                process.join()
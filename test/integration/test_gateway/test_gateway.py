@@ -1,3 +1,4 @@
+import json
 from functools import partial
 from multiprocessing.pool import ThreadPool
 from test.integration.utils.amqp import AMQPComponent, await_components, propagate_errors
@@ -92,3 +93,55 @@ def test_yield_twice(http_session):
     await_components()
     response = http_session.get("http://localhost/yield_twice")
     assert response.json()["data"] == 1
+
+
+"""
+test_stream
+
+Assert that a gateway request that accepts NDJSON receives every item yielded, and that the stream ends once the
+generator is exhausted or fails.
+"""
+
+
+def yield_then_fail():
+    yield 1
+    raise ValueError("failed")
+
+
+@HTTPGateway()
+@AMQPComponent(yield_twice, subtopic="yield_twice")
+def test_stream(http_session):
+    await_components()
+    response = http_session.get("http://localhost/yield_twice", headers={"Accept": "application/x-ndjson"}, stream=True)
+    assert response.ok
+    assert [json.loads(line)["data"] for line in response.iter_lines() if line] == [1, 2]
+
+
+@HTTPGateway()
+@AMQPComponent(yield_then_fail, subtopic="yield_then_fail")
+def test_stream_error(http_session):
+    await_components()
+    response = http_session.get("http://localhost/yield_then_fail", headers={"Accept": "application/x-ndjson"}, stream=True)
+    messages = [json.loads(line) for line in response.iter_lines() if line]
+    assert messages[0]["data"] == 1
+    assert messages[-1]["error"]["message"] == "failed"
+
+
+"""
+test_batch
+
+Assert that a batch request returns each request's reply in order, with errors in place of the replies to requests that
+fail.
+"""
+
+
+@HTTPGateway()
+@AMQPComponent(product, subtopic="product")
+def test_batch(http_session):
+    await_components()
+    batch = [{"topic": "product", "args": {"x": x, "y": 2}} for x in range(20)] + [{"args": {}}]
+    response = http_session.post("http://localhost/_ergo/batch", json=batch)
+    assert response.ok
+    replies = response.json()
+    assert [reply["data"] for reply in replies[:-1]] == [x * 2.0 for x in range(20)]
+    assert replies[-1]["error"]["type"] == "ValueError"
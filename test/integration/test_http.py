@@ -1,4 +1,5 @@
 import inspect
+import json
 from test.integration.utils.http import HTTPComponent
 
 import pytest
@@ -76,3 +77,22 @@ def test_return_data(getter, http_session):
             actual = response["data"]
 
         assert actual == expected
+
+
+@pytest.mark.parametrize("getter", [
+    return_dict,
+    yield_two_dicts,
+])
+def test_stream_data(getter, http_session):
+    """assert that clients accepting NDJSON receive one message per line"""
+    with HTTPComponent(getter):
+        resp = http_session.get("http://localhost", headers={"Accept": "application/x-ndjson"}, stream=True)
+        assert resp.ok
+        assert resp.headers["Content-Type"].startswith("application/x-ndjson")
+        actual = [json.loads(line)["data"] for line in resp.iter_lines() if line]
+        if inspect.isgeneratorfunction(getter):
+            expected = [i for i in getter()]
+        else:
+            expected = [getter()]
+
+        assert actual == expected
@@ -0,0 +1,44 @@
+import os
+import threading
+
+import kombu
+
+from ergo.amqp_invoker import AmqpInvoker
+from ergo.config import Config
+from ergo.function_invocable import FunctionInvocable
+from ergo.message import Message, encodes
+from ergo.metrics import ComponentMetrics
+from ergo.util import uniqueid
+
+HANDLERS = 12  # more than kombu's default pool limit of 10
+barrier = threading.Barrier(HANDLERS, timeout=5)
+
+
+def gather():
+    barrier.wait()
+    return "gathered"
+
+
+def test_concurrency():
+    """assert that as many handlers run at once as the component's concurrency allows, each publishing on its own
+    producer"""
+    exchange_name = f"test-{uniqueid()}"
+    config = Config({
+        "func": f"{os.path.abspath(__file__)}:gather",
+        "exchange": exchange_name,
+        "subtopic": f"{exchange_name}.in",
+        "pubtopic": f"{exchange_name}.out",
+        "concurrency": HANDLERS,
+    })
+    invoker = AmqpInvoker(FunctionInvocable(config), kombu.Connection("memory://"))
+    metrics = ComponentMetrics(invoker._component_queue.name)
+    errored, acked = metrics.errored.value, metrics.acked.value
+    body = encodes(Message(data=None))
+    threads = [threading.Thread(target=invoker._handle_message, args=(body, lambda: None)) for _ in range(HANDLERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert not any(thread.is_alive() for thread in threads)
+    assert metrics.errored.value == errored
+    assert metrics.acked.value == acked + HANDLERS
@@ -0,0 +1,20 @@
+import json
+import tempfile
+
+from ergo.bench import correct_for_coordinated_omission, samples, summarize
+
+
+def test_correct_for_coordinated_omission():
+    """assert that a stall is counted against the requests a closed loop would have sent during it"""
+    assert sorted(correct_for_coordinated_omission([1.0, 5.0], expected_interval=1.0)) == [1.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+    assert correct_for_coordinated_omission([0.01, 0.05], expected_interval=0) == [0.01, 0.05]
+    assert summarize(range(1, 1001))["p99"] == 990
+
+
+def test_samples():
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".ndjson") as fh:
+        fh.write(json.dumps({"x": 1}) + "\n\n" + json.dumps({"x": 2}) + "\n")
+        fh.flush()
+        params = samples(fh.name)
+        assert [next(params)["x"] for _ in range(3)] == [1, 2, 1]
+    assert next(samples(None, {"y": 3})) == {"y": 3}
@@ -1,6 +1,9 @@
+import os
 import tempfile
+
 import yaml
-from ergo.ergo_cli import load_config
+
+from ergo.ergo_cli import load_component_configs, load_config
 
 
 def test_load_config():
@@ -30,3 +33,30 @@ def test_load_config():
                 assert config.func == "my_handler.py"
                 assert config.host == "override_host"
                 assert config.protocol == "default_protocol"
+
+
+def test_load_component_configs():
+    """
+    Assert that a host manifest expands to one config per component, and that namespaces given on the command line
+    apply to each of them.
+    """
+    with tempfile.TemporaryDirectory() as root:
+        files = {
+            "a.yml": {"func": "a.py:a", "subtopic": "a"},
+            "b.yml": {"func": "b.py:b", "subtopic": "b", "concurrency": 4},
+            "host.yml": {"components": ["a.yml", "b.yml"]},
+            "namespace.yml": {"protocol": "amqp", "host": "namespace_host"},
+        }
+        for name, data in files.items():
+            with open(os.path.join(root, name), "w") as fh:
+                fh.write(yaml.dump(data))
+
+        configs = load_component_configs(os.path.join(root, "host.yml"), os.path.join(root, "namespace.yml"))
+
+        assert [config.func for config in configs] == ["a.py:a", "b.py:b"]
+        assert all(config.host == "namespace_host" for config in configs)
+        assert [config.concurrency for config in configs] == [1, 4]
+
+        configs = load_component_configs(os.path.join(root, "a.yml"), os.path.join(root, "namespace.yml"))
+        assert len(configs) == 1
+        assert configs[0].protocol == "amqp"
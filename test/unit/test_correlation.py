@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from ergo.correlation import CorrelationTable, StreamOverflow
+
+
+def test_resolve():
+    async def rpc():
+        table: CorrelationTable[str] = CorrelationTable()
+        reply = table.register("a", timeout=1)
+        assert table.resolve("a", "reply")
+        assert await reply == "reply"
+        table.discard("a")
+        assert len(table) == 0
+        assert not table.resolve("a", "duplicate")
+        return table.stats()
+
+    assert asyncio.run(rpc()) == {"pending": 0, "resolved": 1, "late": 0, "unknown": 1, "swept": 0, "overflowed": 0}
+
+
+def test_timeout():
+    """assert that a reply to a request that timed out is counted as late, and doesn't linger in the table"""
+    async def rpc():
+        table: CorrelationTable[str] = CorrelationTable()
+        reply = table.register("a", timeout=0.01)
+        with pytest.raises(asyncio.TimeoutError):
+            try:
+                await asyncio.wait_for(reply, timeout=0.01)
+            finally:
+                table.discard("a")
+        assert not table.resolve("a", "reply")
+        return table.stats()
+
+    assert asyncio.run(rpc()) == {"pending": 0, "resolved": 0, "late": 1, "unknown": 0, "swept": 0, "overflowed": 0}
+
+
+def test_sweep():
+    """assert that registrations past their deadline are swept even if their caller never discards them, and that
+    expired correlation ids are eventually forgotten"""
+    async def rpc():
+        table: CorrelationTable[str] = CorrelationTable(expired_ttl=0.01)
+        reply = table.register("a", timeout=0.01)
+        table.register("b", timeout=60)
+        await asyncio.sleep(0.02)
+        table.sweep()
+        assert isinstance(reply.exception(), asyncio.TimeoutError)
+        assert "a" not in table and "b" in table
+        assert not table.resolve("a", "reply")
+        await asyncio.sleep(0.02)
+        table.sweep()
+        assert not table.resolve("a", "reply")
+        return table.stats()
+
+    assert asyncio.run(rpc()) == {"pending": 1, "resolved": 0, "late": 1, "unknown": 1, "swept": 1, "overflowed": 0}
+
+
+def test_sweep_while_waiting():
+    """assert that a caller waiting on a registration that's swept times out, rather than being cancelled"""
+    async def rpc():
+        table: CorrelationTable[str] = CorrelationTable()
+        reply = table.register("a", timeout=0.01)
+        replies = table.register_stream("b", idle_timeout=0.01, max_buffered=1)
+
+        async def sweep():
+            await asyncio.sleep(0.02)
+            table.sweep()
+
+        sweeper = asyncio.ensure_future(sweep())
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(reply, timeout=60)
+        assert isinstance(await asyncio.wait_for(replies.get(), timeout=60), asyncio.TimeoutError)
+        await sweeper
+        table.discard("a")
+        return table.stats()
+
+    assert asyncio.run(rpc()) == {"pending": 0, "resolved": 0, "late": 0, "unknown": 0, "swept": 2, "overflowed": 0}
+
+
+def test_stream():
+    """assert that stream replies are queued in order, and that a stream whose reader falls behind is cut off"""
+    async def rpc():
+        table: CorrelationTable[int] = CorrelationTable()
+        replies = table.register_stream("a", idle_timeout=1, max_buffered=2)
+        for i in range(3):
+            assert table.resolve("a", i)
+        assert [replies.get_nowait() for _ in range(2)] == [0, 1]
+        assert isinstance(replies.get_nowait(), StreamOverflow)
+        assert "a" not in table
+        assert not table.resolve("a", 3)
+        return table.stats()
+
+    assert asyncio.run(rpc()) == {"pending": 0, "resolved": 3, "late": 1, "unknown": 0, "swept": 0, "overflowed": 1}
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from ergo.fairness import ClientPolicy, FairQueue
+from ergo.limiter import AdaptiveLimiter, Overloaded
+
+
+def test_rate_limit():
+    policy = ClientPolicy({"header": "X-Api-Key", "rate": 1, "burst": 2, "overrides": {"vip": {"rate": 100, "burst": 100}}})
+    client = policy.client({}, "10.0.0.1")
+    assert [client.take() == 0 for _ in range(3)] == [True, True, False]
+    assert 0 < client.take() <= 1
+    vip = policy.client({"X-Api-Key": "vip"}, "10.0.0.1")
+    assert vip.identity.startswith("key:") and "vip" not in vip.identity
+    assert all(vip.take() == 0 for _ in range(3))
+    assert policy.stats()["10.0.0.1"]["throttled"] == 2
+
+
+
+@pytest.mark.parametrize("config", [{"rate": 0}, {"burst": 0.5}, {"weight": 0}, {"overrides": {"a": {"weight": -1}}}])
+def test_invalid_settings(config):
+    with pytest.raises(ValueError):
+        ClientPolicy(config)
+
+def test_fair_queue_serves_clients_in_turn():
+    """assert that a client with many requests waiting doesn't keep a client with a few from its turns"""
+
+    async def main():
+        policy = ClientPolicy({"header": "X-Api-Key", "overrides": {"b": {"weight": 2}}})
+        noisy, quiet = policy.client({"X-Api-Key": "a"}, None), policy.client({"X-Api-Key": "b"}, None)
+        queue = FairQueue(AdaptiveLimiter(max_limit=1, initial_limit=1))
+        order = []
+        release = asyncio.Event()
+
+        async def request(client, name):
+            async with queue.admit(client, sample=False):
+                order.append(name)
+                await release.wait()
+                release.clear()
+
+        tasks = [asyncio.ensure_future(request(noisy, "a")) for _ in range(6)]
+        await asyncio.sleep(0)
+        tasks += [asyncio.ensure_future(request(quiet, "b")) for _ in range(4)]
+        while len(order) < len(tasks):
+            await asyncio.sleep(0)
+            release.set()
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        return "".join(order)
+
+    # the first request takes the free slot, then b gets two turns for each of a's while both have requests waiting
+    assert asyncio.run(main()) == "aabbabbaaa"
+
+
+def test_fair_queue_sheds_after_timeout():
+    async def main():
+        client = ClientPolicy({}).client({}, "10.0.0.1")
+        queue = FairQueue(AdaptiveLimiter(max_limit=1, initial_limit=1), timeout=0.01)
+        async with queue.admit(client):
+            with pytest.raises(Overloaded):
+                async with queue.admit(client):
+                    pass
+        assert queue.stats()["queue_timeouts"] == 1
+        assert queue.stats()["queued"] == 0
+        async with queue.admit(client):
+            pass
+
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+import json
+
+from ergo.config import Config
+from ergo.flask_http_invoker import FlaskHttpInvoker
+from ergo.function_invocable import FunctionInvocable
+from ergo.metrics import ComponentMetrics
+
+
+def product(x, y):
+    return float(x) * float(y)
+
+
+def count(n):
+    yield from range(int(n))
+
+
+def make_client(handler="product", **manifest):
+    invoker = FlaskHttpInvoker(FunctionInvocable(Config({"func": f"{__file__}:{handler}", **manifest})))
+    return invoker.create_app().test_client()
+
+
+def test_json_body():
+    """assert that the members of a JSON object body are bound alongside, and take precedence over, query parameters"""
+    client = make_client()
+    assert json.loads(client.get("/?x=4&y=5").data)["data"] == 20.0
+    assert json.loads(client.post("/?x=4&y=5", json={"y": 2}).data)["data"] == 8.0
+    assert json.loads(client.post("/", json={"x": 3, "y": 2}).data)["data"] == 6.0
+    assert client.post("/", json=[3, 2]).status_code == 400
+
+
+def test_metrics():
+    metrics = ComponentMetrics(f"{__file__}:product")
+    consumed, errored = metrics.consumed.value, metrics.errored.value
+    client = make_client()
+    client.get("/?x=4&y=5")
+    client.get("/?x=4")
+    assert metrics.consumed.value == consumed + 2
+    assert metrics.errored.value == errored + 1
+    assert metrics.in_flight.value == 0
+
+
+def test_stream_metrics():
+    """assert that a streamed response counts as in flight until the stream has been read"""
+    metrics = ComponentMetrics(f"{__file__}:count")
+    consumed = metrics.consumed.value
+    response = make_client("count").get("/?n=3", headers={"Accept": "application/x-ndjson"}, buffered=False)
+    chunks = iter(response.response)
+    next(chunks)
+    assert metrics.in_flight.value == 1
+    assert len(list(chunks)) == 2
+    response.close()
+    assert metrics.consumed.value == consumed + 1
+    assert metrics.in_flight.value == 0
@@ -0,0 +1,30 @@
+from ergo.hedging import MAX_BURST, MIN_SAMPLES, HedgePolicy
+
+
+def test_delay_is_topic_percentile():
+    policy = HedgePolicy(percentile=0.95)
+    for i in range(1, MIN_SAMPLES):
+        policy.record("a", i / 100)
+    assert policy.delay("a") is None
+    policy.record("a", MIN_SAMPLES / 100)
+    assert policy.delay("a") == 0.19
+    assert policy.delay("b") is None
+
+
+def test_budget():
+    policy = HedgePolicy(budget=0.05)
+    for _ in range(100):
+        policy.record("a", 0.01)
+    assert sum(policy.spend() for _ in range(10)) == 5
+    assert policy.stats()["over_budget"] == 5
+
+
+def test_budget_does_not_accumulate():
+    """assert that a long spell without hedging saves up no more than a small burst of hedges"""
+    policy = HedgePolicy(budget=0.05)
+    for _ in range(100000):
+        policy.record("a", 0.01)
+    assert sum(policy.spend() for _ in range(1000)) == MAX_BURST
+    for _ in range(100):
+        policy.record("a", 0.01)
+    assert sum(policy.spend() for _ in range(10)) == 5
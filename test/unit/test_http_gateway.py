@@ -0,0 +1,353 @@
+import asyncio
+import json
+
+from ergo import http_gateway
+from ergo.config import Config
+from ergo.fairness import Client, ClientSettings
+from ergo.hedging import MIN_SAMPLES
+from ergo.http_gateway import MAX_TOPIC_ADMISSIONS, PORT, THREADED_DECODE_BYTES, HttpGatewayServer
+from ergo.message import Message, encodes, peek
+from ergo.scope import Scope
+
+
+def make_gateway(**config):
+    return HttpGatewayServer(Config(config))
+
+
+def test_batch_timeout():
+    """assert that a batch's timeout must be a positive number, and is clamped to each request's route timeout"""
+    gateway = make_gateway(routes={"slow": {"timeout": 0.01}})
+    timeouts = []
+
+    async def rpc(topic, data, client, timeout=None):
+        timeouts.append(timeout)
+        return peek(encodes(Message(data=topic)).encode("utf-8"))
+
+    gateway._rpc = rpc
+
+    async def requests():
+        client = gateway.create_app().test_client()
+        for timeout in ("soon", "0", "-1", "inf", "nan"):
+            response = await client.post(f"/_ergo/batch?timeout={timeout}", json=[{"topic": "a"}])
+            assert response.status_code == 400, timeout
+        response = await client.post("/_ergo/batch?timeout=5", json=[{"topic": "a"}, {"topic": "slow"}])
+        assert [reply["data"] for reply in await response.get_json()] == ["a", "slow"]
+
+    asyncio.run(requests())
+    assert timeouts == [5.0, 0.01]
+
+
+def test_workers(monkeypatch):
+    """assert that a gateway with several workers runs them under a Supervisor, each binding the port with
+    SO_REUSEPORT"""
+    supervised = []
+
+    class Supervisor:
+        def __init__(self, target, workers):
+            supervised.append((target, workers))
+
+        def run(self):
+            return 0
+
+    monkeypatch.setattr(http_gateway, "Supervisor", Supervisor)
+    gateway = make_gateway(workers=3)
+    assert gateway.run() == 0
+    assert supervised == [(gateway.serve, 3)]
+
+    bound = []
+
+    class Socket:
+        def detach(self):
+            return 7
+
+    async def serve(app, config):
+        assert config.bind == ["fd://7"]
+
+    monkeypatch.setattr(http_gateway, "bind_socket", lambda *args, **kwargs: bound.append((args, kwargs)) or Socket())
+    monkeypatch.setattr(http_gateway.hypercorn.asyncio, "serve", serve)
+    asyncio.run(gateway._run_server())
+    assert bound == [(("0.0.0.0", PORT), {"reuse_port": True})]
+
+
+def test_topic_limits():
+    """assert that topics without a configured limit each have their own, starting at the most requests in flight"""
+    gateway = make_gateway(routes={"limited": {"limit": 10}})
+    client = Client("a", ClientSettings(rate=1000, burst=1000, weight=1))
+
+    async def admit(topic, requests):
+        settings = gateway._routes.match(topic)
+        release = asyncio.Event()
+
+        async def request():
+            async with gateway._admission(topic, settings).admit(client):
+                await release.wait()
+
+        tasks = [asyncio.ensure_future(request()) for _ in range(requests)]
+        await asyncio.sleep(0)
+        return release, tasks
+
+    async def requests():
+        release, tasks = await admit("a", 1000)
+        assert gateway.stats()["topic_limit"]["a"]["in_flight"] == 1000
+        assert gateway._admission("b", gateway._routes.match("b")).limiter.in_flight == 0
+        release.set()
+        await asyncio.gather(*tasks)
+        assert gateway._admission("limited", gateway._routes.match("limited")).limiter.max_limit == 10
+        for i in range(MAX_TOPIC_ADMISSIONS + 10):
+            gateway._admission(f"t{i}", gateway._routes.match(f"t{i}"))
+        assert len(gateway._topic_admissions) == MAX_TOPIC_ADMISSIONS
+
+    asyncio.run(requests())
+
+
+class FakeQueue:
+    """Delivers bodies to the gateway's reply consumer, as an aio_pika queue iterator would."""
+
+    def __init__(self, bodies):
+        self.bodies = bodies
+        self.acked = 0
+
+    def iterator(self, no_ack=False):
+        queue = self
+
+        class Message:
+            def __init__(self, body):
+                self.body = body
+
+            async def ack(self):
+                queue.acked += 1
+
+        class Iterator:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *_):
+                pass
+
+            async def __aiter__(self):
+                for body in queue.bodies:
+                    yield Message(body)
+                await asyncio.Event().wait()  # the queue stays open for more replies
+
+        return Iterator()
+
+
+def test_replies_resolve_in_order():
+    """assert that replies decoded at once, some on the thread pool, resolve in the order they arrived, and that a
+    reply that can't be decoded is dropped without stopping the others"""
+    gateway = make_gateway(reply_consumers=4)
+    bodies = []
+    for i in range(20):
+        data = "x" * THREADED_DECODE_BYTES if i % 3 == 0 else i
+        bodies.append(encodes(Message(data=data, scope=Scope(metadata={"correlation_id": str(i)}))).encode("utf-8"))
+    bodies.insert(5, b"not json")
+    gateway._queue = FakeQueue(bodies)
+    resolved = []
+    gateway._replies.resolve = lambda correlation_id, reply: resolved.append(correlation_id)
+
+    async def consume():
+        consumer = asyncio.ensure_future(gateway._run_rpc_consumer())
+        while len(resolved) < 20:
+            await asyncio.sleep(0.01)
+        consumer.cancel()
+
+    asyncio.run(asyncio.wait_for(consume(), timeout=5))
+    assert resolved == [str(i) for i in range(20)]
+    assert gateway._queue.acked == 21
+
+
+def test_swept_request_times_out():
+    """assert that a request whose registration is swept while it waits for its reply times out, rather than being
+    cancelled, so that a batch reports it as timed out alongside the other items' replies"""
+    gateway = make_gateway()
+    client = Client("a", ClientSettings(rate=1000, burst=1000, weight=1))
+
+    async def publish(message):
+        await asyncio.sleep(0.05)  # a slow publish uses up some of the registration's time before the wait starts
+        if message.key == "b":
+            gateway._replies.resolve(message.scope.correlation_id, reply_to("answer"))
+
+    gateway._publish = publish
+
+    async def batch():
+        async def sweep():
+            await asyncio.sleep(0.07)
+            gateway._replies.sweep()
+
+        sweeper = asyncio.ensure_future(sweep())
+        replies = await asyncio.gather(gateway._batch_item({"topic": "a"}, 0.05, client), gateway._batch_item({"topic": "b"}, 60, client))
+        await sweeper
+        return [json.loads(reply) for reply in replies]
+
+    timed_out, answered = asyncio.run(asyncio.wait_for(batch(), timeout=5))
+    assert timed_out["error"]["type"] == "TimeoutError"
+    assert answered["data"] == "answer"
+    assert gateway._replies.stats()["swept"] == 1
+
+
+def test_hedge_records_first_attempt():
+    """assert that a hedged request records its latency from when it was first published, rather than from when the
+    hedge that answered it was, so that hedging doesn't pull the topic's percentile down to the hedges' latency"""
+    gateway = make_gateway()
+    for _ in range(MIN_SAMPLES):
+        gateway._hedging.record("a", 0.05)
+    published = []
+
+    async def publish(message):
+        published.append(message)
+        if len(published) == 2:
+            gateway._replies.resolve(message.scope.correlation_id, reply_to("hedged"))
+
+    gateway._publish = publish
+    reply = asyncio.run(asyncio.wait_for(gateway._hedged_rpc("a", {}, 5), timeout=5))
+    assert json.loads(reply.body)["data"] == "hedged"
+    assert gateway._hedging.stats()["hedge_wins"] == 1
+    assert gateway._hedging._topics["a"].samples[-1] >= 0.05
+
+
+class FakeWebsocket:
+    def __init__(self, frames, sending=None):
+        self.headers = {}
+        self.remote_addr = "127.0.0.1"
+        self.frames: "asyncio.Queue[str]" = asyncio.Queue()
+        for frame in frames:
+            self.frames.put_nowait(frame)
+        self.sent = []
+        self.sending = sending  # if set, sends wait for it
+
+    async def receive(self):
+        return await self.frames.get()
+
+    async def send(self, frame):
+        if self.sending is not None:
+            await self.sending.wait()
+        self.sent.append(json.loads(frame))
+
+
+def reply_to(data):
+    return peek(encodes(Message(data=data)).encode("utf-8"))
+
+
+async def run_session(gateway, ws, until):
+    session = asyncio.ensure_future(gateway._run_session(ws))
+    for _ in range(100):
+        await asyncio.sleep(0.01)
+        if until():
+            break
+    await asyncio.sleep(0.05)  # for anything the session shouldn't do to have had the chance
+    session.cancel()
+    await asyncio.gather(session, return_exceptions=True)
+
+
+def test_session():
+    """assert that replies are tagged with their request's id, streams are ended, and bad or failed requests are
+    answered with errors"""
+    gateway = make_gateway()
+
+    async def rpc(topic, data, client, timeout=None):
+        if topic == "fail":
+            raise RuntimeError("boom")
+        return reply_to(data["x"])
+
+    async def rpc_stream(topic, data, client, idle_timeout):
+        for i in range(2):
+            yield reply_to(i)
+
+    gateway._rpc = rpc
+    gateway._rpc_stream = rpc_stream
+    frames = [
+        json.dumps({"id": 1, "topic": "a", "args": {"x": 5}}),
+        json.dumps({"id": "s", "topic": "b", "stream": True}),
+        "not json",
+        json.dumps({"id": 2, "topic": "fail"}),
+    ]
+    ws = FakeWebsocket(frames)
+    asyncio.run(run_session(gateway, ws, lambda: len(ws.sent) == 6))
+
+    by_id = {}
+    for frame in ws.sent:
+        by_id.setdefault(frame["id"], []).append(frame)
+    assert [frame["reply"]["data"] for frame in by_id[1]] == [5]
+    assert [frame.get("reply", {}).get("data") for frame in by_id["s"]] == [0, 1, None]
+    assert by_id["s"][-1]["end"] is True
+    assert by_id[None][0]["reply"]["error"]["type"] == "ValueError"
+    assert by_id[2][0]["reply"]["error"] == {"type": "RuntimeError", "message": "boom"}
+
+
+def test_streams_do_not_defer_termination(monkeypatch):
+    """assert that a single reply defers SIGTERM until it's sent, over HTTP or a session, but an open stream, which may
+    last indefinitely, doesn't"""
+    gateway = make_gateway()
+    deferred = []
+
+    class defer_termination:
+        def __enter__(self):
+            deferred.append(True)
+
+        def __exit__(self, *exc_info):
+            deferred.pop()
+
+    async def rpc(topic, data, client, timeout=None):
+        assert deferred
+        return reply_to(topic)
+
+    async def rpc_stream(topic, data, client, idle_timeout):
+        for i in range(2):
+            assert not deferred
+            yield reply_to(i)
+
+    monkeypatch.setattr(http_gateway, "defer_termination", defer_termination)
+    gateway._rpc = rpc
+    gateway._rpc_stream = rpc_stream
+
+    async def requests():
+        client = gateway.create_app().test_client()
+        response = await client.get("/a")
+        assert json.loads(await response.get_data())["data"] == "a"
+        response = await client.get("/b", headers={"Accept": "application/x-ndjson"})
+        assert [json.loads(line)["data"] for line in (await response.get_data()).decode().splitlines()] == [0, 1]
+
+    asyncio.run(requests())
+    frames = [json.dumps({"id": 1, "topic": "a"}), json.dumps({"id": 2, "topic": "b", "stream": True})]
+    ws = FakeWebsocket(frames)
+    asyncio.run(run_session(gateway, ws, lambda: len(ws.sent) == 4))
+    assert [frame["reply"]["data"] for frame in ws.sent if frame["id"] == 1] == ["a"]
+    assert [frame.get("reply", {}).get("data") for frame in ws.sent if frame["id"] == 2] == [0, 1, None]
+
+
+def test_session_backpressure(monkeypatch):
+    """assert that a session stops reading frames while SESSION_MAX_IN_FLIGHT requests are in flight, and that
+    requests stop producing replies while SESSION_OUTBOX replies wait to be sent"""
+    monkeypatch.setattr(http_gateway, "SESSION_MAX_IN_FLIGHT", 2)
+    monkeypatch.setattr(http_gateway, "SESSION_OUTBOX", 2)
+    gateway = make_gateway()
+    replying = asyncio.Event()
+    calls = []
+    produced = []
+
+    async def rpc(topic, data, client, timeout=None):
+        calls.append(topic)
+        await replying.wait()
+        return reply_to(topic)
+
+    async def rpc_stream(topic, data, client, idle_timeout):
+        for i in range(100):
+            produced.append(i)
+            yield reply_to(i)
+
+    gateway._rpc = rpc
+    gateway._rpc_stream = rpc_stream
+
+    async def session():
+        ws = FakeWebsocket([json.dumps({"id": i, "topic": f"t{i}"}) for i in range(3)])
+        await run_session(gateway, ws, lambda: len(calls) == 2)
+        assert calls == ["t0", "t1"]
+        assert ws.frames.qsize() == 1
+
+        sending = asyncio.Event()
+        ws = FakeWebsocket([json.dumps({"id": "s", "topic": "s", "stream": True})], sending)
+        await run_session(gateway, ws, lambda: len(produced) >= 4)
+        # two replies in the outbox, one being sent, and one waiting to be put in the outbox
+        assert len(produced) == 4
+
+    asyncio.run(session())
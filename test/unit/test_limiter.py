@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+import pytest
+
+from ergo.limiter import AdaptiveLimiter, Overloaded
+
+
+def test_sheds_beyond_limit():
+    limiter = AdaptiveLimiter(max_limit=2, initial_limit=2)
+    with limiter.admit(), limiter.admit():
+        with pytest.raises(Overloaded):
+            with limiter.admit():
+                pass
+    assert limiter.stats()["rejected"] == 1
+    with limiter.admit():
+        pass
+
+
+def test_increases_under_load():
+    limiter = AdaptiveLimiter(max_limit=20, initial_limit=4)
+    for _ in range(10):
+        with limiter.admit(), limiter.admit():
+            pass
+    assert 4 < limiter.limit <= 20
+
+
+def test_decreases_on_timeout():
+    limiter = AdaptiveLimiter(max_limit=100, initial_limit=100)
+    with pytest.raises(asyncio.TimeoutError):
+        with limiter.admit():
+            raise asyncio.TimeoutError()
+    assert limiter.limit == 90
+
+
+def test_decreases_once_per_slow_spell(monkeypatch):
+    """assert that requests that were in flight together shrink the limit once when they're slow"""
+    now = [0.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    limiter = AdaptiveLimiter(max_limit=100, initial_limit=100)
+    for _ in range(10):
+        with limiter.admit():
+            now[0] += 0.01
+    assert limiter.limit == 100
+    with limiter.admit(), limiter.admit():
+        now[0] += 1.0
+    assert limiter.limit == 90
@@ -0,0 +1,19 @@
+from ergo.message import Message, encodes, peek
+from ergo.scope import Scope
+
+
+def test_peek():
+    """assert that peek finds the real scope, even when the data looks like one"""
+    message = Message(data={"scope": {"id": "decoy", "metadata": {}}}, scope=Scope(metadata={"correlation_id": "a"}), error={"type": "E"})
+    body = encodes(message).encode("utf-8")
+    reply = peek(body)
+    assert reply.body is body
+    assert reply.correlation_id == "a"
+    assert reply.error == {"type": "E"}
+    assert reply.decode() == message
+
+
+def test_peek_other_encodings():
+    reply = peek(b'{"scope": {"metadata": {"correlation_id": "a"}}, "data": 1}')
+    assert reply.correlation_id == "a"
+    assert reply.error is None
@@ -0,0 +1,47 @@
+import threading
+
+from ergo.metrics import DRAIN_THRESHOLD, Registry, timed
+
+
+def test_render():
+    registry = Registry()
+    registry.counter("requests_total", "Requests.", component="a").inc(3)
+    registry.counter("requests_total", "Requests.", component='b"').inc()
+    histogram = registry.histogram("duration_seconds", "Duration.")
+    for value in (0.0005, 0.002, 100.0):
+        histogram.observe(value)
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP duration_seconds Duration.", "# TYPE duration_seconds histogram"]
+    assert 'duration_seconds_bucket{le="0.0005"} 1' in lines
+    assert 'duration_seconds_bucket{le="0.0025"} 2' in lines
+    assert 'duration_seconds_bucket{le="60"} 2' in lines
+    assert 'duration_seconds_bucket{le="+Inf"} 3' in lines
+    assert "duration_seconds_count 3" in lines
+    assert lines.count("# TYPE requests_total counter") == 1
+    assert 'requests_total{component="a"} 3' in lines
+    assert 'requests_total{component="b\\""} 1' in lines
+
+
+def test_concurrent_recording():
+    gauge = Registry().gauge("in_flight", "In flight.")
+
+    def record():
+        for _ in range(DRAIN_THRESHOLD * 5):
+            gauge.inc()
+            gauge.dec()
+        gauge.inc()
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert gauge.value == 8
+
+
+def test_timed_excludes_consumer():
+    histogram = Registry().histogram("duration_seconds", "Duration.")
+    for _ in timed(range(3), histogram):
+        pass
+    sum_sample, count_sample = histogram.collect()[-2:]
+    assert count_sample[2] == 1 and sum_sample[2] < 0.01
@@ -0,0 +1,52 @@
+import asyncio
+import json
+import threading
+
+from ergo.config import Config
+from ergo.function_invocable import FunctionInvocable
+from ergo.quart_http_invoker import QuartHttpInvoker
+
+
+async def async_product(x, y):
+    await asyncio.sleep(0)
+    return float(x) * float(y)
+
+
+async def async_count(n):
+    for i in range(int(n)):
+        await asyncio.sleep(0)
+        yield i
+
+
+def thread_name():
+    return threading.current_thread().name
+
+
+def make_client(handler):
+    invoker = QuartHttpInvoker(FunctionInvocable(Config({"func": f"{__file__}:{handler}"})))
+    return invoker.create_app().test_client()
+
+
+def test_async_handlers():
+    async def requests():
+        client = make_client("async_product")
+        response = await client.post("/?x=4", json={"y": 5})
+        assert json.loads(await response.get_data())["data"] == 20.0
+
+        client = make_client("async_count")
+        response = await client.get("/?n=3")
+        assert [message["data"] for message in json.loads(await response.get_data())] == [0, 1, 2]
+
+        response = await client.get("/?n=3", headers={"Accept": "application/x-ndjson"})
+        lines = (await response.get_data()).decode().splitlines()
+        assert [json.loads(line)["data"] for line in lines] == [0, 1, 2]
+
+    asyncio.run(requests())
+
+
+def test_sync_handler_runs_off_the_event_loop():
+    async def request():
+        response = await make_client("thread_name").get("/")
+        return json.loads(await response.get_data())["data"]
+
+    assert asyncio.run(request()) != threading.current_thread().name
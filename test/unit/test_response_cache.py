@@ -0,0 +1,79 @@
+import asyncio
+
+from ergo.response_cache import ENTRY_OVERHEAD, ResponseCache
+from ergo.routes import RouteTable
+
+
+def make_fetch(calls, body="body", cacheable=True, delay=0.0):
+    async def fetch():
+        calls.append(body)
+        await asyncio.sleep(delay)
+        return body, cacheable
+
+    return fetch
+
+
+def test_collapsed_misses():
+    """assert that concurrent misses for one key make a single fetch, and later gets hit the cache"""
+    async def requests():
+        cache = ResponseCache(max_bytes=10**6, ttl=60)
+        calls = []
+        bodies = await asyncio.gather(*(cache.get("key", make_fetch(calls, delay=0.01)) for _ in range(10)))
+        assert bodies == ["body"] * 10
+        assert await cache.get("key", make_fetch(calls)) == "body"
+        assert calls == ["body"]
+        return cache.stats()
+
+    stats = asyncio.run(requests())
+    assert (stats["misses"], stats["collapsed"], stats["hits"]) == (1, 9, 1)
+
+
+def test_uncacheable():
+    async def requests():
+        cache = ResponseCache(max_bytes=10**6, ttl=60)
+        calls = []
+        for _ in range(2):
+            await cache.get("key", make_fetch(calls, cacheable=False))
+        return calls
+
+    assert len(asyncio.run(requests())) == 2
+
+
+def test_stale_while_revalidate():
+    async def requests():
+        cache = ResponseCache(max_bytes=10**6, ttl=0.05, stale=60)
+        calls = []
+        await cache.get("key", make_fetch(calls, body="old"))
+        await asyncio.sleep(0.06)
+        # served stale, while the refresh happens in the background
+        assert await cache.get("key", make_fetch(calls, body="new")) == "old"
+        await asyncio.sleep(0.001)
+        assert await cache.get("key", make_fetch(calls, body="newer")) == "new"
+        return calls
+
+    assert asyncio.run(requests()) == ["old", "new"]
+
+
+def test_lru_eviction():
+    async def requests():
+        cache = ResponseCache(max_bytes=2 * (ENTRY_OVERHEAD + 4), ttl=60)
+        calls = []
+        await cache.get("a", make_fetch(calls, body="aaaa"))
+        await cache.get("b", make_fetch(calls, body="bbbb"))
+        await cache.get("a", make_fetch(calls, body="aaaa"))
+        await cache.get("c", make_fetch(calls, body="cccc"))  # evicts b, the least recently used
+        await cache.get("a", make_fetch(calls, body="aaaa"))
+        await cache.get("b", make_fetch(calls, body="bbbb"))
+        return calls, cache.stats()
+
+    calls, stats = asyncio.run(requests())
+    assert calls == ["aaaa", "bbbb", "cccc", "bbbb"]
+    assert stats["bytes"] <= stats["max_bytes"]
+
+
+def test_route_table():
+    routes = RouteTable({"catalog": {"cache_ttl": 10}, "catalog/products": {"cache_ttl": 30}})
+    assert routes.match("catalog/products/list").cache_ttl == 30
+    assert routes.match("catalog.products").prefix == "catalog/products"
+    assert routes.match("catalog/productsearch").cache_ttl == 10
+    assert routes.match("orders").cache_ttl is None
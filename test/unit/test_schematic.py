@@ -0,0 +1,55 @@
+import os
+
+from ergo import schematic
+from ergo.schematic import derive_edges
+
+
+def test_derive_edges():
+    configs = [
+        {"name": "a", "subtopic": "ingress", "pubtopic": "x.y"},
+        {"name": "b", "subtopic": "y", "pubtopic": "z", "error_pubtopic": "x.error"},
+        {"name": "c", "subtopic": ["x", "y.x"]},
+        {"name": "d", "subtopic": "y", "pubtopic": "y"},
+    ]
+    assert sorted(derive_edges(configs)) == [
+        ("topic_error.x", "topic_x"),
+        ("topic_x.y", "topic_x"),
+        ("topic_x.y", "topic_y"),
+    ]
+
+
+def test_parse_yaml_files_cache(tmp_path, monkeypatch):
+    """
+    Assert that unchanged files are served from the cache, and that changed files are parsed again.
+    """
+    yaml_file = str(tmp_path / "component.yaml")
+    cache_path = str(tmp_path / ".ergo" / "cache.json")
+    with open(yaml_file, "w") as fh:
+        fh.write("func: a.py:a\n")
+    assert schematic.parse_yaml_files([yaml_file], cache_path) == {yaml_file: {"func": "a.py:a"}}
+
+    def parse_yaml_file(_):
+        raise AssertionError("parsed a cached file")
+
+    monkeypatch.setattr(schematic, "parse_yaml_file", parse_yaml_file)
+    assert schematic.parse_yaml_files([yaml_file], cache_path) == {yaml_file: {"func": "a.py:a"}}
+
+    monkeypatch.undo()
+    with open(yaml_file, "w") as fh:
+        fh.write("func: b.py:bb\n")
+    assert schematic.parse_yaml_files([yaml_file], cache_path) == {yaml_file: {"func": "b.py:bb"}}
+
+
+def test_config_cache_merges(tmp_path):
+    """
+    Assert that parsing one folder's files keeps another's cached, and that yaml JSON can't represent isn't cached.
+    """
+    cache_path = str(tmp_path / "cache.json")
+    files = {name: str(tmp_path / f"{name}.yaml") for name in ("a", "b", "c")}
+    for name, contents in (("a", "func: a.py:a\n"), ("b", "func: b.py:b\n"), ("c", "1: c\n")):
+        with open(files[name], "w") as fh:
+            fh.write(contents)
+    schematic.parse_yaml_files([files["a"]], cache_path)
+    assert schematic.parse_yaml_files([files["b"], files["c"]], cache_path)[files["c"]] == {1: "c"}
+    cache = schematic.read_config_cache(cache_path)
+    assert sorted(cache) == sorted(os.path.abspath(files[name]) for name in ("a", "b"))
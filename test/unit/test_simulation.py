@@ -0,0 +1,58 @@
+import pytest
+
+from ergo.simulation import simulate
+
+
+def test_simulate():
+    configs = [
+        {"name": "split", "subtopic": "raw", "pubtopic": "item", "yield_ratio": 2},
+        {"name": "store", "subtopic": "item", "pubtopic": "stored"},
+    ]
+    spec = {
+        "duration": 2000,
+        "warmup": 100,
+        "arrivals": {"raw": 10},
+        "components": {
+            "split": {"service_time": {"distribution": "constant", "value": 0.02}},
+            "store": {"service_time": {"distribution": "exponential", "mean": 0.02}, "replicas": 2},
+        },
+    }
+    result = simulate(configs, spec)
+
+    assert result.components["split"].throughput == pytest.approx(10, rel=0.05)
+    assert result.components["store"].throughput == pytest.approx(20, rel=0.05)
+    assert result.components["split"].utilization == pytest.approx(0.2, rel=0.05)
+    assert result.components["store"].utilization == pytest.approx(0.2, rel=0.1)
+    assert result.completed == pytest.approx(result.components["store"].handled, rel=0.01)
+    assert 0.03 <= result.latency["p50"] <= result.latency["p99"]
+
+
+def test_simulate_bottleneck():
+    configs = [
+        {"name": "fast", "subtopic": "raw", "pubtopic": "next"},
+        {"name": "slow", "subtopic": "next"},
+    ]
+    spec = {
+        "duration": 100,
+        "arrivals": {"raw": 20},
+        "defaults": {"service_time": {"distribution": "constant", "value": 0.01}},
+        "components": {"slow": {"service_time": {"distribution": "constant", "value": 0.1}}},
+    }
+    result = simulate(configs, spec)
+
+    assert result.bottleneck == "slow"
+    assert result.components["slow"].utilization > 0.99
+    assert result.components["slow"].final_queue_depth > 100
+
+
+def test_simulate_queue_depth_excludes_handled_messages():
+    configs = [{"name": "a", "subtopic": "raw"}]
+    spec = {"duration": 100, "arrivals": {"raw": 1}, "defaults": {"service_time": {"distribution": "constant", "value": 0.01}}}
+    result = simulate(configs, spec)
+
+    assert result.components["a"].max_queue_depth == 0
+
+
+def test_simulate_rejects_warmup_past_duration():
+    with pytest.raises(ValueError, match="warmup"):
+        simulate([{"name": "a", "subtopic": "raw"}], {"duration": 10, "warmup": 10})
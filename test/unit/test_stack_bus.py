@@ -0,0 +1,97 @@
+import io
+import json
+
+from ergo.config import Config
+from ergo.context import Context, Envelope
+from ergo.function_invocable import FunctionInvocable
+from ergo.message import Message
+from ergo.stack_bus import StackBus
+
+
+def double(x):
+    return x * 2
+
+
+def count(n):
+    for i in range(n):
+        yield i
+
+
+def fail():
+    raise ValueError("failed")
+
+
+def ask(context: Context, data):
+    if data == "answer":
+        return "asker got answer"
+    return Envelope("question", topic="question", reply_to=context.instance_id)
+
+
+def answer():
+    return "answer"
+
+
+def make_bus(*manifests: dict) -> StackBus:
+    return StackBus([FunctionInvocable(Config({"func": f"{__file__}:{manifest.pop('handler')}", **manifest})) for manifest in manifests])
+
+
+def test_pipeline():
+    """
+    Assert that messages are routed between components with any-order key semantics, and that messages without
+    subscribers leave the bus.
+    """
+    bus = make_bus(
+        {"handler": "count", "subtopic": "count", "pubtopic": "number.counted"},
+        {"handler": "double", "subtopic": "counted.number", "pubtopic": "doubled", "args": {"x": "data"}},
+    )
+    bus.publish(Message(data={"n": 3}, key="count.please"))
+    assert [message.data for message in bus.drain()] == [0, 2, 4]
+
+
+def test_fan_out():
+    """
+    Assert that every subscriber receives its own copy of a message's scope.
+    """
+    bus = make_bus(
+        {"handler": "double", "subtopic": "a", "pubtopic": "doubled.a"},
+        {"handler": "double", "subtopic": "b", "pubtopic": "doubled.b"},
+    )
+    message = Message(data={"x": 1}, key="a.b")
+    bus.publish(message)
+    results = list(bus.drain())
+    assert sorted(result.key for result in results) == ["doubled.a", "doubled.b"]
+    assert results[0].scope is message.scope
+    assert results[1].scope is not message.scope
+
+
+def test_error_pubtopic():
+    """
+    Assert that failed messages leave the bus with their error, and are also routed to the error_pubtopic.
+    """
+    bus = make_bus(
+        {"handler": "fail", "subtopic": "fail", "error_pubtopic": "failed"},
+        {"handler": "count", "subtopic": "failed", "pubtopic": "recovered", "args": {"n": "data.n"}},
+    )
+    bus.publish(Message(data={"n": 1}, key="fail"))
+    results = list(bus.drain())
+    assert results[0].error["type"] == "ValueError"
+    assert [(result.key, result.data) for result in results[1:]] == [("recovered", 0)]
+
+
+def test_request_reply():
+    """
+    Assert that a reply to a component's instance id is delivered to that component only.
+    """
+    bus = make_bus(
+        {"handler": "ask", "subtopic": "ask", "pubtopic": "done"},
+        {"handler": "answer", "subtopic": "question", "pubtopic": "answered"},
+    )
+    bus.publish(Message(data=None, key="ask"))
+    assert [(message.key, message.data) for message in bus.drain()] == [("done", "asker got answer")]
+
+
+def test_start():
+    bus = make_bus({"handler": "double", "subtopic": "double", "pubtopic": "doubled"})
+    stdout = io.StringIO()
+    bus.start(stdin=io.StringIO('{"key": "double", "data": {"x": 21}}\n\n'), stdout=stdout)
+    assert [json.loads(line)["data"] for line in stdout.getvalue().splitlines()] == [42]
@@ -0,0 +1,37 @@
+import copy
+import pickle
+
+from ergo.key import Key
+from ergo.topic import PubTopic, SubTopic, Topic
+
+
+def test_key_interning():
+    assert Key("a") is Key("a")
+    assert Key("a") == "a"
+    assert hash(Key("a")) == hash("a")
+
+
+def test_key_copies():
+    key = Key("a")
+    assert pickle.loads(pickle.dumps(key)) is key
+    assert copy.deepcopy(key) is key
+    topic = PubTopic("a.b")
+    for copied in (pickle.loads(pickle.dumps(topic)), copy.deepcopy(topic)):
+        assert isinstance(copied, PubTopic)
+        assert str(copied) == str(topic)
+        assert copied == topic
+
+
+def test_topic_str():
+    assert str(PubTopic("b.a")) == "a.b"
+    assert str(SubTopic("b.a")) == "#.a.#.b.#"
+    assert str(SubTopic("a.a")) == "#.a.#.a.#"
+    assert str(SubTopic(None)) == "#"
+    assert str(PubTopic(None)) == ""
+
+
+def test_topic_equality():
+    assert PubTopic("a.b") == PubTopic("b.a")
+    assert PubTopic("a.b") != SubTopic("a.b")
+    assert Topic("a.b").overlap(Topic("b.c")) == {Key("b")}
+    assert not Topic("a").overlap(Topic(None))
@@ -0,0 +1,25 @@
+from ergo.topic import SubTopic
+from ergo.topic_index import TopicIndex
+
+
+def test_match():
+    index = TopicIndex()
+    index.add("a", "a")
+    index.add("b.a", "ab")
+    index.add(SubTopic("a.c"), "ac")
+    index.add(None, "wildcard")
+
+    assert index.match("a") == ["a", "wildcard"]
+    assert index.match("a.b") == ["a", "ab", "wildcard"]
+    assert index.match("c.b.a.d") == ["a", "ab", "ac", "wildcard"]
+    assert index.match("b") == ["wildcard"]
+
+
+def test_remove():
+    index = TopicIndex()
+    subscription_id = index.add("a.b", "ab")
+    index.add("a", "a")
+    index.remove(subscription_id)
+
+    assert index.match("a.b") == ["a"]
+    assert len(index) == 1
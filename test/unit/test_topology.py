@@ -0,0 +1,30 @@
+import math
+
+from ergo.topology import analyze
+
+
+def test_analyze():
+    configs = [
+        {"name": "ingest", "subtopic": "raw", "pubtopic": "parsed.record"},
+        {"name": "split", "subtopic": "record", "pubtopic": "item", "yield_ratio": 10},
+        {"name": "store", "subtopic": "item", "pubtopic": "stored"},
+        {"name": "audit", "subtopic": "parsed", "pubtopic": "audited"},
+    ]
+    analysis = analyze(configs)
+
+    assert analysis.fan_out == {"ingest": 2, "split": 1, "store": 0, "audit": 0}
+    assert analysis.fan_in == {"ingest": 0, "split": 1, "store": 1, "audit": 1}
+    assert analysis.cycles == []
+    # raw -> ingest -> (audit + split -> 10 * store)
+    assert analysis.amplification == {"raw": 13, "record": 11, "item": 1, "parsed": 1}
+
+
+def test_analyze_error_cycle():
+    configs = [
+        {"name": "retry", "subtopic": "work", "pubtopic": "done", "error_pubtopic": "work.retry"},
+        {"name": "ingress", "subtopic": "request", "pubtopic": "work"},
+    ]
+    analysis = analyze(configs)
+
+    assert [(cycle.components, cycle.error) for cycle in analysis.cycles] == [(["retry"], True)]
+    assert math.isinf(analysis.amplification["request"])